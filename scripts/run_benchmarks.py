@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Executa a suíte de benchmarks com embeddings sintéticos e sinaliza regressões.
+
+Exemplo:
+    python scripts/run_benchmarks.py --sizes small medium --repeat 3
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Adiciona o diretório src ao PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from ml_challenge.utils.benchmark import (  # noqa: E402
+    BENCHMARK_SIZES,
+    DEFAULT_HISTORY_PATH,
+    DEFAULT_THRESHOLD,
+    append_history,
+    find_regressions,
+    load_history,
+    run_benchmarks,
+)
+
+
+def main() -> int:
+    """Executa os benchmarks, grava o histórico e retorna 1 se houver regressão."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["small"], choices=sorted(BENCHMARK_SIZES),
+                        help="Tamanhos de dados avaliados")
+    parser.add_argument("--repeat", type=int, default=1, help="Repetições de cada etapa (vale a mais rápida)")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Processos da varredura de K")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY_PATH, help="Arquivo JSON do histórico")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Aumento relativo de tempo considerado regressão")
+    parser.add_argument("--no-save", action="store_true", help="Não grava a execução no histórico")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Retorna código 1 se houver regressão")
+    args = parser.parse_args()
+
+    run = run_benchmarks(args.sizes, n_jobs=args.n_jobs, repeat=args.repeat)
+    regressions = find_regressions(run, load_history(args.history), threshold=args.threshold)
+
+    print(f"\n{'tamanho':<10}{'amostras':>10}  {'etapa':<14}{'tempo (s)':>11}{'CPU (s)':>10}{'pico RSS (MB)':>15}")
+    for size, result in run["results"].items():
+        for stage, metrics in result["stages"].items():
+            print(f"{size:<10}{result['n_samples']:>10}  {stage:<14}{metrics['wall_s']:>11.4f}"
+                  f"{metrics['cpu_s']:>10.4f}{metrics['peak_rss_mb'] or 0:>15.1f}")
+        print(f"{'':<22}acurácia (cosseno, K={result['best_k']}): {result['accuracy_cosine']:.4f}")
+
+    if not args.no_save:
+        print(f"\nHistórico atualizado: {append_history(run, args.history)}")
+
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} regressão(ões) acima de {args.threshold:.0%}:")
+        for reg in regressions:
+            print(f"   {reg['size']}/{reg['stage']}: {reg['wall_s']:.4f}s vs {reg['baseline_s']:.4f}s "
+                  f"({reg['ratio']:.2f}x)")
+        return 1 if args.fail_on_regression else 0
+
+    print("\n✅ Nenhuma regressão detectada")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""
+Interface de linha de comando do ML Challenge.
+
+Cada subcomando importa apenas os módulos de que precisa: `predict` e `load`
+usam somente numpy e o classificador salvo, sem carregar scikit-learn nem
+matplotlib, que ficam restritos a `evaluate`, `score`, `tsne`, `roc` e `run`.
+
+Exemplos:
+    ml-challenge load mini_gm_public_v0.1.p --store
+    ml-challenge evaluate mini_gm_public_v0.1.p --k-max 15
+    ml-challenge evaluate mini_gm_public_v0.1.store --memory-mb 512
+    ml-challenge score mini_gm_public_v0.1.p --output results/knn_scores.csv
+    ml-challenge tsne mini_gm_public_v0.1.p
+    ml-challenge roc mini_gm_public_v0.1.p --k 13
+    ml-challenge predict results/models/syndrome_knn novos_embeddings.npy --k 5 --output topk.csv
+"""
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Any, Optional, Sequence, Tuple
+
+DEFAULT_DATA_PATH = "mini_gm_public_v0.1.p"
+DEFAULT_MODEL_PATH = "results/models/syndrome_knn"
+DEFAULT_PLOTS_DIR = "results/plots"
+
+
+def _fold_plan(args: argparse.Namespace) -> Tuple[Any, Any, Any, Any]:
+    from .models.folds import FoldPlan
+    from .utils.data_processing import load_data
+
+    X, y, groups = load_data(args.data, return_groups=True)
+    return X, y, groups, FoldPlan.build(y, groups, n_splits=args.folds, random_state=args.random_state)
+
+
+def cmd_load(args: argparse.Namespace) -> int:
+    """Carrega os dados (opcionalmente gerando o store) e mostra um resumo."""
+    import numpy as np
+
+    from .utils.data_processing import convert_pickle_to_store, load_data
+
+    if args.store:
+        print(f"Store gerado em: {convert_pickle_to_store(args.data)}")
+    X, y, groups = load_data(args.data, return_groups=True)
+    print(f"{X.shape[0]} amostras, {X.shape[1]} features ({X.dtype}), "
+          f"{len(np.unique(y))} síndromes, {len(np.unique(groups))} sujeitos")
+    return 0
+
+
+def cmd_evaluate(args: argparse.Namespace) -> int:
+    """Varredura de K com validação cruzada agrupada por sujeito."""
+    X, y, _, fold_plan = _fold_plan(args)
+    if args.memory_mb is not None:
+        from .models.out_of_core import evaluate_knn_out_of_core
+
+        results = evaluate_knn_out_of_core(X, y, k_range=range(1, args.k_max + 1), metrics=args.metrics,
+                                           cv=fold_plan, memory_mb=args.memory_mb)
+    else:
+        from .models.classification import evaluate_knn
+
+        results = evaluate_knn(X, y, k_range=range(1, args.k_max + 1), metrics=args.metrics, cv=fold_plan,
+                               n_jobs=args.n_jobs, dtype=args.dtype)
+
+    print(f"{'K':>3}" + "".join(f"{metric:>12}" for metric in args.metrics))
+    for res in results:
+        print(f"{res['k']:>3}" + "".join(f"{res[f'accuracy_{metric}']:>12.4f}" for metric in args.metrics))
+    for metric in args.metrics:
+        best = max(results, key=lambda res: res[f"accuracy_{metric}"])
+        print(f"Melhor K ({metric}): {best['k']} (acurácia {best[f'accuracy_{metric}']:.4f})")
+    if args.output:
+        _write_json(args.output, results)
+    return 0
+
+
+def cmd_score(args: argparse.Namespace) -> int:
+    """Acurácia, F1 macro, AUC e top-k de cada K a partir de uma única busca de vizinhos por métrica."""
+    from .models.scoring import SCORE_COLUMNS, score_knn, write_scores_csv
+
+    X, y, _, fold_plan = _fold_plan(args)
+    rows = score_knn(X, y, k_range=range(1, args.k_max + 1), metrics=args.metrics, cv=fold_plan,
+                     n_jobs=args.n_jobs)
+
+    columns = SCORE_COLUMNS + tuple(name for name in rows[0] if name.startswith("top_"))
+    print(f"{'métrica':<10}{'K':>3}" + "".join(f"{name:>16}" for name in columns))
+    for row in rows:
+        print(f"{row['metric']:<10}{row['k']:>3}" + "".join(f"{row[name]:>16.4f}" for name in columns))
+    print(f"Tabela salva em: {write_scores_csv(rows, args.output)}")
+    return 0
+
+
+def cmd_tsne(args: argparse.Namespace) -> int:
+    """Projeção t-SNE dos embeddings e gráfico em `<output-dir>/tsne.*`."""
+    from .utils.cache import StageCache
+    from .utils.data_processing import load_data
+    from .utils.projection import compute_tsne_layout
+    from .utils.rendering import PlotRenderer
+    from .utils.visualization import plot_tsne
+
+    X, y = load_data(args.data)
+    cache = StageCache(enabled=not args.no_cache)
+    embedding, _ = compute_tsne_layout(X, y, max_samples=args.max_samples, cache=cache)
+    renderer = PlotRenderer(args.output_dir, formats=args.formats, background=False)
+    plot_tsne(X, y, embedding, renderer=renderer)
+    for path in renderer.close():
+        print(f"Gráfico salvo em: {path}")
+    return 0
+
+
+def cmd_roc(args: argparse.Namespace) -> int:
+    """Curvas ROC médias do KNN no holdout e gráfico em `<output-dir>/roc_curve.*`."""
+    from .models.evaluation import compute_roc_curves, plot_roc_curve
+    from .utils.rendering import PlotRenderer
+
+    X, y, _, fold_plan = _fold_plan(args)
+    if args.memory_mb is not None:
+        from .models.out_of_core import compute_roc_curves_out_of_core
+
+        curves = compute_roc_curves_out_of_core(X, y, args.k, fold_plan=fold_plan, metrics=args.metrics,
+                                                memory_mb=args.memory_mb)
+    else:
+        curves = compute_roc_curves(X, y, args.k, fold_plan=fold_plan, metrics=args.metrics, n_jobs=args.n_jobs,
+                                    dtype=args.dtype)
+    for metric, curve in curves.items():
+        print(f"AUC ({metric}, K={args.k}): {curve['auc']:.4f}")
+    renderer = PlotRenderer(args.output_dir, formats=args.formats, background=False)
+    plot_roc_curve(X, y, args.k, curves=curves, renderer=renderer)
+    for path in renderer.close():
+        print(f"Gráfico salvo em: {path}")
+    return 0
+
+
+def _read_queries(path: Path) -> Tuple[Any, Optional[Any], Optional[Any]]:
+    """Embeddings de consulta de um `.npy` (sem labels nem sujeitos) ou de um pickle/store no formato de entrada."""
+    import numpy as np
+
+    if path.suffix == ".npy":
+        return np.load(path, mmap_mode="r"), None, None
+    from .utils.data_processing import load_data
+
+    return load_data(path, return_groups=True)
+
+
+def cmd_predict(args: argparse.Namespace) -> int:
+    """Top-k síndromes para novos embeddings usando o modelo salvo."""
+    import numpy as np
+
+    from .models.classifier import SyndromeClassifier
+
+    model = SyndromeClassifier.load(args.model)
+    X, y, subjects = _read_queries(args.data)
+    if args.by_subject:
+        if subjects is None:
+            print("--by-subject requer um pickle/store com os sujeitos", file=sys.stderr)
+            return 2
+        subject_ids, labels, scores = model.predict_subjects(X, subjects, k=args.k, fusion=args.fusion,
+                                                             block_size=args.block_size)
+        if y is not None:
+            # Todas as imagens de um sujeito têm a mesma síndrome
+            _, first = np.unique(np.asarray(subjects), return_index=True)
+            y = np.asarray(y)[first]
+    else:
+        subject_ids = None
+        labels, scores = model.predict_topk(X, k=args.k, block_size=args.block_size)
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["row" if subject_ids is None else "subject"] + [f"{field}_{rank}" for rank in range(1, labels.shape[1] + 1)
+                                       for field in ("label", "score")])
+            for row, (row_labels, row_scores) in enumerate(zip(labels, scores)):
+                writer.writerow([row if subject_ids is None else subject_ids[row]] + [value for pair in zip(row_labels, row_scores) for value in pair])
+        print(f"Predições salvas em: {args.output}")
+    else:
+        for row in range(min(len(labels), args.show)):
+            ranked = ", ".join(f"{label} ({score:.2f})" for label, score in zip(labels[row], scores[row]))
+            print(f"{row if subject_ids is None else subject_ids[row]}: {ranked}")
+        if len(labels) > args.show:
+            print(f"... {len(labels) - args.show} linhas omitidas (use --output para salvar todas)")
+
+    if y is not None:
+        y = np.asarray(y).astype(str)
+        hits = labels.astype(str) == y[:, None]
+        print(f"Acurácia top-1: {hits[:, 0].mean():.4f}, top-{labels.shape[1]}: {hits.any(axis=1).mean():.4f}")
+    return 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    """Servidor HTTP local de inferência (ver `serving`)."""
+    from .serving import serve
+
+    serve(args.model, args.host, args.port, args.max_batch_size, args.max_wait_ms)
+    return 0
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    """Pipeline completo configurado em `config/config.yaml`."""
+    from .main import main as run_pipeline
+
+    run_pipeline(args.data)
+    return 0
+
+
+def _write_json(path: Path, value: Any) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(value, f, indent=2)
+    print(f"Resultados salvos em: {path}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Cria o parser com um subcomando por etapa."""
+    parser = argparse.ArgumentParser(
+        prog="ml-challenge", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_data(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("data", nargs="?", type=Path, default=Path(DEFAULT_DATA_PATH),
+                         help="Pickle de embeddings (ou store)")
+
+    def add_cv(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--metrics", nargs="+", default=["euclidean", "cosine"], help="Métricas de distância")
+        sub.add_argument("--folds", type=int, default=10, help="Número de folds agrupados por sujeito")
+        sub.add_argument("--random-state", type=int, default=42, help="Semente dos folds")
+        sub.add_argument("--n-jobs", type=int, default=1, help="Processos/threads da busca de vizinhos")
+        sub.add_argument("--dtype", default="float32", choices=["float32", "float16", "int8"],
+                         help="Representação dos embeddings na busca")
+        sub.add_argument("--memory-mb", type=float,
+                         help="Busca fora da memória: lê os embeddings do store em blocos dentro deste orçamento")
+
+    def add_plot(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--output-dir", type=Path, default=Path(DEFAULT_PLOTS_DIR), help="Diretório dos gráficos")
+        sub.add_argument("--formats", nargs="+", default=["png"], help="Formatos dos gráficos (ex.: png svg)")
+
+    sub = subparsers.add_parser("load", help=cmd_load.__doc__)
+    add_data(sub)
+    sub.add_argument("--store", action="store_true", help="Gera o store mapeado em memória ao lado do pickle")
+    sub.set_defaults(func=cmd_load)
+
+    sub = subparsers.add_parser("evaluate", help=cmd_evaluate.__doc__)
+    add_data(sub)
+    add_cv(sub)
+    sub.add_argument("--k-max", type=int, default=15, help="Maior K avaliado")
+    sub.add_argument("--output", type=Path, help="Arquivo JSON com a acurácia de cada K")
+    sub.set_defaults(func=cmd_evaluate)
+
+    sub = subparsers.add_parser("score", help=cmd_score.__doc__)
+    add_data(sub)
+    add_cv(sub)
+    sub.add_argument("--k-max", type=int, default=15, help="Maior K avaliado")
+    sub.add_argument("--output", type=Path, default=Path("results/knn_scores.csv"), help="Arquivo CSV da tabela")
+    sub.set_defaults(func=cmd_score)
+
+    sub = subparsers.add_parser("tsne", help=cmd_tsne.__doc__)
+    add_data(sub)
+    add_plot(sub)
+    sub.add_argument("--max-samples", type=int, default=5000, help="Amostras usadas no ajuste do t-SNE")
+    sub.add_argument("--no-cache", action="store_true", help="Não usa o cache de etapas")
+    sub.set_defaults(func=cmd_tsne)
+
+    sub = subparsers.add_parser("roc", help=cmd_roc.__doc__)
+    add_data(sub)
+    add_cv(sub)
+    add_plot(sub)
+    sub.add_argument("--k", type=int, required=True, help="Número de vizinhos")
+    sub.set_defaults(func=cmd_roc)
+
+    sub = subparsers.add_parser("predict", help=cmd_predict.__doc__)
+    sub.add_argument("model", type=Path, help="Diretório do modelo salvo")
+    sub.add_argument("data", type=Path, help="Embeddings de consulta (.npy) ou pickle/store com labels")
+    sub.add_argument("--k", type=int, default=5, help="Síndromes retornadas por consulta")
+    sub.add_argument("--block-size", type=int, default=1024, help="Consultas por bloco")
+    sub.add_argument("--output", type=Path, help="Arquivo CSV com todas as predições")
+    sub.add_argument("--show", type=int, default=10, help="Linhas mostradas sem --output")
+    sub.add_argument("--by-subject", action="store_true",
+                     help="Funde as imagens de cada sujeito em uma única predição (requer pickle/store)")
+    sub.add_argument("--fusion", default="mean", choices=["mean", "max", "rank"],
+                     help="Fusão dos scores das imagens de um sujeito")
+    sub.set_defaults(func=cmd_predict)
+
+    sub = subparsers.add_parser("serve", help=cmd_serve.__doc__)
+    sub.add_argument("--model", type=Path, default=Path(DEFAULT_MODEL_PATH), help="Diretório do modelo salvo")
+    sub.add_argument("--host", default="127.0.0.1", help="Endereço de escuta")
+    sub.add_argument("--port", type=int, default=8000, help="Porta de escuta")
+    sub.add_argument("--max-batch-size", type=int, default=64, help="Máximo de embeddings por lote")
+    sub.add_argument("--max-wait-ms", type=float, default=2.0, help="Espera máxima para completar um lote")
+    sub.set_defaults(func=cmd_serve)
+
+    sub = subparsers.add_parser("run", help=cmd_run.__doc__)
+    add_data(sub)
+    sub.set_defaults(func=cmd_run)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Ponto de entrada do comando `ml-challenge`."""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,31 +5,173 @@ Script principal do ML Challenge.
 import sys
 from pathlib import Path
 
+import yaml
+
 # Adiciona o diretório src ao PYTHONPATH
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from ml_challenge.utils.cache import StageCache, hash_arrays
 from ml_challenge.utils.data_processing import load_data
+from ml_challenge.utils.embedding_store import store_fingerprint
+from ml_challenge.utils.profiling import StageProfiler
+from ml_challenge.utils.projection import compute_tsne_layout
+from ml_challenge.utils.rendering import DEFAULT_MAX_POINTS, PlotRenderer
 from ml_challenge.utils.visualization import plot_tsne
 from ml_challenge.models.classification import evaluate_knn
-from ml_challenge.models.evaluation import plot_roc_curve
+from ml_challenge.models.evaluation import compute_roc_curves, plot_roc_curve
+from ml_challenge.models.folds import FoldPlan
+from ml_challenge.models.classifier import SyndromeClassifier
+from ml_challenge.models.prototypes import evaluate_prototypes
+from ml_challenge.models.scoring import score_neighbor_table, write_scores_csv
+from ml_challenge.models.search import successive_halving_search
+from ml_challenge.models.statistics import bootstrap_k_range, format_interval, out_of_fold_neighbors
+from ml_challenge.models.subjects import evaluate_subjects
 
-if __name__ == "__main__":
-    file_path = "mini_gm_public_v0.1.p"
+CONFIG_PATH = Path(__file__).parent / "config" / "config.yaml"
+
+
+def main(file_path: str = "mini_gm_public_v0.1.p") -> None:
+    """Executa o pipeline completo: dados, t-SNE, varredura de K, busca, ROC e modelo."""
+    
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    n_jobs = config.get('performance', {}).get('n_jobs', 1)
+    tsne_params = dict(config.get('visualization', {}).get('tsne', {}))
+    tsne_params.pop('n_components', None)
+    model_config = config.get('model', {})
+    k_range = model_config.get('k_range', list(range(1, 16)))
+    metrics = tuple(model_config.get('metrics', ['euclidean', 'cosine']))
+    cache_config = config.get('cache', {})
+    cache = StageCache(cache_config.get('dir', 'results/cache'), cache_config.get('max_size_mb', 512),
+                       enabled=cache_config.get('enabled', True))
+    plots_config = config.get('visualization', {}).get('plots', {})
+    renderer = PlotRenderer(config.get('output', {}).get('plots_dir', 'results/plots'),
+                            formats=plots_config.get('formats', ['png']), dpi=plots_config.get('dpi', 150),
+                            background=plots_config.get('background', True))
+    profiling_config = config.get('profiling', {})
+    profiler = StageProfiler(profiling_config.get('enabled', True), profiling_config.get('cprofile_stages'),
+                             profiling_config.get('trace_memory_stages'),
+                             profiling_config.get('output_dir', 'results/profiles'))
     
     print("Carregando os dados...")
-    X, y = load_data(file_path)
+    with profiler.stage('load_data') as stage:
+        X, y, groups = load_data(file_path, return_groups=True)
+        stage.n_samples = len(y)
     print(f"Dados carregados: {X.shape[0]} amostras, {X.shape[1]} features")
+    # Dados vindos de um store são identificados pelo manifesto, sem ler a matriz
+    fingerprint = store_fingerprint(X)
+    data_key = hash_arrays(store=fingerprint) if fingerprint else hash_arrays(X, y, groups)
+    
+    print("Gerando plano de folds por sujeito...")
+    fold_plan = FoldPlan.build(y, groups, n_splits=10, test_size=0.2, random_state=42)
     
     print("Gerando visualização t-SNE...")
-    plot_tsne(X, y)
+    with profiler.stage('plot_tsne', n_samples=len(y)):
+        embedding, _ = compute_tsne_layout(X, y, cache=cache, **tsne_params)
+        plot_tsne(X, y, embedding, renderer=renderer, max_points=plots_config.get('max_points', DEFAULT_MAX_POINTS))
     
     print("Avaliando KNN...")
-    results = evaluate_knn(X, y)
+    knn_key = hash_arrays(data=data_key, folds=fold_plan.key, k_range=k_range, metrics=metrics)
+    with profiler.stage('evaluate_knn', n_samples=len(y)):
+        results = cache.fetch('knn', knn_key, lambda: evaluate_knn(
+            X, y, k_range=k_range, metrics=metrics, cv=fold_plan, n_jobs=n_jobs))
     
     best_k = max(results, key=lambda x: x['accuracy_euclidean'])['k']
+    best_metric = 'euclidean'
     print(f"Melhor K encontrado: {best_k}")
     
+    print("Calculando vizinhos fora do fold...")
+    # Uma única tabela por métrica de distância, compartilhada pela tabela de métricas e pelo bootstrap
+    oof_tables = {}
+    with profiler.stage('out_of_fold_neighbors', n_samples=len(y)):
+        for metric in metrics:
+            oof_key = hash_arrays(data=data_key, folds=fold_plan.key, max_k=max(k_range), metric=metric)
+            oof_tables[metric] = cache.fetch('oof', oof_key, lambda: out_of_fold_neighbors(
+                X, y, max(k_range), metric, cv=fold_plan, groups=groups, n_jobs=n_jobs))
+    
+    print("Calculando acurácia, F1, AUC e top-k fora do fold...")
+    with profiler.stage('score_knn', n_samples=len(y)):
+        scores = [{'metric': metric, **row} for metric, oof in oof_tables.items()
+                  for row in score_neighbor_table(oof, k_range)]
+        scores_path = write_scores_csv(scores, Path(config.get('output', {}).get('results_dir', 'results'))
+                                       / 'knn_scores.csv')
+    print(f"Tabela de métricas salva em: {scores_path}")
+    
+    bootstrap_config = dict(model_config.get('bootstrap', {}))
+    if bootstrap_config.pop('enabled', False):
+        print("Calculando intervalos de confiança (bootstrap)...")
+        bootstrap_key = hash_arrays(data=data_key, folds=fold_plan.key, k_range=k_range, metrics=metrics,
+                                    resample='subject', **bootstrap_config)
+        with profiler.stage('bootstrap', n_samples=len(y)):
+            intervals = cache.fetch('bootstrap', bootstrap_key, lambda: {
+                metric: bootstrap_k_range(oof, k_range, **bootstrap_config) for metric, oof in oof_tables.items()})
+        for metric, by_k in intervals.items():
+            best = max(by_k, key=lambda res: res['accuracy'])
+            tied = [res['k'] for res in by_k if res['accuracy_delta_low'] <= 0 <= res['accuracy_delta_high']]
+            print(f"  {metric}: K={best['k']} acurácia={format_interval(best, 'accuracy')} "
+                  f"F1={format_interval(best, 'f1_macro')} AUC={format_interval(best, 'auc')}; "
+                  f"K sem diferença significativa: {tied}")
+    
+    search_config = dict(model_config.get('search', {}))
+    if search_config.pop('enabled', False):
+        print("Buscando hiperparâmetros (successive halving)...")
+        search_key = hash_arrays(data=data_key, folds=fold_plan.key, **search_config)
+        with profiler.stage('search', n_samples=len(y)):
+            search = cache.fetch('search', search_key, lambda: successive_halving_search(
+                X, y, cv=fold_plan, n_jobs=n_jobs, **search_config))
+        best = search['best']
+        print(f"Melhor configuração ({search['n_configs']} avaliadas, {search['n_tables']} tabelas de vizinhos): "
+              f"K={best['k']}, métrica={best['metric']}, ponderação={best['weighting']}, "
+              f"normalização={best['normalization']}, acurácia={best['accuracy']:.4f}")
+        # O classificador salvo usa votos uniformes sobre os embeddings sem normalização extra
+        supported = [entry for entry in search['leaderboard'] if entry['metric'] in ('euclidean', 'cosine')
+                     and entry['weighting'] == 'uniform' and entry['normalization'] == 'none']
+        if supported:
+            best_k, best_metric = supported[0]['k'], supported[0]['metric']
+    
+    print("Avaliando por sujeito (fusão das imagens de cada paciente)...")
+    with profiler.stage('evaluate_subjects', n_samples=len(y)):
+        subject_results = evaluate_subjects(X, y, groups, best_k, fold_plan, metrics=(best_metric,))[best_metric]
+    for name, scores in subject_results.items():
+        print(f"  {name:<6} top-1={scores['top_1']:.4f} top-3={scores['top_3']:.4f} "
+              f"top-5={scores['top_5']:.4f} (n={scores['n']})")
+    
+    prototypes_config = dict(model_config.get('prototypes', {}))
+    if prototypes_config.pop('enabled', False):
+        print("Avaliando classificador por protótipos...")
+        prototypes_key = hash_arrays(data=data_key, folds=fold_plan.key, k=best_k, metrics=metrics,
+                                     **prototypes_config)
+        with profiler.stage('evaluate_prototypes', n_samples=len(y)):
+            prototype_results = cache.fetch('prototypes', prototypes_key, lambda: evaluate_prototypes(
+                X, y, cv=fold_plan, metrics=metrics, knn_k=best_k, **prototypes_config))
+        for res in prototype_results:
+            print(f"  {res['model']:<10} protótipos={str(res['n_prototypes']):<4} galeria={res['gallery_size']:7.1f} "
+                  + " ".join(f"{metric}={res[f'accuracy_{metric}']:.4f}" for metric in metrics))
+    
     print("Gerando Curva ROC...")
-    plot_roc_curve(X, y, best_k)
+    roc_key = hash_arrays(data=data_key, folds=fold_plan.key, k=best_k, metrics=metrics)
+    with profiler.stage('plot_roc_curve', n_samples=len(y)):
+        curves = cache.fetch('roc', roc_key, lambda: compute_roc_curves(
+            X, y, best_k, fold_plan=fold_plan, metrics=metrics, n_jobs=n_jobs))
+        plot_roc_curve(X, y, best_k, curves=curves, renderer=renderer)
+    
+    print("Salvando modelo ajustado...")
+    model = SyndromeClassifier(n_neighbors=best_k, metric=best_metric,
+                               dtype=model_config.get('storage_dtype', 'float32')).fit(X, y, subjects=groups)
+    model_path = model.save()
+    print(f"Modelo salvo em: {model_path}")
+    
+    print("Aguardando a gravação dos gráficos...")
+    with profiler.stage('render_plots'):
+        plot_paths = renderer.close()
+    for plot_path in plot_paths:
+        print(f"Gráfico salvo em: {plot_path}")
+    
+    if profiler.enabled:
+        print(f"Métricas das etapas salvas em: {profiler.save()}")
     
     print("Processo concluído!")
+
+
+if __name__ == "__main__":
+    main()
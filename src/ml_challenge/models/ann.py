@@ -0,0 +1,429 @@
+"""
+Índice aproximado de vizinhos (IVF com quantização por produto opcional) em NumPy puro.
+
+A galeria é particionada em `n_lists` células por k-means; cada consulta
+examina apenas as `n_probe` células mais próximas, de modo que o custo por
+consulta cresce com o tamanho das células, e não com a galeria inteira.
+Com `pq_subspaces`, os resíduos de cada vetor em relação ao centróide da sua
+célula são comprimidos em códigos de 1 byte por subespaço (IVF-PQ). Sem PQ,
+os vetores das células podem ser guardados em float16 ou int8
+(`models.quantization`), como a galeria do `SyndromeClassifier`.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .quantization import QUANTIZATION_DTYPES, QuantizedEmbeddings, quantize
+
+
+def _squared_distances(A: np.ndarray, B: np.ndarray, B_sq: Optional[np.ndarray] = None) -> np.ndarray:
+    """Distâncias euclidianas ao quadrado entre as linhas de A e B via produto de matrizes."""
+    if B_sq is None:
+        B_sq = np.einsum("ij,ij->i", B, B)
+    d = np.einsum("ij,ij->i", A, A)[:, None] - 2.0 * (A @ B.T) + B_sq[None, :]
+    return np.maximum(d, 0.0, out=d)
+
+
+def kmeans(
+    X: np.ndarray,
+    n_clusters: int,
+    n_iter: int = 20,
+    max_samples: Optional[int] = None,
+    random_state: int = 42,
+) -> np.ndarray:
+    """
+    Treina centróides por k-means (inicialização k-means++ e iterações de Lloyd).
+
+    Args:
+        X: Dados de treino (n_samples, n_features)
+        n_clusters: Número de centróides
+        n_iter: Número máximo de iterações de Lloyd
+        max_samples: Se informado, treina em uma amostra aleatória desse tamanho
+        random_state: Semente do gerador aleatório
+
+    Returns:
+        Centróides float32 (n_clusters, n_features)
+    """
+    rng = np.random.default_rng(random_state)
+    X = np.asarray(X, dtype=np.float32)
+    if max_samples is not None and X.shape[0] > max_samples:
+        X = X[np.sort(rng.choice(X.shape[0], max_samples, replace=False))]
+
+    n_samples = X.shape[0]
+    n_clusters = min(n_clusters, n_samples)
+    X_sq = np.einsum("ij,ij->i", X, X)
+
+    # k-means++: cada novo centróide é sorteado proporcionalmente à distância ao mais próximo
+    centers = np.empty((n_clusters, X.shape[1]), dtype=np.float32)
+    centers[0] = X[rng.integers(n_samples)]
+    closest = _squared_distances(X, centers[:1])[:, 0]
+    for i in range(1, n_clusters):
+        total = closest.sum()
+        idx = rng.choice(n_samples, p=closest / total) if total > 0 else rng.integers(n_samples)
+        centers[i] = X[idx]
+        closest = np.minimum(closest, _squared_distances(X, centers[i:i + 1])[:, 0])
+
+    for _ in range(n_iter):
+        labels = np.argmin(_squared_distances(centers, X, X_sq), axis=0)
+        counts = np.bincount(labels, minlength=n_clusters)
+        empty = counts == 0
+        # Soma por cluster com as linhas ordenadas por label (`np.add.at` é muito mais lento)
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[~empty]
+        sums = np.zeros_like(centers, dtype=np.float64)
+        sums[~empty] = np.add.reduceat(X[order], starts, axis=0, dtype=np.float64)
+        new_centers = (sums[~empty] / counts[~empty, None]).astype(np.float32)
+        shift = np.abs(new_centers - centers[~empty]).max() if new_centers.size else 0.0
+        centers[~empty] = new_centers
+        if shift < 1e-6:
+            break
+
+    return centers
+
+
+class ProductQuantizer:
+    """
+    Quantizador por produto: divide o vetor em `n_subspaces` blocos e codifica
+    cada bloco pelo índice (1 byte) do centróide mais próximo.
+    """
+
+    def __init__(self, n_subspaces: int, n_bits: int = 8, random_state: int = 42) -> None:
+        if not 1 <= n_bits <= 8:
+            raise ValueError("n_bits deve estar entre 1 e 8")
+        self.n_subspaces = n_subspaces
+        self.n_codes = 2 ** n_bits
+        self.random_state = random_state
+        self.codebooks: Optional[np.ndarray] = None
+
+    def fit(self, X: np.ndarray, max_samples: int = 65536) -> "ProductQuantizer":
+        """Treina um codebook por subespaço."""
+        n_features = X.shape[1]
+        if n_features % self.n_subspaces:
+            raise ValueError(
+                f"n_features ({n_features}) deve ser divisível por n_subspaces ({self.n_subspaces})"
+            )
+        sub_dim = n_features // self.n_subspaces
+        n_codes = min(self.n_codes, X.shape[0])
+        self.codebooks = np.stack([
+            kmeans(X[:, m * sub_dim:(m + 1) * sub_dim], n_codes, max_samples=max_samples,
+                   random_state=self.random_state + m)
+            for m in range(self.n_subspaces)
+        ])
+        return self
+
+    def encode(self, X: np.ndarray) -> np.ndarray:
+        """Codifica vetores em códigos uint8 (n_samples, n_subspaces)."""
+        sub_dim = self.codebooks.shape[2]
+        codes = np.empty((X.shape[0], self.n_subspaces), dtype=np.uint8)
+        for m in range(self.n_subspaces):
+            sub = X[:, m * sub_dim:(m + 1) * sub_dim]
+            codes[:, m] = np.argmin(_squared_distances(sub, self.codebooks[m]), axis=1)
+        return codes
+
+    def distance_tables(self, Q: np.ndarray) -> np.ndarray:
+        """Tabelas de distância ao quadrado consulta -> codeword (n_query, n_subspaces, n_codes)."""
+        sub_dim = self.codebooks.shape[2]
+        return np.stack([
+            _squared_distances(Q[:, m * sub_dim:(m + 1) * sub_dim], self.codebooks[m])
+            for m in range(self.n_subspaces)
+        ], axis=1)
+
+
+class IVFIndex:
+    """
+    Índice de arquivo invertido (IVF) para busca aproximada de vizinhos.
+
+    Args:
+        n_lists: Número de células do k-means (padrão: raiz quadrada da galeria)
+        n_probe: Número de células examinadas por consulta (controle recall x velocidade)
+        metric: 'euclidean' ou 'cosine'
+        pq_subspaces: Se informado, comprime os vetores com quantização por produto
+        pq_bits: Bits por código da quantização por produto
+        random_state: Semente do k-means
+        dtype: Armazenamento dos vetores das células sem PQ: 'float32', 'float16' ou 'int8'
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        metric: str = "euclidean",
+        pq_subspaces: Optional[int] = None,
+        pq_bits: int = 8,
+        random_state: int = 42,
+        dtype: str = "float32",
+    ) -> None:
+        if metric not in ("euclidean", "cosine"):
+            raise ValueError(f"Métrica não suportada pelo índice IVF: {metric}")
+        if dtype not in QUANTIZATION_DTYPES:
+            raise ValueError(f"Tipo de armazenamento não suportado: {dtype}")
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.metric = metric
+        self.pq_subspaces = pq_subspaces
+        self.pq_bits = pq_bits
+        self.random_state = random_state
+        self.dtype = dtype
+
+    def _prepare(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if self.metric == "cosine":
+            norms = np.linalg.norm(X, axis=1, keepdims=True)
+            X = X / np.where(norms > 0, norms, 1.0)
+        return X
+
+    def fit(self, X: np.ndarray) -> "IVFIndex":
+        """
+        Constrói o índice sobre a galeria.
+
+        Args:
+            X: Embeddings da galeria (n_samples, n_features)
+
+        Returns:
+            O próprio índice
+        """
+        X = self._prepare(X)
+        n_samples = X.shape[0]
+        n_lists = self.n_lists or max(1, int(np.sqrt(n_samples)))
+        self.centroids = kmeans(X, n_lists, max_samples=256 * n_lists, random_state=self.random_state)
+        assignments = np.argmin(_squared_distances(X, self.centroids), axis=1)
+
+        # Vetores agrupados por célula: a célula l ocupa [offsets[l], offsets[l + 1])
+        self.ids = np.argsort(assignments, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=len(self.centroids)))])
+        grouped = X[self.ids]
+
+        if self.pq_subspaces:
+            residuals = grouped - self.centroids[assignments[self.ids]]
+            self.pq = ProductQuantizer(self.pq_subspaces, self.pq_bits, self.random_state).fit(residuals)
+            self.codes = self.pq.encode(residuals)
+            self.vectors = None
+        else:
+            self.pq = None
+            if self.dtype == "float32":
+                self.vectors = grouped
+                self.vector_sq = np.einsum("ij,ij->i", grouped, grouped)
+            else:
+                # Normas das linhas descomprimidas, como em `prepare_quantized`
+                self.vectors = quantize(grouped, self.dtype)
+                self.vector_sq = self.vectors.squared_norms()
+
+        return self
+
+    @property
+    def n_samples(self) -> int:
+        """Número de vetores indexados."""
+        return len(self.ids)
+
+    def get_params(self) -> Dict[str, Any]:
+        """Parâmetros do índice, serializáveis em JSON."""
+        return {
+            "n_lists": self.n_lists, "n_probe": self.n_probe, "metric": self.metric,
+            "pq_subspaces": self.pq_subspaces, "pq_bits": self.pq_bits,
+            "random_state": self.random_state, "dtype": self.dtype,
+        }
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays do índice treinado, para persistência."""
+        arrays = {"centroids": self.centroids, "ids": self.ids, "offsets": self.offsets}
+        if isinstance(self.vectors, QuantizedEmbeddings):
+            arrays.update(vectors=self.vectors.codes, vector_sq=self.vector_sq)
+            if self.vectors.scale is not None:
+                arrays.update(vector_scale=self.vectors.scale)
+        elif self.pq is None:
+            arrays.update(vectors=self.vectors, vector_sq=self.vector_sq)
+        else:
+            arrays.update(codes=self.codes, codebooks=self.pq.codebooks)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, params: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> "IVFIndex":
+        """Reconstrói um índice treinado a partir de `get_params` e `to_arrays`."""
+        index = cls(**params)
+        index.centroids, index.ids, index.offsets = arrays["centroids"], arrays["ids"], arrays["offsets"]
+        if "codes" in arrays:
+            index.pq = ProductQuantizer(params["pq_subspaces"], params["pq_bits"], params["random_state"])
+            index.pq.codebooks = arrays["codebooks"]
+            index.codes, index.vectors = arrays["codes"], None
+        else:
+            index.pq = None
+            index.vectors, index.vector_sq = arrays["vectors"], arrays["vector_sq"]
+            if index.dtype != "float32":
+                index.vectors = QuantizedEmbeddings(index.vectors, arrays.get("vector_scale"))
+        return index
+
+    def _probe_lists(
+        self, Q: np.ndarray, n_neighbors: int, cell_sizes: Optional[np.ndarray] = None
+    ) -> List[np.ndarray]:
+        """Seleciona as células de cada consulta, garantindo ao menos `n_neighbors` candidatos."""
+        order = np.argsort(_squared_distances(Q, self.centroids), axis=1)
+        if cell_sizes is None:
+            cell_sizes = np.diff(self.offsets)
+        sizes = cell_sizes[order]
+        covered = np.cumsum(sizes, axis=1) >= n_neighbors
+        n_needed = np.argmax(covered, axis=1) + 1
+        n_probe = np.maximum(min(self.n_probe, order.shape[1]), n_needed)
+        return [order[i, :n_probe[i]] for i in range(Q.shape[0])]
+
+    def search(
+        self, Q: np.ndarray, n_neighbors: int, excluded: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca aproximada dos vizinhos mais próximos.
+
+        Args:
+            Q: Embeddings de consulta (n_query, n_features)
+            n_neighbors: Número de vizinhos por consulta
+            excluded: Máscara (n_samples,) dos vetores que nunca são retornados
+
+        Returns:
+            Tuple (distances, indices) ordenados, no mesmo formato de `kneighbors_table`
+        """
+        cell_sizes = None
+        if excluded is not None:
+            # Posições removidas ficam fora dos candidatos e da contagem por célula
+            excluded = np.asarray(excluded, dtype=bool)[self.ids]
+            cells = np.repeat(np.arange(len(self.centroids)), np.diff(self.offsets))
+            cell_sizes = np.bincount(cells[~excluded], minlength=len(self.centroids))
+        n_valid = self.n_samples if cell_sizes is None else int(cell_sizes.sum())
+        if not 0 < n_neighbors <= n_valid:
+            raise ValueError(
+                f"n_neighbors deve estar entre 1 e {n_valid}, recebido {n_neighbors}"
+            )
+        Q = self._prepare(Q)
+        n_query = Q.shape[0]
+        best_dist = np.full((n_query, n_neighbors), np.inf, dtype=np.float32)
+        best_pos = np.full((n_query, n_neighbors), -1, dtype=np.intp)
+
+        # Agrupa os pares (consulta, célula) por célula: uma multiplicação de matrizes por célula
+        probes = self._probe_lists(Q, n_neighbors, cell_sizes)
+        pair_query = np.repeat(np.arange(n_query), [len(p) for p in probes])
+        pair_list = np.concatenate(probes)
+        order = np.argsort(pair_list, kind="stable")
+        pair_query, pair_list = pair_query[order], pair_list[order]
+        bounds = np.flatnonzero(np.diff(pair_list)) + 1
+
+        for queries, lists in zip(np.split(pair_query, bounds), np.split(pair_list, bounds)):
+            cell = lists[0]
+            start, stop = self.offsets[cell], self.offsets[cell + 1]
+            if start == stop:
+                continue
+            dist = self._cell_distances(Q[queries], cell, start, stop)
+            if excluded is not None:
+                dist[:, excluded[start:stop]] = np.inf
+            positions = np.broadcast_to(np.arange(start, stop), dist.shape)
+
+            merged_dist = np.hstack([best_dist[queries], dist])
+            merged_pos = np.hstack([best_pos[queries], positions])
+            keep = np.argpartition(merged_dist, n_neighbors - 1, axis=1)[:, :n_neighbors]
+            best_dist[queries] = np.take_along_axis(merged_dist, keep, axis=1)
+            best_pos[queries] = np.take_along_axis(merged_pos, keep, axis=1)
+
+        order = np.argsort(best_dist, axis=1, kind="stable")
+        best_dist = np.take_along_axis(best_dist, order, axis=1)
+        indices = self.ids[np.take_along_axis(best_pos, order, axis=1)]
+
+        if self.metric == "cosine":
+            distances = best_dist / 2.0
+        else:
+            distances = np.sqrt(best_dist)
+        return distances, indices
+
+    def _cell_distances(self, Q: np.ndarray, cell: int, start: int, stop: int) -> np.ndarray:
+        """Distâncias ao quadrado entre consultas e os vetores de uma célula."""
+        if isinstance(self.vectors, QuantizedEmbeddings):
+            products = self.vectors[start:stop].inner_products(Q)
+            d = np.einsum("ij,ij->i", Q, Q)[:, None] - 2.0 * products + self.vector_sq[start:stop][None, :]
+            return np.maximum(d, 0.0, out=d)
+        if self.pq is None:
+            return _squared_distances(Q, self.vectors[start:stop], self.vector_sq[start:stop])
+
+        tables = self.pq.distance_tables(Q - self.centroids[cell])
+        codes = self.codes[start:stop]
+        dist = np.zeros((Q.shape[0], stop - start), dtype=np.float32)
+        for m in range(self.pq.n_subspaces):
+            dist += tables[:, m, codes[:, m]]
+        return dist
+
+
+def benchmark_ann(
+    X: np.ndarray,
+    y: np.ndarray,
+    k: int = 5,
+    metric: str = "cosine",
+    n_probe_values: Tuple[int, ...] = (1, 2, 4, 8, 16),
+    pq_subspaces: Optional[int] = None,
+    test_size: float = 0.2,
+    random_state: int = 42,
+) -> List[Dict[str, Any]]:
+    """
+    Compara acurácia e latência do índice IVF com a busca exata.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        y: Labels das síndromes (n_samples,)
+        k: Número de vizinhos da votação
+        metric: Métrica de distância
+        n_probe_values: Valores de `n_probe` avaliados
+        pq_subspaces: Subespaços da quantização por produto (None para IVF puro)
+        test_size: Fração de amostras usadas como consulta
+        random_state: Semente da divisão e do k-means
+
+    Returns:
+        Lista de dicionários com backend, n_probe, accuracy, accuracy_delta,
+        recall (fração dos vizinhos exatos recuperados) e query_ms
+    """
+    from sklearn.model_selection import train_test_split
+
+    from .neighbors import encode_labels, kneighbors_table, predict_k_range
+
+    classes, y_codes = encode_labels(y)
+    train_idx, test_idx = train_test_split(
+        np.arange(len(y_codes)), test_size=test_size, random_state=random_state, stratify=y_codes
+    )
+    X_train, X_test = np.asarray(X[train_idx]), np.asarray(X[test_idx])
+
+    def _accuracy(neighbors: np.ndarray) -> float:
+        predictions = predict_k_range(y_codes[train_idx][neighbors], len(classes), [k])[0]
+        return float(np.mean(predictions == y_codes[test_idx]))
+
+    start = time.perf_counter()
+    _, exact = kneighbors_table(X_train, X_test, k, metric)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(test_idx)
+    exact_accuracy = _accuracy(exact)
+    results = [{
+        "backend": "exact", "n_probe": None, "accuracy": exact_accuracy,
+        "accuracy_delta": 0.0, "recall": 1.0, "query_ms": exact_ms,
+    }]
+
+    for n_probe in n_probe_values:
+        index = IVFIndex(n_probe=n_probe, metric=metric, pq_subspaces=pq_subspaces,
+                         random_state=random_state).fit(X_train)
+        start = time.perf_counter()
+        _, approx = index.search(X_test, k)
+        query_ms = (time.perf_counter() - start) * 1000 / len(test_idx)
+        accuracy = _accuracy(approx)
+        recall = np.mean([len(np.intersect1d(a, e)) / k for a, e in zip(approx, exact)])
+        results.append({
+            "backend": "ivf-pq" if pq_subspaces else "ivf", "n_probe": n_probe,
+            "accuracy": accuracy, "accuracy_delta": accuracy - exact_accuracy,
+            "recall": float(recall), "query_ms": query_ms,
+        })
+        logger.info(
+            f"IVF n_probe={n_probe}: accuracy={accuracy:.4f} "
+            f"(delta={accuracy - exact_accuracy:+.4f}), recall={recall:.3f}, {query_ms:.3f} ms/consulta"
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    from ..utils.data_processing import load_data
+
+    file_path = "mini_gm_public_v0.1.p"
+    X, y = load_data(file_path)
+    for res in benchmark_ann(X, y) + benchmark_ann(X, y, pq_subspaces=32):
+        print(res)
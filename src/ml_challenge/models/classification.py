@@ -1,29 +1,74 @@
 import numpy as np
-from sklearn.model_selection import cross_val_score
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.metrics import f1_score, roc_auc_score, top_k_accuracy_score
-from ..utils.data_processing import load_data
+from ..utils.parallel import run_tasks
+from .distance import GEMM_METRICS, prepare_embeddings
+from .neighbors import encode_labels, fold_accuracies
+from .quantization import QuantizedEmbeddings, prepare_quantized
+
+def _score_fold(shared, train_idx, test_idx, metric, k_values, n_classes, backend, index_params):
+    """Unidade de trabalho (métrica, fold) executada pelo pool de processos."""
+    X = shared[f'X_{metric}']
+    if metric in GEMM_METRICS and X.dtype in (np.float16, np.int8):
+        X = QuantizedEmbeddings(X, shared.get(f'scale_{metric}'))
+    return fold_accuracies(X, shared['y_codes'], train_idx, test_idx, metric, k_values,
+                           n_classes, backend=backend, index_params=index_params,
+                           sq_norms=shared.get(f'sq_{metric}'))
+
+def evaluate_knn(X, y, k_range=range(1, 16), metrics=('euclidean', 'cosine'), cv=10, n_jobs=1,
+                 backend='exact', index_params=None, dtype='float32'):
+    """Avalia o KNN usando cross-validation e diferentes métricas.
+
+    A tabela de vizinhos de cada fold é calculada uma única vez por métrica
+    (até o maior K) e reaproveitada para todos os valores de K. `cv` pode ser
+    o número de folds ou um `FoldPlan` compartilhado com as demais etapas.
+    Os pares (métrica, fold) são distribuídos entre `n_jobs` processos, que
+    compartilham `X` via memória compartilhada. `backend='ivf'` troca a busca
+    exata pelo índice aproximado de `models.ann` (parâmetros em `index_params`).
+    Para euclidiana e cosseno, `X` é preparado (float32, normalizado no cosseno)
+    uma única vez e cada fold usa apenas fatias dele. `dtype='float16'` ou
+    `'int8'` avalia essas métricas sobre a representação quantizada de
+    `models.quantization` (as demais métricas usam `X` original).
+    """
+    from sklearn.model_selection import check_cv
+
+    X = np.asanyarray(X)
+    classes, y_codes = encode_labels(y)
+    k_values = list(k_range)
+    splitter = check_cv(cv, y, classifier=True)
+
+    folds = list(splitter.split(X, y))
+    tasks = [(train_idx, test_idx, metric, k_values, len(classes), backend, index_params)
+             for train_idx, test_idx in folds for metric in metrics]
+    shared = {'y_codes': y_codes}
+    for metric in metrics:
+        if metric in GEMM_METRICS and dtype != 'float32':
+            quantized, shared[f'sq_{metric}'] = prepare_quantized(X, metric, dtype)
+            shared[f'X_{metric}'] = quantized.codes
+            if quantized.scale is not None:
+                shared[f'scale_{metric}'] = quantized.scale
+        elif metric in GEMM_METRICS:
+            shared[f'X_{metric}'], shared[f'sq_{metric}'] = prepare_embeddings(X, metric)
+        else:
+            shared[f'X_{metric}'] = X
+    scores = run_tasks(_score_fold, tasks, shared, n_jobs=n_jobs)
+
+    mean_scores = {
+        metric: np.mean([score for task, score in zip(tasks, scores) if task[2] == metric], axis=0)
+        for metric in metrics
+    }
 
-def evaluate_knn(X, y, k_range=range(1, 16)):
-    """Avalia o KNN usando cross-validation e diferentes métricas."""
     results = []
-    for k in k_range:
-        knn_euclidean = KNeighborsClassifier(n_neighbors=k, metric='euclidean')
-        knn_cosine = KNeighborsClassifier(n_neighbors=k, metric='cosine')
-        
-        scores_euclidean = cross_val_score(knn_euclidean, X, y, cv=10, scoring='accuracy')
-        scores_cosine = cross_val_score(knn_cosine, X, y, cv=10, scoring='accuracy')
-        
-        results.append({
-            'k': k,
-            'accuracy_euclidean': np.mean(scores_euclidean),
-            'accuracy_cosine': np.mean(scores_cosine)
-        })
-    
+    for i, k in enumerate(k_values):
+        result = {'k': k}
+        for metric in metrics:
+            result[f'accuracy_{metric}'] = float(mean_scores[metric][i])
+        results.append(result)
+
     return results
 
 if __name__ == "__main__":
-    file_path = "mini_gm_public_v0.1.p"  
+    from ..utils.data_processing import load_data
+
+    file_path = "mini_gm_public_v0.1.p"
     X, y = load_data(file_path)
     results = evaluate_knn(X, y)
     for res in results:
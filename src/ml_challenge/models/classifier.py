@@ -0,0 +1,669 @@
+"""
+Classificador KNN de síndromes com artefato persistente para inferência.
+
+O `SyndromeClassifier` é ajustado uma única vez (galeria normalizada, códigos
+das classes, K/métrica escolhidos e índice opcional) e salvo em um diretório
+versionado de arrays `.npy`. O carregamento mapeia esses arrays em memória,
+sem ler o pickle original nem importar o stack de avaliação/plotagem.
+
+A galeria aceita atualizações incrementais: novas imagens são anexadas a
+buffers com capacidade de sobra, sujeitos retirados viram marcas de remoção
+(tombstones) ignoradas na busca, e uma compactação em segundo plano
+reconstrói os arrays (e o índice) quando as marcas ou as linhas ainda não
+indexadas passam de `compact_threshold`.
+
+Com `dtype='float16'` ou `'int8'` a galeria (e, com `backend='ivf'`, os vetores
+das células do índice) é armazenada quantizada (`models.quantization`),
+ocupando 2x ou 4x menos memória; as consultas
+continuam em float32 e as distâncias são acumuladas em float32.
+"""
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from .ann import IVFIndex
+from .distance import blocked_kneighbors, prepare_embeddings, select_topk
+from .neighbors import vote_proba
+from .quantization import QUANTIZATION_DTYPES, QuantizedEmbeddings, dequantize_rows, prepare_quantized
+
+MODEL_FORMAT_VERSION = 1
+DEFAULT_MODELS_DIR = Path("results/models")
+MANIFEST_FILE = "manifest.json"
+DEFAULT_BLOCK_SIZE = 1024
+COMPACT_THRESHOLD = 0.25
+
+
+class _GalleryState(NamedTuple):
+    """Visão consistente da galeria usada por uma consulta."""
+
+    gallery: Union[np.ndarray, QuantizedEmbeddings]
+    gallery_sq: np.ndarray
+    labels: np.ndarray
+    classes: np.ndarray
+    excluded: Optional[np.ndarray]
+    index: Optional[IVFIndex]
+    n_indexed: int
+
+
+class SyndromeClassifier:
+    """
+    Classificador KNN de síndromes genéticas a partir de embeddings.
+
+    Args:
+        n_neighbors: Número de vizinhos da votação
+        metric: 'cosine' ou 'euclidean'
+        backend: 'exact' ou 'ivf' (índice aproximado de `models.ann`)
+        index_params: Parâmetros do `IVFIndex` quando `backend='ivf'`
+        compact_threshold: Fração de linhas removidas (ou fora do índice) que
+            dispara a compactação em segundo plano
+        dtype: Armazenamento da galeria: 'float32', 'float16' ou 'int8' (escala
+            por dimensão definida no `fit` e mantida nas imagens anexadas); vale
+            também para os vetores do índice IVF sem `pq_subspaces`
+    """
+
+    def __init__(
+        self,
+        n_neighbors: int = 5,
+        metric: str = "cosine",
+        backend: str = "exact",
+        index_params: Optional[Dict[str, Any]] = None,
+        compact_threshold: float = COMPACT_THRESHOLD,
+        dtype: str = "float32",
+    ) -> None:
+        if metric not in ("cosine", "euclidean"):
+            raise ValueError(f"Métrica não suportada: {metric}")
+        if backend not in ("exact", "ivf"):
+            raise ValueError(f"Backend de vizinhos desconhecido: {backend}")
+        if dtype not in QUANTIZATION_DTYPES:
+            raise ValueError(f"Tipo de armazenamento não suportado: {dtype}")
+        self.n_neighbors = n_neighbors
+        self.metric = metric
+        self.backend = backend
+        self.index_params = dict(index_params or {})
+        self.compact_threshold = compact_threshold
+        self.dtype = dtype
+        self.gallery_scale_: Optional[np.ndarray] = None
+        self.index: Optional[IVFIndex] = None
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+
+    def fit(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        subjects: Optional[np.ndarray] = None,
+    ) -> "SyndromeClassifier":
+        """
+        Ajusta o classificador à galeria de embeddings.
+
+        Args:
+            X: Embeddings da galeria (n_samples, n_features)
+            y: Labels das síndromes (n_samples,)
+            subjects: Identificador do sujeito de cada amostra (opcional)
+
+        Returns:
+            O próprio classificador
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape[0] != len(y):
+            raise ValueError("X e y devem ter o mesmo número de amostras")
+        if not 0 < self.n_neighbors <= X.shape[0]:
+            raise ValueError(f"n_neighbors deve estar entre 1 e {X.shape[0]}")
+
+        self.gallery_scale_ = None
+        gallery, gallery_sq = self._prepare_rows(X)
+        classes, labels = np.unique(np.asarray(y), return_inverse=True)
+        rows = {"gallery": gallery, "gallery_sq": gallery_sq, "labels": labels.astype(np.int32)}
+        if subjects is not None:
+            rows["subjects"] = np.asarray(subjects)
+
+        index = None
+        if self.backend == "ivf":
+            index = self._build_index(gallery)
+        with self._lock:
+            self.classes_ = classes
+            self._set_rows(rows)
+            self.index = index
+        return self
+
+    def _prepare_rows(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Linhas da galeria no formato armazenado e suas normas ao quadrado."""
+        if self.dtype == "float32":
+            return prepare_embeddings(X, self.metric)
+        quantized, gallery_sq = prepare_quantized(X, self.metric, self.dtype, scale=self.gallery_scale_)
+        self.gallery_scale_ = quantized.scale
+        return quantized.codes, gallery_sq
+
+    def _search_rows(self, gallery: np.ndarray) -> Union[np.ndarray, QuantizedEmbeddings]:
+        return gallery if self.dtype == "float32" else QuantizedEmbeddings(gallery, self.gallery_scale_)
+
+    def _float_rows(self, gallery: np.ndarray) -> np.ndarray:
+        return dequantize_rows(self._search_rows(gallery))
+
+    def _build_index(self, gallery: np.ndarray) -> IVFIndex:
+        """Índice IVF com os vetores das células no mesmo formato da galeria."""
+        # `index_params` de um modelo carregado já trazem métrica e dtype (ver `IVFIndex.get_params`)
+        params = {**self.index_params, "metric": self.metric}
+        if not params.get("pq_subspaces"):
+            params["dtype"] = self.dtype
+        return IVFIndex(**params).fit(self._float_rows(gallery))
+
+    def _set_rows(self, rows: Dict[str, np.ndarray]) -> None:
+        """Substitui os buffers da galeria; todas as linhas passam a estar indexadas."""
+        n_rows = len(rows["gallery"])
+        rows.setdefault("deleted", np.zeros(n_rows, dtype=bool))
+        self._buffers = rows
+        self._n = n_rows
+        self.n_indexed_ = n_rows
+        self._refresh_views()
+
+    def _refresh_views(self) -> None:
+        n = self._n
+        self.gallery_ = self._buffers["gallery"][:n]
+        self.gallery_sq_ = self._buffers["gallery_sq"][:n]
+        self.labels_ = self._buffers["labels"][:n]
+        self.subjects_ = self._buffers["subjects"][:n] if "subjects" in self._buffers else None
+        self.deleted_ = self._buffers["deleted"][:n]
+        excluded = np.flatnonzero(self.deleted_)
+        self._excluded = excluded if len(excluded) else None
+
+    def _append_rows(self, rows: Dict[str, np.ndarray]) -> None:
+        """Anexa linhas aos buffers, crescendo a capacidade de forma geométrica."""
+        n, n_new = self._n, len(rows["gallery"])
+        for name, values in rows.items():
+            buffer = self._buffers[name]
+            dtype = np.result_type(buffer.dtype, values.dtype)
+            if n + n_new > len(buffer) or not buffer.flags.writeable or dtype != buffer.dtype:
+                # Buffers mapeados do disco (somente leitura) são copiados na primeira alteração
+                capacity = max(n + n_new, 2 * n, 16)
+                grown = np.empty((capacity,) + buffer.shape[1:], dtype=dtype)
+                grown[:n] = buffer[:n]
+                self._buffers[name] = buffer = grown
+            buffer[n:n + n_new] = values
+        self._n += n_new
+        self._refresh_views()
+
+    def _encode_new_labels(self, y: np.ndarray) -> np.ndarray:
+        """Códigos das classes de `y`, incluindo síndromes ainda desconhecidas."""
+        new_classes = np.setdiff1d(np.unique(y), self.classes_)
+        if len(new_classes):
+            # `classes_` continua ordenado: os códigos existentes são remapeados em uma cópia
+            classes = np.union1d(self.classes_, new_classes)
+            remap = np.searchsorted(classes, self.classes_).astype(np.int32)
+            labels = self._buffers["labels"].copy()
+            labels[:self._n] = remap[labels[:self._n]]
+            self._buffers["labels"] = labels
+            self.classes_ = classes
+        return np.searchsorted(self.classes_, y).astype(np.int32)
+
+    def add(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        subjects: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Anexa novas imagens à galeria sem reajustar o classificador.
+
+        Síndromes novas são incorporadas a `classes_`. Com `backend='ivf'`, as
+        linhas novas são buscadas por força bruta até a próxima compactação,
+        que as inclui no índice.
+
+        Args:
+            X: Embeddings novos (n_new, n_features)
+            y: Labels das síndromes (n_new,)
+            subjects: Sujeito de cada imagem (obrigatório se a galeria tem sujeitos)
+
+        Returns:
+            Índices das novas linhas na galeria (mudam após uma compactação)
+        """
+        X = self._check_query(X)
+        y = np.asarray(y)
+        if X.shape[0] != len(y):
+            raise ValueError("X e y devem ter o mesmo número de amostras")
+        if (subjects is None) != (self.subjects_ is None):
+            raise ValueError("subjects deve ser informado se, e somente se, a galeria tiver sujeitos")
+
+        gallery, gallery_sq = self._prepare_rows(X)
+        rows = {"gallery": gallery, "gallery_sq": gallery_sq, "deleted": np.zeros(len(y), dtype=bool)}
+        if subjects is not None:
+            rows["subjects"] = np.asarray(subjects)
+        with self._lock:
+            rows["labels"] = self._encode_new_labels(y)
+            start = self._n
+            self._append_rows(rows)
+        self._maybe_compact()
+        return np.arange(start, start + len(y))
+
+    def add_embeddings(self, data: Dict[Any, Any]) -> np.ndarray:
+        """
+        Anexa um dicionário `síndrome -> sujeito -> imagem -> embedding` à galeria.
+
+        Args:
+            data: Novas imagens, no mesmo formato do pickle de entrada
+
+        Returns:
+            Índices das novas linhas na galeria
+        """
+        from ..utils.data_processing import ingest_embeddings
+
+        X, y, subjects, _ = ingest_embeddings(data)
+        return self.add(X, y, subjects if self.subjects_ is not None else None)
+
+    def remove_subjects(self, subjects: Iterable[Any]) -> int:
+        """
+        Remove da busca todas as imagens dos sujeitos informados.
+
+        As linhas recebem uma marca de remoção e deixam de ser retornadas
+        imediatamente; o espaço é liberado na compactação.
+
+        Args:
+            subjects: Identificadores dos sujeitos retirados
+
+        Returns:
+            Número de imagens removidas
+
+        Raises:
+            ValueError: Se a galeria não tem sujeitos ou ficaria com menos de `n_neighbors` imagens
+        """
+        if self.subjects_ is None:
+            raise ValueError("O classificador foi ajustado sem sujeitos")
+        with self._lock:
+            hits = np.isin(self.subjects_, np.asarray(list(subjects))) & ~self.deleted_
+            n_removed = int(hits.sum())
+            if self.n_samples_ - n_removed < self.n_neighbors:
+                raise ValueError(f"A galeria precisa manter ao menos {self.n_neighbors} imagens")
+            if n_removed:
+                deleted = self._buffers["deleted"].copy()
+                deleted[:self._n] |= hits
+                self._buffers["deleted"] = deleted
+                self._refresh_views()
+        self._maybe_compact()
+        return n_removed
+
+    def _maybe_compact(self) -> None:
+        n_deleted = 0 if self._excluded is None else len(self._excluded)
+        n_unindexed = self._n - self.n_indexed_ if self.index is not None else 0
+        if max(n_deleted, n_unindexed) > self.compact_threshold * max(self.n_indexed_, 1):
+            self.compact(background=True)
+
+    def compact(self, background: bool = False) -> Optional[threading.Thread]:
+        """
+        Remove fisicamente as linhas marcadas e reconstrói o índice com as linhas novas.
+
+        As consultas continuam sendo atendidas durante a compactação; apenas a
+        troca final dos arrays é feita sob o lock. Alterações feitas enquanto a
+        compactação roda são preservadas.
+
+        Args:
+            background: Se True, compacta em uma thread e retorna imediatamente
+
+        Returns:
+            A thread da compactação em segundo plano (ou None se síncrona)
+        """
+        if not background:
+            self._compact()
+            return None
+        with self._lock:
+            if self._compaction is None or not self._compaction.is_alive():
+                self._compaction = threading.Thread(target=self._compact, name="gallery-compaction", daemon=True)
+                self._compaction.start()
+            return self._compaction
+
+    def _compact(self) -> None:
+        with self._compact_lock:
+            with self._lock:
+                n_snapshot = self._n
+                keep = np.flatnonzero(~self.deleted_)
+                if len(keep) == n_snapshot and (self.index is None or self.n_indexed_ == n_snapshot):
+                    return
+                gallery, gallery_sq, subjects = self.gallery_, self.gallery_sq_, self.subjects_
+
+            # Linhas já gravadas não mudam: a cópia e o novo índice são feitos fora do lock
+            rows = {"gallery": np.ascontiguousarray(gallery[keep]), "gallery_sq": gallery_sq[keep]}
+            if subjects is not None:
+                rows["subjects"] = subjects[keep]
+            index = None
+            if self.backend == "ivf":
+                index = self._build_index(rows["gallery"])
+
+            with self._lock:
+                # Códigos e marcas de remoção podem ter mudado; linhas anexadas entram no fim
+                current = {"labels": self.labels_, "deleted": self.deleted_, "gallery": self.gallery_,
+                           "gallery_sq": self.gallery_sq_, "subjects": self.subjects_}
+                rows["labels"] = current["labels"][keep]
+                rows["deleted"] = current["deleted"][keep]
+                for name in rows:
+                    rows[name] = np.concatenate([rows[name], current[name][n_snapshot:]])
+                self._set_rows(rows)
+                self.n_indexed_ = len(keep) if index is not None else self._n
+                self.index = index
+
+    def _state(self) -> _GalleryState:
+        with self._lock:
+            return _GalleryState(self._search_rows(self.gallery_), self.gallery_sq_, self.labels_, self.classes_,
+                                 self._excluded, self.index, self.n_indexed_)
+
+    @property
+    def n_samples_(self) -> int:
+        """Número de imagens ativas (não removidas) na galeria."""
+        return self._n - (0 if self._excluded is None else len(self._excluded))
+
+    @property
+    def n_features_(self) -> int:
+        """Dimensão dos embeddings da galeria."""
+        return self.gallery_.shape[1]
+
+    def _check_query(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features_:
+            raise ValueError(f"Esperado embeddings com {self.n_features_} features, recebido {X.shape[1]}")
+        return X
+
+    def _kneighbors_block(self, X: np.ndarray, n_neighbors: int, state: _GalleryState) -> np.ndarray:
+        """Vizinhos de um bloco de consultas: um único produto de matrizes contra a galeria."""
+        X, _ = prepare_embeddings(X, self.metric)
+        block_size = X.shape[0] or 1
+        if state.index is None:
+            return blocked_kneighbors(
+                X, state.gallery, n_neighbors, self.metric, G_sq=state.gallery_sq,
+                prepared=True, block_size=block_size, excluded=state.excluded,
+            )[1]
+
+        # O índice cobre as linhas [0, n_indexed); as anexadas depois são buscadas por força bruta
+        n_indexed = state.n_indexed
+        excluded = np.array([], dtype=np.intp) if state.excluded is None else state.excluded
+        indexed_mask = np.zeros(n_indexed, dtype=bool)
+        indexed_mask[excluded[excluded < n_indexed]] = True
+        tail_excluded = excluded[excluded >= n_indexed] - n_indexed
+
+        distances, indices = [], []
+        k_index = min(n_neighbors, n_indexed - int(indexed_mask.sum()))
+        if k_index > 0:
+            dist, ind = state.index.search(X, k_index, excluded=indexed_mask if len(excluded) else None)
+            distances.append(dist)
+            indices.append(ind)
+        k_tail = min(n_neighbors, len(state.gallery) - n_indexed - len(tail_excluded))
+        if k_tail > 0:
+            dist, ind = blocked_kneighbors(
+                X, state.gallery[n_indexed:], k_tail, self.metric, G_sq=state.gallery_sq[n_indexed:],
+                prepared=True, block_size=block_size, excluded=tail_excluded if len(tail_excluded) else None,
+            )
+            distances.append(dist)
+            indices.append(ind + n_indexed)
+        if len(indices) == 1:
+            return indices[0]
+        _, columns = select_topk(np.hstack(distances), n_neighbors)
+        return np.take_along_axis(np.hstack(indices), columns, axis=1)
+
+    def _kneighbors(
+        self, X: np.ndarray, n_neighbors: int, block_size: int, state: _GalleryState
+    ) -> np.ndarray:
+        return np.vstack([
+            self._kneighbors_block(X[start:start + block_size], n_neighbors, state)
+            for start in range(0, max(X.shape[0], 1), block_size)
+        ])
+
+    def kneighbors(
+        self,
+        X: np.ndarray,
+        n_neighbors: Optional[int] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> np.ndarray:
+        """
+        Índices na galeria dos vizinhos mais próximos, do mais próximo ao mais distante.
+
+        As consultas são processadas em blocos de `block_size` linhas, de modo que
+        a matriz temporária de distâncias tem no máximo `block_size x n_galeria` itens.
+        Imagens removidas nunca são retornadas.
+
+        Args:
+            X: Embeddings de consulta (n_query, n_features)
+            n_neighbors: Número de vizinhos (padrão: `self.n_neighbors`)
+            block_size: Número de consultas por bloco
+
+        Returns:
+            Array (n_query, n_neighbors) de índices da galeria
+        """
+        X = self._check_query(X)
+        return self._kneighbors(X, n_neighbors or self.n_neighbors, block_size, self._state())
+
+    def _predict_proba(self, X: np.ndarray, block_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Vizinhos, labels e classes vêm da mesma visão da galeria, mesmo durante uma compactação
+        state = self._state()
+        neighbors = self._kneighbors(self._check_query(X), self.n_neighbors, block_size, state)
+        return vote_proba(state.labels[neighbors], self.n_neighbors, len(state.classes)), state.classes
+
+    def predict_proba(self, X: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+        """Fração de votos de cada síndrome (n_query, n_classes), na ordem de `classes_`."""
+        return self._predict_proba(X, block_size)[0]
+
+    def predict(self, X: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+        """Síndrome predita para cada embedding (n_query,)."""
+        proba, classes = self._predict_proba(X, block_size)
+        return classes[np.argmax(proba, axis=1)]
+
+    def _rank_classes(self, proba: np.ndarray, classes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Seleciona as `k` síndromes de maior score, ordenadas por score e depois pela ordem de `classes_`."""
+        k = min(k, proba.shape[1])
+        if k < proba.shape[1]:
+            top = np.argpartition(-proba, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(proba.shape[1]), proba.shape)
+        top_scores = np.take_along_axis(proba, top, axis=1)
+        order = np.lexsort((top, -top_scores), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return classes[top], np.take_along_axis(top_scores, order, axis=1)
+
+    def predict_topk(
+        self,
+        X: np.ndarray,
+        k: int = 5,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ranqueia as `k` síndromes mais prováveis para cada embedding.
+
+        Cada bloco de `block_size` consultas faz um único produto de matrizes
+        contra a galeria pré-normalizada, seleciona os vizinhos com
+        `argpartition` e agrega os votos em scores por síndrome.
+
+        Args:
+            X: Embeddings de consulta (n_query, n_features)
+            k: Número de síndromes retornadas por consulta
+            block_size: Número de consultas por bloco
+
+        Returns:
+            Tuple contendo:
+                - labels: Síndromes ranqueadas (n_query, k)
+                - scores: Fração de votos de cada síndrome ranqueada (n_query, k)
+        """
+        X = self._check_query(X)
+        labels, scores = [], []
+        for start in range(0, X.shape[0], block_size):
+            proba, classes = self._predict_proba(X[start:start + block_size], block_size)
+            block_labels, block_scores = self._rank_classes(proba, classes, k)
+            labels.append(block_labels)
+            scores.append(block_scores)
+        if not labels:
+            k = min(k, len(self.classes_))
+            return np.empty((0, k), dtype=self.classes_.dtype), np.empty((0, k))
+        return np.vstack(labels), np.vstack(scores)
+
+    def predict_subjects(
+        self,
+        X: np.ndarray,
+        subjects: np.ndarray,
+        k: int = 5,
+        fusion: str = "mean",
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Ranqueia as `k` síndromes mais prováveis de cada sujeito a partir de todas as suas imagens.
+
+        Todas as imagens são consultadas em uma única chamada (em blocos de
+        `block_size`) e os votos de cada imagem são fundidos por sujeito
+        (ver `models.subjects.fuse_scores`).
+
+        Args:
+            X: Embeddings das imagens (n_images, n_features)
+            subjects: Sujeito de cada imagem (n_images,)
+            k: Número de síndromes retornadas por sujeito
+            fusion: 'mean', 'max' ou 'rank'
+            block_size: Número de consultas por bloco
+
+        Returns:
+            Tuple contendo:
+                - subject_ids: Sujeitos únicos ordenados (n_subjects,)
+                - labels: Síndromes ranqueadas (n_subjects, k)
+                - scores: Score fundido de cada síndrome ranqueada (n_subjects, k)
+        """
+        from .subjects import fuse_scores
+
+        X = self._check_query(X)
+        if X.shape[0] != len(subjects):
+            raise ValueError("X e subjects devem ter o mesmo número de amostras")
+        proba, classes = self._predict_proba(X, block_size)
+        subject_ids, fused = fuse_scores(proba, subjects, fusion)
+        labels, scores = self._rank_classes(fused, classes, k)
+        return subject_ids, labels, scores
+
+    def iter_predict_topk(
+        self,
+        stream: Iterable[np.ndarray],
+        k: int = 5,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Versão em streaming de `predict_topk` para fluxos arbitrariamente grandes.
+
+        O fluxo pode conter embeddings isolados ou lotes de qualquer tamanho; eles
+        são reagrupados em blocos de exatamente `block_size` linhas (o último pode
+        ser menor), então a memória usada não depende do tamanho do fluxo.
+
+        Args:
+            stream: Iterável de embeddings (n_features,) ou lotes (n, n_features)
+            k: Número de síndromes retornadas por consulta
+            block_size: Número de consultas por bloco
+
+        Yields:
+            Tuplas (labels, scores) de cada bloco, na ordem do fluxo
+        """
+        buffer = np.empty((block_size, self.n_features_), dtype=np.float32)
+        filled = 0
+        for batch in stream:
+            batch = self._check_query(batch)
+            start = 0
+            while start < batch.shape[0]:
+                take = min(block_size - filled, batch.shape[0] - start)
+                buffer[filled:filled + take] = batch[start:start + take]
+                filled += take
+                start += take
+                if filled == block_size:
+                    yield self.predict_topk(buffer, k, block_size)
+                    filled = 0
+        if filled:
+            yield self.predict_topk(buffer[:filled], k, block_size)
+
+    def save(self, path: Optional[Union[str, Path]] = None, name: str = "syndrome_knn") -> Path:
+        """
+        Salva o classificador em um diretório versionado de arrays `.npy`.
+
+        Args:
+            path: Diretório de destino (padrão: `results/models/<name>`)
+            name: Nome do modelo usado no caminho padrão
+
+        Returns:
+            Caminho do diretório salvo
+        """
+        path = Path(path) if path is not None else DEFAULT_MODELS_DIR / name
+        if self._excluded is not None or self.n_indexed_ < self._n:
+            # O artefato guarda apenas linhas ativas e um índice completo
+            self.compact()
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        if tmp_path.exists():
+            shutil.rmtree(tmp_path)
+        tmp_path.mkdir(parents=True)
+
+        arrays = {"gallery": self.gallery_, "gallery_sq": self.gallery_sq_,
+                  "labels": self.labels_, "classes": self.classes_}
+        if self.subjects_ is not None:
+            arrays["subjects"] = self.subjects_
+        if self.gallery_scale_ is not None:
+            arrays["gallery_scale"] = self.gallery_scale_
+        if self.index is not None:
+            arrays.update({f"index_{key}": value for key, value in self.index.to_arrays().items()})
+        for key, value in arrays.items():
+            value = np.asarray(value)
+            np.save(tmp_path / f"{key}.npy", value.astype(str) if value.dtype == object else value)
+
+        manifest = {
+            "format_version": MODEL_FORMAT_VERSION,
+            "n_neighbors": self.n_neighbors,
+            "metric": self.metric,
+            "backend": self.backend,
+            "dtype": self.dtype,
+            "index_params": self.index.get_params() if self.index is not None else self.index_params,
+            "n_samples": int(self.gallery_.shape[0]),
+            "n_features": int(self.n_features_),
+            "n_classes": int(len(self.classes_)),
+            "arrays": sorted(arrays),
+        }
+        with open(tmp_path / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "SyndromeClassifier":
+        """
+        Carrega um classificador salvo com `save`.
+
+        Args:
+            path: Diretório do modelo
+            mmap: Se True, mapeia os arrays em memória em vez de lê-los
+
+        Returns:
+            SyndromeClassifier pronto para inferência
+
+        Raises:
+            FileNotFoundError: Se o diretório não contém um modelo
+            ValueError: Se a versão do formato não for suportada
+        """
+        path = Path(path)
+        manifest_path = path / MANIFEST_FILE
+        if not manifest_path.is_file():
+            raise FileNotFoundError(f"Modelo não encontrado: {path}")
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Versão de modelo não suportada: {manifest.get('format_version')}")
+
+        mmap_mode = "r" if mmap else None
+        arrays = {key: np.load(path / f"{key}.npy", mmap_mode=mmap_mode) for key in manifest["arrays"]}
+
+        model = cls(manifest["n_neighbors"], manifest["metric"], manifest["backend"], manifest["index_params"],
+                    dtype=manifest.get("dtype", "float32"))
+        model.classes_ = arrays["classes"]
+        model.gallery_scale_ = arrays.get("gallery_scale")
+        rows = {"gallery": arrays["gallery"], "gallery_sq": arrays["gallery_sq"], "labels": arrays["labels"]}
+        if "subjects" in arrays:
+            rows["subjects"] = arrays["subjects"]
+        model._set_rows(rows)
+        if manifest["backend"] == "ivf":
+            index_arrays = {key[len("index_"):]: value for key, value in arrays.items() if key.startswith("index_")}
+            model.index = IVFIndex.from_arrays(manifest["index_params"], index_arrays)
+        return model
@@ -0,0 +1,191 @@
+"""
+Kernel de distâncias em blocos baseado em produtos de matrizes (BLAS).
+
+Cosseno e euclidiana são reduzidos a um único produto `Q @ G.T` por bloco de
+consultas: no cosseno os embeddings são normalizados (L2) uma única vez e a
+distância é `1 - <q, g>`; na euclidiana as normas ao quadrado da galeria são
+pré-calculadas e `||q - g||² = ||q||² - 2<q, g> + ||g||²`. O tamanho do bloco
+limita a matriz temporária de distâncias a `block_size x n_galeria` itens.
+
+A galeria também pode ser um `quantization.QuantizedEmbeddings` (float16 ou
+int8): os produtos são então calculados por `G.inner_products`, com acumulação
+em float32, e no cosseno as distâncias são renormalizadas pelas normas das
+linhas descomprimidas.
+"""
+
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 1024
+GEMM_METRICS = ("euclidean", "cosine")
+
+
+def l2_normalize(X: np.ndarray) -> np.ndarray:
+    """Normaliza as linhas de `X` para norma L2 unitária (linhas nulas permanecem nulas)."""
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.where(norms > 0, norms, 1.0)
+
+
+def squared_norms(X: np.ndarray) -> np.ndarray:
+    """Normas L2 ao quadrado de cada linha de `X`."""
+    return np.einsum("ij,ij->i", X, X)
+
+
+def _is_quantized(X: Any) -> bool:
+    return hasattr(X, "inner_products")
+
+
+def _gallery_squared_norms(G: Any) -> np.ndarray:
+    return G.squared_norms() if _is_quantized(G) else squared_norms(G)
+
+
+def prepare_embeddings(X: np.ndarray, metric: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Prepara os embeddings para o kernel: float32 contíguo, normalizado no cosseno.
+
+    Matrizes que já estão em float32 contíguo (inclusive `np.memmap`) são
+    reaproveitadas sem cópia na métrica euclidiana.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        metric: 'euclidean' ou 'cosine'
+
+    Returns:
+        Tuple (X_preparado, normas ao quadrado de cada linha)
+    """
+    if metric == "cosine":
+        X = l2_normalize(X)
+    elif not (isinstance(X, np.ndarray) and X.dtype == np.float32 and X.flags.c_contiguous):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+    return X, squared_norms(X)
+
+
+def block_size_for_memory(memory_mb: float, n_gallery: int, itemsize: int = 4) -> int:
+    """Número de consultas por bloco para que a matriz de distâncias caiba em `memory_mb`."""
+    return max(1, int(memory_mb * 2 ** 20 // max(1, n_gallery * itemsize)))
+
+
+def select_topk(dist: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Seleciona e ordena os `k` menores valores de cada linha.
+
+    Empates são resolvidos pelo menor índice de coluna.
+
+    Args:
+        dist: Matriz de distâncias (n_query, n_gallery)
+        k: Número de vizinhos
+
+    Returns:
+        Tuple (distances, indices) ordenados, de formato (n_query, k)
+    """
+    if k < dist.shape[1]:
+        part = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(dist.shape[1]), dist.shape)
+    part_dist = np.take_along_axis(dist, part, axis=1)
+    order = np.lexsort((part, part_dist), axis=1)
+    return np.take_along_axis(part_dist, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+def pairwise_block(
+    Q: np.ndarray,
+    G: np.ndarray,
+    metric: str,
+    G_sq: Optional[np.ndarray] = None,
+    squared: bool = False,
+) -> np.ndarray:
+    """
+    Distâncias entre um bloco de consultas e a galeria, ambos já preparados.
+
+    Args:
+        Q: Bloco de consultas preparado (n_query, n_features)
+        G: Galeria preparada (n_gallery, n_features), possivelmente quantizada
+        metric: 'euclidean' ou 'cosine'
+        G_sq: Normas ao quadrado da galeria (usadas na euclidiana e no
+            cosseno de galerias quantizadas)
+        squared: Na euclidiana, retorna a distância ao quadrado (mesma ordenação, sem `sqrt`)
+
+    Returns:
+        Matriz de distâncias float32 (n_query, n_gallery)
+    """
+    quantized = _is_quantized(G)
+    products = G.inner_products(Q) if quantized else Q @ G.T
+    if metric == "cosine":
+        if quantized:
+            # A quantização altera a norma das linhas normalizadas
+            if G_sq is None:
+                G_sq = G.squared_norms()
+            products /= np.sqrt(np.where(G_sq > 0, G_sq, 1.0))[None, :]
+        np.subtract(1.0, products, out=products)
+        return np.clip(products, 0.0, 2.0, out=products)
+
+    if G_sq is None:
+        G_sq = _gallery_squared_norms(G)
+    products *= -2.0
+    products += squared_norms(Q)[:, None]
+    products += G_sq[None, :]
+    np.maximum(products, 0.0, out=products)
+    return products if squared else np.sqrt(products, out=products)
+
+
+def blocked_kneighbors(
+    Q: np.ndarray,
+    G: np.ndarray,
+    n_neighbors: int,
+    metric: str = "euclidean",
+    G_sq: Optional[np.ndarray] = None,
+    prepared: bool = False,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    excluded: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Busca exata dos vizinhos mais próximos via produtos de matrizes em blocos.
+
+    Args:
+        Q: Embeddings de consulta (n_query, n_features)
+        G: Embeddings da galeria (n_gallery, n_features); se quantizados
+            (`QuantizedEmbeddings`), `prepared` deve ser True
+        n_neighbors: Número de vizinhos
+        metric: 'euclidean' ou 'cosine'
+        G_sq: Normas ao quadrado da galeria já preparada (evita recalculá-las)
+        prepared: Se True, `Q` e `G` já passaram por `prepare_embeddings`
+            (ou `quantization.prepare_quantized`)
+        block_size: Número de consultas por bloco
+        excluded: Índices de linhas da galeria que nunca são retornadas (ex.: removidas)
+
+    Returns:
+        Tuple (distances, indices) ordenados, de formato (n_query, n_neighbors)
+    """
+    if metric not in GEMM_METRICS:
+        raise ValueError(f"Métrica não suportada pelo kernel: {metric}")
+    n_valid = G.shape[0] - (0 if excluded is None else len(excluded))
+    if not 0 < n_neighbors <= n_valid:
+        raise ValueError(f"n_neighbors deve estar entre 1 e {n_valid}, recebido {n_neighbors}")
+
+    if not prepared:
+        if _is_quantized(G):
+            raise ValueError("Galerias quantizadas devem ser preparadas com prepare_quantized")
+        Q, _ = prepare_embeddings(Q, metric)
+        G, G_sq = prepare_embeddings(G, metric)
+    elif G_sq is None and (metric == "euclidean" or _is_quantized(G)):
+        G_sq = _gallery_squared_norms(G)
+
+    distances = np.empty((Q.shape[0], n_neighbors), dtype=np.float32)
+    indices = np.empty((Q.shape[0], n_neighbors), dtype=np.intp)
+    for start in range(0, Q.shape[0], block_size):
+        stop = min(start + block_size, Q.shape[0])
+        Q_block = Q[start:stop]
+        if hasattr(Q_block, "dequantize"):
+            Q_block = Q_block.dequantize()
+            if metric == "cosine":
+                Q_block = l2_normalize(Q_block)
+        dist = pairwise_block(Q_block, G, metric, G_sq, squared=True)
+        if excluded is not None:
+            dist[:, excluded] = np.inf
+        distances[start:stop], indices[start:stop] = select_topk(dist, n_neighbors)
+
+    if metric == "euclidean":
+        np.sqrt(distances, out=distances)
+    return distances, indices
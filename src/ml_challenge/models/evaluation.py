@@ -1,73 +1,192 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.metrics import roc_curve, auc
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import label_binarize
-from ..utils.data_processing import load_data
-
-
-def plot_roc_curve(X, y, k):
-    """Gera e plota a curva ROC para KNN com distâncias Euclidiana e Cosseno."""
-
-    # Binarizar labels para cálculo da AUC multi-classe
-    classes = np.unique(y)
-    y_bin = label_binarize(y, classes=classes)
-    X_train, X_test, y_train, y_test = train_test_split(X, y_bin, test_size=0.2, random_state=42)
-
-    knn_euclidean = KNeighborsClassifier(n_neighbors=k, metric='euclidean')
-    knn_cosine = KNeighborsClassifier(n_neighbors=k, metric='cosine')
-
-    knn_euclidean.fit(X_train, y_train)
-    knn_cosine.fit(X_train, y_train)
-
-    # Garantir que `predict_proba()` tenha saída para todas as classes
-    classes_train = np.unique(y_train, axis=0)  # Classes presentes no treino
-    classes_all = np.unique(y)  # Todas as classes possíveis
-
-    def adjust_proba(model, X_test, classes_train, classes_all):
-        """Garante que `predict_proba()` tenha saída para todas as classes possíveis"""
-        probas = np.array(model.predict_proba(X_test))  # Converter para NumPy array
-        full_probas = np.zeros((X_test.shape[0], len(classes_all)))
-
-        for i, c in enumerate(classes_train):
-            class_index = np.where(classes_all == c)[0]  # Encontrar índice da classe em `classes_all`
-            if len(class_index) > 0:
-                full_probas[:, class_index[0]] = probas[:, i]
-
-        return full_probas
-
-    y_score_euclidean = adjust_proba(knn_euclidean, X_test, classes_train, classes_all)
-    y_score_cosine = adjust_proba(knn_cosine, X_test, classes_train, classes_all)
-
-    # Calcular ROC para cada classe e tirar a média
-    fpr_e, tpr_e, fpr_c, tpr_c = [], [], [], []
-    for i in range(len(classes)):
-        fpr_e_i, tpr_e_i, _ = roc_curve(y_test[:, i], y_score_euclidean[:, i])
-        fpr_c_i, tpr_c_i, _ = roc_curve(y_test[:, i], y_score_cosine[:, i])
-        fpr_e.append(fpr_e_i)
-        tpr_e.append(tpr_e_i)
-        fpr_c.append(fpr_c_i)
-        tpr_c.append(tpr_c_i)
-
-    # Média das curvas
-    mean_fpr_e = np.linspace(0, 1, 100)
-    mean_tpr_e = np.mean([np.interp(mean_fpr_e, f, t) for f, t in zip(fpr_e, tpr_e)], axis=0)
-    mean_fpr_c = np.linspace(0, 1, 100)
-    mean_tpr_c = np.mean([np.interp(mean_fpr_c, f, t) for f, t in zip(fpr_c, tpr_c)], axis=0)
-
-    plt.figure(figsize=(8, 6))
-    plt.plot(mean_fpr_e, mean_tpr_e, label=f'Euclidean AUC = {auc(mean_fpr_e, mean_tpr_e):.2f}', color='blue')
-    plt.plot(mean_fpr_c, mean_tpr_c, label=f'Cosine AUC = {auc(mean_fpr_c, mean_tpr_c):.2f}', color='red')
-    plt.plot([0, 1], [0, 1], 'k--')
-    plt.xlabel('False Positive Rate')
-    plt.ylabel('True Positive Rate')
-    plt.title(f'Curva ROC Média para K={k}')
-    plt.legend()
-    plt.show()
+from loguru import logger
+from .distance import GEMM_METRICS
+from .neighbors import encode_labels, kneighbors_table, vote_proba
+from .quantization import prepare_quantized
+
+
+def _interp_columns(grid, fpr, tpr):
+    """Interpola cada coluna (fpr, tpr) na grade comum, como `np.interp` coluna a coluna."""
+    n_points, n_classes = fpr.shape
+    n_grid = len(grid)
+
+    # Posição de cada ponto da grade entre os pontos da curva: ordena pontos e grade
+    # juntos por coluna, com os pontos antes da grade em caso de empate
+    values = np.vstack([fpr, np.broadcast_to(grid[:, None], (n_grid, n_classes))])
+    is_grid = np.zeros(values.shape, dtype=np.int8)
+    is_grid[n_points:] = 1
+    order = np.lexsort((is_grid, values), axis=0)
+    sorted_is_grid = np.take_along_axis(is_grid, order, axis=0)
+    points_before = np.cumsum(1 - sorted_is_grid, axis=0)
+    # Os pontos da grade aparecem em ordem crescente em cada coluna
+    counts = points_before.T[sorted_is_grid.T == 1].reshape(n_classes, n_grid).T
+
+    j = counts - 1
+    j_next = np.minimum(j + 1, n_points - 1)
+    x0, x1 = np.take_along_axis(fpr, j, axis=0), np.take_along_axis(fpr, j_next, axis=0)
+    y0, y1 = np.take_along_axis(tpr, j, axis=0), np.take_along_axis(tpr, j_next, axis=0)
+    x = grid[:, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (y1 - y0) / (x1 - x0)
+        interpolated = slope * (x - x0) + y0
+    return np.where((j == n_points - 1) | (x0 == x), y0, interpolated)
+
+
+def roc_curves_ovr(y_true, y_score, n_points=100):
+    """Calcula as curvas ROC one-vs-rest de todas as classes em uma única passada vetorizada.
+
+    Todas as colunas de score são ordenadas de uma vez; TPR/FPR de cada classe saem
+    de somas acumuladas e são interpolados na grade comum de FPR. Classes sem
+    amostras positivas ou negativas em `y_true` não têm curva definida e ficam
+    fora da média.
+
+    Args:
+        y_true: Códigos das classes verdadeiras (n_samples,)
+        y_score: Scores por classe (n_samples, n_classes)
+        n_points: Número de pontos da grade comum de FPR
+
+    Returns:
+        Dict com 'fpr' (grade), 'tpr' (média na grade), 'auc' (da curva média),
+        'class_auc' (AUC por classe, NaN quando indefinida) e 'class_tpr' (n_points, n_classes)
+    """
+    y_score = np.asarray(y_score, dtype=np.float64)
+    n_samples, n_classes = y_score.shape
+    positives = np.asarray(y_true)[:, None] == np.arange(n_classes)
+
+    order = np.argsort(-y_score, axis=0, kind='stable')
+    sorted_scores = np.take_along_axis(y_score, order, axis=0)
+    tps = np.cumsum(np.take_along_axis(positives, order, axis=0), axis=0)
+    fps = np.arange(1, n_samples + 1)[:, None] - tps
+
+    # Empates de score formam um único limiar: cada posição assume o valor do fim do grupo
+    is_last = np.ones((n_samples, n_classes), dtype=bool)
+    is_last[:-1] = sorted_scores[:-1] != sorted_scores[1:]
+    group_end = np.where(is_last, np.arange(n_samples)[:, None], n_samples)
+    group_end = np.minimum.accumulate(group_end[::-1], axis=0)[::-1]
+    tps = np.vstack([np.zeros((1, n_classes)), np.take_along_axis(tps, group_end, axis=0)])
+    fps = np.vstack([np.zeros((1, n_classes)), np.take_along_axis(fps, group_end, axis=0)])
+    return roc_curves_from_counts(tps, fps, n_points=n_points)
+
+
+def roc_curves_from_counts(tps, fps, n_points=100):
+    """Monta o resultado de `roc_curves_ovr` a partir das contagens acumuladas por limiar.
+
+    Args:
+        tps: Verdadeiros positivos acumulados por limiar decrescente, começando em 0 (n_thresholds, n_classes)
+        fps: Falsos positivos acumulados, no mesmo formato
+
+    Returns:
+        Dict no formato de `roc_curves_ovr`
+    """
+    from sklearn.metrics import auc
+
+    tps, fps = np.asarray(tps, dtype=np.float64), np.asarray(fps, dtype=np.float64)
+    n_classes = tps.shape[1]
+    n_pos, n_neg = tps[-1], fps[-1]
+    valid = (n_pos > 0) & (n_neg > 0)
+    if not valid.all():
+        logger.warning(f"{np.sum(~valid)} classes sem positivos ou negativos no teste foram ignoradas na curva ROC")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fpr = fps / n_neg
+        tpr = tps / n_pos
+
+    grid = np.linspace(0, 1, n_points)
+    class_tpr = np.full((n_points, n_classes), np.nan)
+    class_auc = np.full(n_classes, np.nan)
+    if valid.any():
+        fpr_valid, tpr_valid = fpr[:, valid], tpr[:, valid]
+        class_tpr[:, valid] = _interp_columns(grid, fpr_valid, tpr_valid)
+        class_auc[valid] = np.sum(np.diff(fpr_valid, axis=0) * (tpr_valid[1:] + tpr_valid[:-1]) / 2, axis=0)
+
+    mean_tpr = np.mean(class_tpr[:, valid], axis=1) if valid.any() else np.full(n_points, np.nan)
+    return {
+        'fpr': grid,
+        'tpr': mean_tpr,
+        'auc': auc(grid, mean_tpr),
+        'class_auc': class_auc,
+        'class_tpr': class_tpr,
+    }
+
+
+def compute_roc_curves(X, y, k, fold_plan=None, metrics=('euclidean', 'cosine'), n_jobs=None, n_points=100,
+                       backend='exact', index_params=None, dtype='float32'):
+    """Calcula as curvas ROC médias do KNN para cada métrica, sem plotar.
+
+    As probabilidades vêm da tabela de vizinhos do holdout (uma busca por
+    métrica, exata ou pelo índice aproximado), já com uma coluna para cada classe de `y`.
+    `dtype='float16'` ou `'int8'` usa a representação quantizada de
+    `models.quantization` na euclidiana e no cosseno.
+
+    Returns:
+        Dict `métrica -> resultado de roc_curves_ovr`
+    """
+    X = np.asanyarray(X)
+    classes, y_codes = encode_labels(y)
+    if fold_plan is not None:
+        train_idx, test_idx = fold_plan.holdout()
+    else:
+        from sklearn.model_selection import train_test_split
+
+        train_idx, test_idx = train_test_split(np.arange(len(y_codes)), test_size=0.2, random_state=42)
+
+    curves = {}
+    for metric in metrics:
+        X_metric, sq, prepared = X, None, False
+        if dtype != 'float32' and metric in GEMM_METRICS:
+            X_metric, sq = prepare_quantized(X, metric, dtype)
+            sq, prepared = sq[train_idx], True
+        _, neighbors = kneighbors_table(X_metric[train_idx], X_metric[test_idx], k, metric, n_jobs=n_jobs,
+                                        backend=backend, index_params=index_params,
+                                        prepared=prepared, train_sq=sq)
+        y_score = vote_proba(y_codes[train_idx][neighbors], k, len(classes))
+        curves[metric] = roc_curves_ovr(y_codes[test_idx], y_score, n_points=n_points)
+
+    return curves
+
+
+def draw_roc_curves(fig, curves, k):
+    """Desenha as curvas ROC médias de cada métrica em `fig`."""
+    colors = {'euclidean': 'blue', 'cosine': 'red'}
+    names = {'euclidean': 'Euclidean', 'cosine': 'Cosine'}
+
+    ax = fig.add_subplot()
+    for metric, curve in curves.items():
+        ax.plot(curve['fpr'], curve['tpr'], label=f"{names.get(metric, metric)} AUC = {curve['auc']:.2f}",
+                color=colors.get(metric))
+    ax.plot([0, 1], [0, 1], 'k--')
+    ax.set_xlabel('False Positive Rate')
+    ax.set_ylabel('True Positive Rate')
+    ax.set_title(f'Curva ROC Média para K={k}')
+    ax.legend()
+
+
+def plot_roc_curve(X, y, k, fold_plan=None, n_jobs=None, backend='exact', index_params=None, curves=None,
+                   renderer=None):
+    """Gera a curva ROC para KNN com distâncias Euclidiana e Cosseno em `results/plots/roc_curve.*`.
+
+    Se `fold_plan` for informado, usa o holdout agrupado por sujeito do plano
+    em vez de um novo `train_test_split`. `n_jobs`, `backend` e `index_params`
+    são repassados à busca de vizinhos. Curvas já calculadas (ex.: lidas do
+    cache de etapas) podem ser passadas em `curves`. Com um `PlotRenderer` em
+    segundo plano a figura é salva sem bloquear o chamador.
+    """
+    if curves is None:
+        curves = compute_roc_curves(X, y, k, fold_plan=fold_plan, n_jobs=n_jobs,
+                                    backend=backend, index_params=index_params)
+
+    from ..utils.rendering import PlotRenderer
+
+    renderer = renderer or PlotRenderer(background=False)
+    renderer.submit('roc_curve', draw_roc_curves, curves, k, figsize=(8, 6))
+
+    return curves
 
 
 if __name__ == "__main__":
+    from ..utils.data_processing import load_data
+
     file_path = "mini_gm_public_v0.1.p"
     X, y = load_data(file_path)
 
@@ -0,0 +1,145 @@
+"""
+Plano de folds agrupado por sujeito, compartilhado entre as etapas de avaliação.
+"""
+
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+from ..utils.cache import hash_arrays
+
+DEFAULT_CACHE_DIR = Path("results/cache/folds")
+
+
+class FoldPlan:
+    """
+    Conjunto fixo de índices de treino/teste agrupados por sujeito.
+
+    Todas as imagens de um mesmo sujeito caem sempre no mesmo fold, evitando
+    vazamento entre treino e teste. O plano é calculado uma vez, pode ser salvo
+    em disco e implementa a interface de validação cruzada do scikit-learn
+    (`split`/`get_n_splits`), de modo que pode ser passado como `cv`.
+
+    Attributes:
+        fold_ids: Fold em que cada amostra é usada como teste (n_samples,)
+        holdout_mask: Máscara das amostras do conjunto de teste da curva ROC
+        key: Hash dos dados e parâmetros usados para gerar o plano
+    """
+
+    def __init__(self, fold_ids: np.ndarray, holdout_mask: np.ndarray, key: str = "") -> None:
+        self.fold_ids = np.asarray(fold_ids)
+        self.holdout_mask = np.asarray(holdout_mask, dtype=bool)
+        self.key = key
+        self.n_splits = int(self.fold_ids.max()) + 1
+
+    @classmethod
+    def build(
+        cls,
+        y: np.ndarray,
+        groups: np.ndarray,
+        n_splits: int = 10,
+        test_size: float = 0.2,
+        random_state: int = 42,
+        cache_dir: Optional[Union[str, Path]] = DEFAULT_CACHE_DIR,
+    ) -> "FoldPlan":
+        """
+        Cria (ou recupera do cache) o plano de folds para os dados.
+
+        Args:
+            y: Labels das síndromes (n_samples,)
+            groups: Identificador do sujeito de cada amostra (n_samples,)
+            n_splits: Número de folds da validação cruzada
+            test_size: Fração aproximada de amostras no holdout da curva ROC
+            random_state: Semente para embaralhamento
+            cache_dir: Diretório do cache em disco (None desativa o cache)
+
+        Returns:
+            FoldPlan com folds estratificados e agrupados por sujeito
+        """
+        y, groups = np.asarray(y), np.asarray(groups)
+        if y.shape != groups.shape:
+            raise ValueError("y e groups devem ter o mesmo número de amostras")
+
+        key = hash_arrays(
+            y, groups, n_splits=n_splits, test_size=test_size, random_state=random_state
+        )
+        cache_path = Path(cache_dir) / f"{key}.npz" if cache_dir else None
+        if cache_path is not None and cache_path.exists():
+            logger.info(f"Plano de folds carregado do cache: {cache_path}")
+            return cls.load(cache_path)
+
+        fold_ids = cls._assign_folds(y, groups, n_splits, random_state)
+        n_holdout_splits = max(2, int(round(1 / test_size)))
+        holdout_mask = cls._assign_folds(y, groups, n_holdout_splits, random_state) == 0
+
+        plan = cls(fold_ids, holdout_mask, key)
+        if cache_path is not None:
+            plan.save(cache_path)
+        return plan
+
+    @staticmethod
+    def _assign_folds(
+        y: np.ndarray, groups: np.ndarray, n_splits: int, random_state: int
+    ) -> np.ndarray:
+        from sklearn.model_selection import StratifiedGroupKFold
+
+        splitter = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        fold_ids = np.empty(len(y), dtype=np.int16)
+        for fold, (_, test_idx) in enumerate(splitter.split(np.zeros(len(y)), y, groups)):
+            fold_ids[test_idx] = fold
+        return fold_ids
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Salva o plano em um arquivo `.npz` compacto."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, fold_ids=self.fold_ids, holdout_mask=self.holdout_mask, key=self.key)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "FoldPlan":
+        """Carrega um plano salvo com `save`."""
+        with np.load(path) as data:
+            return cls(data["fold_ids"], data["holdout_mask"], str(data["key"]))
+
+    @property
+    def n_samples(self) -> int:
+        """Número de amostras cobertas pelo plano."""
+        return len(self.fold_ids)
+
+    @property
+    def folds(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Lista de pares (train_idx, test_idx) de cada fold."""
+        return list(self.split())
+
+    def fold(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna os índices (train_idx, test_idx) do fold `i`."""
+        test = self.fold_ids == i
+        return np.flatnonzero(~test), np.flatnonzero(test)
+
+    def holdout(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna os índices (train_idx, test_idx) do holdout usado pela curva ROC."""
+        return np.flatnonzero(~self.holdout_mask), np.flatnonzero(self.holdout_mask)
+
+    def split(
+        self, X: Any = None, y: Any = None, groups: Any = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Itera sobre os folds, compatível com a API do scikit-learn."""
+        if X is not None and len(X) != self.n_samples:
+            raise ValueError(
+                f"Plano de folds criado para {self.n_samples} amostras, recebido {len(X)}"
+            )
+        for i in range(self.n_splits):
+            yield self.fold(i)
+
+    def get_n_splits(self, X: Any = None, y: Any = None, groups: Any = None) -> int:
+        """Número de folds, compatível com a API do scikit-learn."""
+        return self.n_splits
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        return self.split()
+
+    def __len__(self) -> int:
+        return self.n_splits
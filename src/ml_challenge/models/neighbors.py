@@ -0,0 +1,250 @@
+"""
+Motor de vizinhos pré-computados para avaliação do KNN.
+
+Em vez de ajustar um `KNeighborsClassifier` para cada valor de K, a tabela
+ordenada de vizinhos (teste -> treino) é calculada uma única vez por fold até o
+maior K, e todos os valores de K são avaliados fatiando essa tabela.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .distance import (
+    DEFAULT_BLOCK_SIZE,
+    GEMM_METRICS,
+    block_size_for_memory,
+    blocked_kneighbors,
+    select_topk,
+)
+from .quantization import dequantize_rows
+
+
+def encode_labels(y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converte os labels em códigos inteiros contíguos.
+
+    Args:
+        y: Array com os labels originais (n_samples,)
+
+    Returns:
+        Tuple contendo:
+            - classes: Labels únicos ordenados (n_classes,)
+            - codes: Código inteiro de cada amostra (n_samples,)
+    """
+    classes, codes = np.unique(np.asarray(y), return_inverse=True)
+    return classes, codes.astype(np.intp)
+
+
+def kneighbors_table(
+    X_train: np.ndarray,
+    X_query: np.ndarray,
+    n_neighbors: int,
+    metric: str = "euclidean",
+    working_memory: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    backend: str = "exact",
+    index_params: Optional[Dict[str, Any]] = None,
+    prepared: bool = False,
+    train_sq: Optional[np.ndarray] = None,
+    block_size: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula a tabela ordenada dos `n_neighbors` vizinhos mais próximos.
+
+    As distâncias são calculadas em blocos de linhas de consulta, e cada bloco é
+    reduzido imediatamente aos seus K menores valores, de modo que a matriz
+    completa de distâncias nunca é materializada. Euclidiana e cosseno usam o
+    kernel de produtos de matrizes de `models.distance`; as demais métricas
+    usam `pairwise_distances_chunked` do scikit-learn.
+
+    Args:
+        X_train: Embeddings da galeria (n_train, n_features)
+        X_query: Embeddings de consulta (n_query, n_features)
+        n_neighbors: Número de vizinhos a retornar (maior K da varredura)
+        metric: Métrica de distância ('euclidean' ou 'cosine')
+        working_memory: Memória máxima (MB) por bloco de distâncias
+        n_jobs: Número de threads/processos usados no cálculo das distâncias
+            (apenas para métricas fora do kernel de produtos de matrizes)
+        backend: 'exact' (força bruta) ou 'ivf' (índice aproximado, ver `models.ann`)
+        index_params: Parâmetros do `IVFIndex` (ex.: n_lists, n_probe, pq_subspaces)
+        prepared: Se True, os embeddings já passaram por `prepare_embeddings`
+            (ou `prepare_quantized`, caso em que podem ser `QuantizedEmbeddings`)
+        train_sq: Normas ao quadrado da galeria preparada (evita recalculá-las)
+        block_size: Consultas por bloco (tem precedência sobre `working_memory`)
+
+    Returns:
+        Tuple contendo:
+            - distances: Distâncias ordenadas (n_query, n_neighbors)
+            - indices: Índices na galeria, do mais próximo ao mais distante
+
+    Raises:
+        ValueError: Se `n_neighbors` for maior que o tamanho da galeria
+    """
+    if backend == "ivf" or metric not in GEMM_METRICS:
+        # Somente o kernel de produtos de matrizes opera sobre códigos quantizados
+        X_train, X_query = dequantize_rows(X_train), dequantize_rows(X_query)
+
+    if backend == "ivf":
+        from .ann import IVFIndex
+
+        index = IVFIndex(metric=metric, **(index_params or {})).fit(X_train)
+        return index.search(X_query, n_neighbors)
+    if backend != "exact":
+        raise ValueError(f"Backend de vizinhos desconhecido: {backend}")
+
+    n_train = X_train.shape[0]
+    if not 0 < n_neighbors <= n_train:
+        raise ValueError(
+            f"n_neighbors deve estar entre 1 e {n_train}, recebido {n_neighbors}"
+        )
+
+    if metric in GEMM_METRICS:
+        if block_size is None:
+            block_size = (
+                block_size_for_memory(working_memory, n_train)
+                if working_memory else DEFAULT_BLOCK_SIZE
+            )
+        return blocked_kneighbors(
+            X_query, X_train, n_neighbors, metric,
+            G_sq=train_sq, prepared=prepared, block_size=block_size,
+        )
+
+    from sklearn.metrics import pairwise_distances_chunked
+
+    distances, indices = [], []
+    for dist_chunk, ind_chunk in pairwise_distances_chunked(
+        X_query,
+        X_train,
+        reduce_func=lambda dist, start: select_topk(dist, n_neighbors),
+        metric=metric,
+        working_memory=working_memory,
+        n_jobs=n_jobs,
+    ):
+        distances.append(dist_chunk)
+        indices.append(ind_chunk)
+
+    return np.vstack(distances), np.vstack(indices)
+
+
+def distance_weights(distances: np.ndarray) -> np.ndarray:
+    """
+    Pesos `1 / distância` dos vizinhos, como `weights='distance'` do scikit-learn.
+
+    Nas linhas com vizinhos à distância zero, apenas esses vizinhos votam (peso
+    1). Como a tabela é ordenada, isso vale para qualquer prefixo de K vizinhos.
+
+    Args:
+        distances: Distâncias ordenadas (n_query, max_k)
+
+    Returns:
+        Array (n_query, max_k) de pesos
+    """
+    with np.errstate(divide="ignore"):
+        weights = 1.0 / np.asarray(distances, dtype=np.float64)
+    exact = np.isinf(weights)
+    rows = exact.any(axis=1)
+    weights[rows] = exact[rows]
+    return weights
+
+
+def predict_k_range(
+    neighbor_labels: np.ndarray,
+    n_classes: int,
+    k_values: Iterable[int],
+    weights: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Prediz a classe por votação majoritária para vários valores de K.
+
+    Os votos são acumulados coluna a coluna da tabela ordenada, de modo que
+    cada K reutiliza a contagem do K anterior. Empates são resolvidos pela
+    menor classe, como no `KNeighborsClassifier`.
+
+    Args:
+        neighbor_labels: Códigos das classes dos vizinhos ordenados (n_query, max_k)
+        n_classes: Número total de classes
+        k_values: Valores de K a avaliar
+        weights: Peso do voto de cada vizinho (n_query, max_k); uniforme se None
+
+    Returns:
+        Array (len(k_values), n_query) com os códigos preditos para cada K
+    """
+    k_values = list(k_values)
+    n_query, max_k = neighbor_labels.shape
+    if not k_values or min(k_values) < 1 or max(k_values) > max_k:
+        raise ValueError(f"Valores de K devem estar entre 1 e {max_k}")
+
+    positions: dict = {}
+    for i, k in enumerate(k_values):
+        positions.setdefault(k, []).append(i)
+
+    counts = np.zeros((n_query, n_classes), dtype=np.int32 if weights is None else np.float64)
+    rows = np.arange(n_query)
+    predictions = np.empty((len(k_values), n_query), dtype=np.intp)
+    for k in range(1, max(k_values) + 1):
+        counts[rows, neighbor_labels[:, k - 1]] += 1 if weights is None else weights[:, k - 1]
+        if k in positions:
+            predictions[positions[k]] = counts.argmax(axis=1)
+
+    return predictions
+
+
+def vote_proba(neighbor_labels: np.ndarray, k: int, n_classes: int) -> np.ndarray:
+    """
+    Calcula a fração de votos de cada classe entre os `k` vizinhos mais próximos.
+
+    Equivale ao `predict_proba` do `KNeighborsClassifier` com pesos uniformes,
+    já com uma coluna para cada uma das `n_classes` classes.
+
+    Args:
+        neighbor_labels: Códigos das classes dos vizinhos ordenados (n_query, max_k)
+        k: Número de vizinhos considerados
+        n_classes: Número total de classes
+
+    Returns:
+        Array (n_query, n_classes) com as probabilidades
+    """
+    n_query = neighbor_labels.shape[0]
+    flat = (np.arange(n_query)[:, None] * n_classes + neighbor_labels[:, :k]).ravel()
+    counts = np.bincount(flat, minlength=n_query * n_classes).reshape(n_query, n_classes)
+    return counts / k
+
+
+def fold_accuracies(
+    X: np.ndarray,
+    y_codes: np.ndarray,
+    train_idx: np.ndarray,
+    test_idx: np.ndarray,
+    metric: str,
+    k_values: List[int],
+    n_classes: int,
+    backend: str = "exact",
+    index_params: Optional[Dict[str, Any]] = None,
+    sq_norms: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Calcula a acurácia de um fold para todos os valores de K de uma só vez.
+
+    Args:
+        X: Embeddings completos (n_samples, n_features)
+        y_codes: Códigos das classes (n_samples,)
+        train_idx: Índices de treino do fold
+        test_idx: Índices de teste do fold
+        metric: Métrica de distância
+        k_values: Valores de K a avaliar
+        n_classes: Número total de classes
+        backend: Backend da busca de vizinhos ('exact' ou 'ivf')
+        index_params: Parâmetros do índice aproximado
+        sq_norms: Se informado, `X` já foi preparado por `prepare_embeddings`
+            para `metric` e estas são as normas ao quadrado de cada linha
+
+    Returns:
+        Array (len(k_values),) com a acurácia de cada K
+    """
+    _, neighbors = kneighbors_table(
+        X[train_idx], X[test_idx], max(k_values), metric, backend=backend, index_params=index_params,
+        prepared=sq_norms is not None, train_sq=None if sq_norms is None else sq_norms[train_idx],
+    )
+    predictions = predict_k_range(y_codes[train_idx][neighbors], n_classes, k_values)
+    return (predictions == y_codes[test_idx]).mean(axis=1)
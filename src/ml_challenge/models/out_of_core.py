@@ -0,0 +1,242 @@
+"""
+Avaliação do KNN fora da memória, para galerias maiores que a RAM.
+
+A matriz de embeddings é lida em blocos de linhas de uma matriz em disco
+(tipicamente o `np.memmap` de um store, ver `utils.embedding_store`): para
+cada bloco de consultas, a galeria é percorrida em pedaços e os `k` vizinhos
+de cada consulta são mantidos em um top-k corrente, mesclado a cada pedaço
+(`select_topk` sobre o top-k atual concatenado às distâncias do pedaço). O
+tamanho dos blocos é escolhido por `plan_chunks` para que os temporários
+caibam em um orçamento fixo em MB, independentemente do tamanho da galeria.
+
+As predições de cada bloco são consumidas na hora: a acurácia é acumulada em
+contadores por K e a curva ROC em histogramas de votos por classe (os scores
+do KNN uniforme só assumem os valores `0, 1/k, ..., 1`), de modo que nem a
+tabela de vizinhos nem a matriz de scores inteira são materializadas.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .distance import GEMM_METRICS, pairwise_block, prepare_embeddings, select_topk
+from .neighbors import encode_labels, predict_k_range, vote_proba
+
+DEFAULT_MEMORY_MB = 256
+
+
+def plan_chunks(memory_mb: float, n_features: int, n_gallery: int, n_neighbors: int) -> Tuple[int, int]:
+    """
+    Escolhe os tamanhos dos blocos de consultas e dos pedaços da galeria para um orçamento de memória.
+
+    A galeria inteira é relida do disco uma vez por bloco de consultas, então o
+    custo de E/S é proporcional a `n_query / bloco`: o bloco de consultas deve
+    ser o maior possível. Os temporários da mescla do top-k crescem com
+    `bloco x (pedaço + k)`, de modo que os dois tamanhos são escolhidos juntos,
+    como um ladrilho aproximadamente quadrado que ocupa o orçamento inteiro.
+    Quando a galeria cabe em um único pedaço menor que o ladrilho, a sobra do
+    orçamento vai para o bloco de consultas.
+
+    Args:
+        memory_mb: Orçamento de memória dos temporários (MB)
+        n_features: Dimensão dos embeddings
+        n_gallery: Número de linhas da galeria
+        n_neighbors: Número de vizinhos mantidos por consulta
+
+    Returns:
+        Tuple (consultas por bloco, linhas da galeria por pedaço)
+    """
+    budget = memory_mb * 2 ** 20
+    # Cada linha lida (consulta ou galeria) existe duas vezes: leitura e cópia preparada
+    per_row = 2 * n_features * 4
+    # Cada par consulta x coluna da mescla: distâncias do pedaço e mescladas (float32),
+    # índices da galeria e posições do `argpartition` (intp)
+    per_pair = 4 + 4 + 8 + 8
+    # Ladrilho quadrado t x t: per_pair * t * (t + k) + 2 * per_row * t = budget
+    b = per_pair * n_neighbors + 2 * per_row
+    tile = int((-b + np.sqrt(b * b + 4 * per_pair * budget)) / (2 * per_pair))
+    gallery_chunk = int(min(n_gallery, max(1, tile)))
+    query_block = (budget - per_row * gallery_chunk) // (per_row + per_pair * (gallery_chunk + n_neighbors))
+    return max(1, int(query_block)), gallery_chunk
+
+
+def iter_kneighbors(
+    X: np.ndarray,
+    query_idx: np.ndarray,
+    gallery_idx: np.ndarray,
+    n_neighbors: int,
+    metric: str = "euclidean",
+    memory_mb: float = DEFAULT_MEMORY_MB,
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Busca exata de vizinhos em blocos, lendo consultas e galeria de `X` sob demanda.
+
+    Args:
+        X: Matriz de embeddings, possivelmente em disco (`np.memmap`) (n_samples, n_features)
+        query_idx: Linhas de `X` usadas como consulta
+        gallery_idx: Linhas de `X` usadas como galeria
+        n_neighbors: Número de vizinhos
+        metric: 'euclidean' ou 'cosine'
+        memory_mb: Orçamento de memória dos temporários (MB)
+
+    Yields:
+        Tuple (início do bloco em `query_idx`, distances, indices), com os
+        índices relativos a `gallery_idx` e ordenados como em `blocked_kneighbors`
+    """
+    if metric not in GEMM_METRICS:
+        raise ValueError(f"Métrica não suportada fora da memória: {metric}")
+    query_idx, gallery_idx = np.asarray(query_idx), np.asarray(gallery_idx)
+    if not 0 < n_neighbors <= len(gallery_idx):
+        raise ValueError(f"n_neighbors deve estar entre 1 e {len(gallery_idx)}, recebido {n_neighbors}")
+
+    query_block, gallery_chunk = plan_chunks(memory_mb, X.shape[1], len(gallery_idx), n_neighbors)
+    for q_start in range(0, len(query_idx), query_block):
+        Q, _ = prepare_embeddings(X[query_idx[q_start:q_start + query_block]], metric)
+        # Top-k corrente; os valores iniciais infinitos são descartados pelos primeiros pedaços
+        distances = np.full((len(Q), n_neighbors), np.inf, dtype=np.float32)
+        indices = np.zeros((len(Q), n_neighbors), dtype=np.intp)
+        for g_start in range(0, len(gallery_idx), gallery_chunk):
+            G, G_sq = prepare_embeddings(X[gallery_idx[g_start:g_start + gallery_chunk]], metric)
+            dist = pairwise_block(Q, G, metric, G_sq, squared=True)
+            # O top-k corrente vem antes do pedaço: empates continuam resolvidos pelo menor índice
+            merged_dist = np.concatenate([distances, dist], axis=1)
+            merged_idx = np.concatenate(
+                [indices, np.broadcast_to(np.arange(g_start, g_start + len(G)), dist.shape)], axis=1
+            )
+            distances, positions = select_topk(merged_dist, n_neighbors)
+            indices = np.take_along_axis(merged_idx, positions, axis=1)
+        if metric == "euclidean":
+            np.sqrt(distances, out=distances)
+        yield q_start, distances, indices
+
+
+def chunked_kneighbors(
+    X: np.ndarray,
+    query_idx: np.ndarray,
+    gallery_idx: np.ndarray,
+    n_neighbors: int,
+    metric: str = "euclidean",
+    memory_mb: float = DEFAULT_MEMORY_MB,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tabela completa de vizinhos de `iter_kneighbors` (n_query, n_neighbors).
+
+    Útil quando apenas a galeria não cabe na memória; para avaliar sem
+    materializar a tabela, use `evaluate_knn_out_of_core`.
+    """
+    distances = np.empty((len(query_idx), n_neighbors), dtype=np.float32)
+    indices = np.empty((len(query_idx), n_neighbors), dtype=np.intp)
+    for start, block_dist, block_idx in iter_kneighbors(X, query_idx, gallery_idx, n_neighbors, metric, memory_mb):
+        distances[start:start + len(block_dist)] = block_dist
+        indices[start:start + len(block_idx)] = block_idx
+    return distances, indices
+
+
+def evaluate_knn_out_of_core(
+    X: np.ndarray,
+    y: np.ndarray,
+    k_range: Sequence[int] = range(1, 16),
+    metrics: Sequence[str] = ("euclidean", "cosine"),
+    cv: Any = 10,
+    memory_mb: float = DEFAULT_MEMORY_MB,
+) -> List[Dict[str, Any]]:
+    """
+    Varredura de K com validação cruzada, no formato do `evaluate_knn`, sem carregar `X` na memória.
+
+    Args:
+        X: Matriz de embeddings, tipicamente o `np.memmap` de um store (n_samples, n_features)
+        y: Labels das síndromes (n_samples,)
+        k_range: Valores de K avaliados
+        metrics: 'euclidean' e/ou 'cosine'
+        cv: Número de folds ou divisor de validação cruzada (ex.: um `FoldPlan`)
+        memory_mb: Orçamento de memória dos temporários da busca (MB)
+
+    Returns:
+        Lista de dicionários com `k` e `accuracy_<métrica>` (média dos folds)
+    """
+    from sklearn.model_selection import check_cv
+
+    k_values = list(k_range)
+    classes, y_codes = encode_labels(y)
+    folds = list(check_cv(cv, y, classifier=True).split(np.empty((len(y_codes), 0)), y))
+
+    accuracies = {metric: np.zeros((len(folds), len(k_values))) for metric in metrics}
+    for metric in metrics:
+        for fold, (train_idx, test_idx) in enumerate(folds):
+            correct = np.zeros(len(k_values), dtype=np.int64)
+            for start, _, neighbors in iter_kneighbors(X, test_idx, train_idx, max(k_values), metric, memory_mb):
+                truth = y_codes[test_idx[start:start + len(neighbors)]]
+                predictions = predict_k_range(y_codes[train_idx[neighbors]], len(classes), k_values)
+                correct += (predictions == truth).sum(axis=1)
+            accuracies[metric][fold] = correct / len(test_idx)
+        logger.info(f"Busca fora da memória ({metric}) concluída em {len(folds)} folds")
+
+    return [
+        {"k": k, **{f"accuracy_{metric}": float(accuracies[metric][:, i].mean()) for metric in metrics}}
+        for i, k in enumerate(k_values)
+    ]
+
+
+def compute_roc_curves_out_of_core(
+    X: np.ndarray,
+    y: np.ndarray,
+    k: int,
+    fold_plan: Optional[Any] = None,
+    metrics: Sequence[str] = ("euclidean", "cosine"),
+    memory_mb: float = DEFAULT_MEMORY_MB,
+    n_points: int = 100,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Curvas ROC do KNN no holdout, no formato de `compute_roc_curves`, sem carregar `X` na memória.
+
+    Os votos de cada classe são acumulados em um histograma `(k + 1, n_classes)`
+    de positivos e negativos por nível de score; as curvas saem das somas
+    acumuladas do histograma, idênticas às calculadas sobre os scores completos.
+
+    Args:
+        X: Matriz de embeddings, tipicamente o `np.memmap` de um store
+        y: Labels das síndromes
+        k: Número de vizinhos
+        fold_plan: Plano de folds cujo holdout é usado; sem ele, um `train_test_split` de 20%
+        metrics: 'euclidean' e/ou 'cosine'
+        memory_mb: Orçamento de memória dos temporários da busca (MB)
+        n_points: Número de pontos da grade comum de FPR
+
+    Returns:
+        Dict `métrica -> resultado de roc_curves_ovr`
+    """
+    from .evaluation import roc_curves_from_counts
+
+    classes, y_codes = encode_labels(y)
+    n_classes = len(classes)
+    if fold_plan is not None:
+        train_idx, test_idx = fold_plan.holdout()
+    else:
+        from sklearn.model_selection import train_test_split
+
+        train_idx, test_idx = train_test_split(np.arange(len(y_codes)), test_size=0.2, random_state=42)
+
+    curves = {}
+    for metric in metrics:
+        positives = np.zeros((k + 1) * n_classes)
+        totals = np.zeros((k + 1) * n_classes)
+        for start, _, neighbors in iter_kneighbors(X, test_idx, train_idx, k, metric, memory_mb):
+            votes = np.rint(vote_proba(y_codes[train_idx[neighbors]], k, n_classes) * k).astype(np.intp)
+            bins = (votes * n_classes + np.arange(n_classes)).ravel()
+            truth = y_codes[test_idx[start:start + len(neighbors)]]
+            is_positive = (truth[:, None] == np.arange(n_classes)).ravel()
+            positives += np.bincount(bins, weights=is_positive, minlength=len(positives))
+            totals += np.bincount(bins, minlength=len(totals))
+
+        # Limiares decrescentes: k votos, k - 1, ..., 0
+        positives = positives.reshape(k + 1, n_classes)[::-1]
+        negatives = totals.reshape(k + 1, n_classes)[::-1] - positives
+        zeros = np.zeros((1, n_classes))
+        curves[metric] = roc_curves_from_counts(
+            np.vstack([zeros, np.cumsum(positives, axis=0)]),
+            np.vstack([zeros, np.cumsum(negatives, axis=0)]),
+            n_points=n_points,
+        )
+
+    return curves
@@ -0,0 +1,188 @@
+"""
+Classificador por protótipos: cada síndrome é condensada em poucos centróides.
+
+Em vez de comparar a consulta com todas as imagens da galeria, cada síndrome é
+representada por `n_prototypes` sub-centróides obtidos por k-means (ou pelo
+centróide da classe, com `n_prototypes=1`) e a consulta recebe a síndrome do
+protótipo mais próximo. O custo por consulta e a memória passam a depender do
+número de síndromes x protótipos, e não do número de imagens.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .ann import kmeans
+from .distance import l2_normalize, pairwise_block, prepare_embeddings
+from .neighbors import encode_labels
+
+
+class PrototypeClassifier:
+    """
+    Classificador pelo protótipo mais próximo.
+
+    Args:
+        n_prototypes: Protótipos (sub-centróides do k-means) por síndrome
+        metric: 'cosine' ou 'euclidean'
+        n_iter: Iterações do k-means
+        random_state: Semente do k-means
+    """
+
+    def __init__(
+        self,
+        n_prototypes: int = 1,
+        metric: str = "cosine",
+        n_iter: int = 20,
+        random_state: int = 42,
+    ) -> None:
+        if metric not in ("cosine", "euclidean"):
+            raise ValueError(f"Métrica não suportada: {metric}")
+        if n_prototypes < 1:
+            raise ValueError("n_prototypes deve ser pelo menos 1")
+        self.n_prototypes = n_prototypes
+        self.metric = metric
+        self.n_iter = n_iter
+        self.random_state = random_state
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> "PrototypeClassifier":
+        """
+        Calcula os protótipos de cada síndrome.
+
+        Args:
+            X: Embeddings da galeria (n_samples, n_features)
+            y: Labels das síndromes (n_samples,)
+
+        Returns:
+            O próprio classificador
+        """
+        X, _ = prepare_embeddings(X, self.metric)
+        classes, codes = encode_labels(y)
+        prototypes, labels = [], []
+        for c in range(len(classes)):
+            members = X[codes == c]
+            if self.n_prototypes == 1:
+                centers = members.mean(axis=0, keepdims=True)
+            else:
+                centers = kmeans(members, self.n_prototypes, n_iter=self.n_iter, random_state=self.random_state)
+            prototypes.append(centers)
+            labels.append(np.full(len(centers), c, dtype=np.intp))
+
+        prototypes = np.vstack(prototypes).astype(np.float32)
+        if self.metric == "cosine":
+            # Centróide esférico: a média de vetores unitários é projetada de volta na esfera
+            prototypes = l2_normalize(prototypes)
+        self.classes_ = classes
+        self.prototypes_, self.prototype_sq_ = prepare_embeddings(prototypes, self.metric)
+        self.prototype_labels_ = np.concatenate(labels)
+        # Protótipos ordenados por classe: início de cada classe para `np.minimum.reduceat`
+        self._class_starts = np.searchsorted(self.prototype_labels_, np.arange(len(classes)))
+        return self
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos protótipos (bytes)."""
+        return self.prototypes_.nbytes + self.prototype_sq_.nbytes + self.prototype_labels_.nbytes
+
+    def class_distances(self, X: np.ndarray) -> np.ndarray:
+        """Distância de cada consulta ao protótipo mais próximo de cada síndrome (n_query, n_classes)."""
+        Q, _ = prepare_embeddings(X, self.metric)
+        dist = pairwise_block(Q, self.prototypes_, self.metric, self.prototype_sq_)
+        return np.minimum.reduceat(dist, self._class_starts, axis=1)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Score de cada síndrome (maior é melhor): menos a distância ao protótipo mais próximo."""
+        return -self.class_distances(X)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Síndrome do protótipo mais próximo de cada embedding (n_query,)."""
+        return self.classes_[np.argmin(self.class_distances(X), axis=1)]
+
+    def predict_topk(self, X: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ranqueia as `k` síndromes com protótipos mais próximos.
+
+        Returns:
+            Tuple (labels (n_query, k), distâncias ao protótipo mais próximo (n_query, k))
+        """
+        dist = self.class_distances(X)
+        top = np.argsort(dist, axis=1, kind="stable")[:, :k]
+        return self.classes_[top], np.take_along_axis(dist, top, axis=1)
+
+
+def evaluate_prototypes(
+    X: np.ndarray,
+    y: np.ndarray,
+    n_prototypes_range: Sequence[int] = (1, 2, 4, 8, 16),
+    metrics: Sequence[str] = ("euclidean", "cosine"),
+    cv: Any = 10,
+    knn_k: Optional[int] = None,
+    random_state: int = 42,
+) -> List[Dict[str, Any]]:
+    """
+    Avalia o classificador por protótipos com validação cruzada, no formato do `evaluate_knn`.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        y: Labels das síndromes
+        n_prototypes_range: Números de protótipos por síndrome avaliados
+        metrics: Métricas de distância
+        cv: Número de folds ou divisor de validação cruzada (ex.: um `FoldPlan`)
+        knn_k: Se informado, inclui uma linha de referência com o KNN exato com esse K
+        random_state: Semente do k-means
+
+    Returns:
+        Lista de dicionários com `model`, `n_prototypes`, `gallery_size` (itens
+        comparados por consulta), `accuracy_<métrica>` e `query_ms_<métrica>`
+        (tempo médio por consulta), médias dos folds
+    """
+    from sklearn.model_selection import check_cv
+
+    from .neighbors import kneighbors_table, predict_k_range
+
+    X = np.asanyarray(X)
+    classes, y_codes = encode_labels(y)
+    folds = list(check_cv(cv, y, classifier=True).split(X, y))
+
+    def _run(fit_predict: Any) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for metric in metrics:
+            accuracies, query_ms, sizes = [], [], []
+            for train_idx, test_idx in folds:
+                predictions, elapsed, size = fit_predict(metric, train_idx, test_idx)
+                accuracies.append(np.mean(predictions == y_codes[test_idx]))
+                query_ms.append(elapsed * 1000 / len(test_idx))
+                sizes.append(size)
+            result[f"accuracy_{metric}"] = float(np.mean(accuracies))
+            result[f"query_ms_{metric}"] = float(np.mean(query_ms))
+            result["gallery_size"] = float(np.mean(sizes))
+        return result
+
+    results = []
+    if knn_k is not None:
+        def knn(metric: str, train_idx: np.ndarray, test_idx: np.ndarray) -> Tuple[np.ndarray, float, int]:
+            start = time.perf_counter()
+            _, neighbors = kneighbors_table(X[train_idx], X[test_idx], knn_k, metric)
+            predictions = predict_k_range(y_codes[train_idx][neighbors], len(classes), [knn_k])[0]
+            return predictions, time.perf_counter() - start, len(train_idx)
+
+        results.append({"model": "knn", "k": knn_k, "n_prototypes": None, **_run(knn)})
+
+    for n_prototypes in n_prototypes_range:
+        def prototypes(metric: str, train_idx: np.ndarray, test_idx: np.ndarray) -> Tuple[np.ndarray, float, int]:
+            model = PrototypeClassifier(n_prototypes, metric, random_state=random_state)
+            model.fit(X[train_idx], y_codes[train_idx])
+            start = time.perf_counter()
+            predictions = model.predict(X[test_idx])
+            return predictions, time.perf_counter() - start, len(model.prototypes_)
+
+        results.append({"model": "prototypes", "k": 1, "n_prototypes": n_prototypes, **_run(prototypes)})
+
+    for res in results:
+        logger.info(
+            f"{res['model']} (protótipos={res['n_prototypes']}, galeria={res['gallery_size']:.0f}): "
+            + ", ".join(f"{metric}={res[f'accuracy_{metric}']:.4f} ({res[f'query_ms_{metric}']:.4f} ms)"
+                        for metric in metrics)
+        )
+    return results
@@ -0,0 +1,196 @@
+"""
+Representação compacta dos embeddings: float16 ou int8 com escala por dimensão.
+
+Os códigos ocupam 2x (float16) ou 4x (int8) menos memória que float32. As
+distâncias continuam sendo acumuladas em float32: a escala do int8 é aplicada
+às consultas (`(q * s) @ c.T == q @ (c * s).T`) e os códigos são convertidos
+para float32 em blocos de linhas da galeria, de modo que a galeria completa
+nunca é descomprimida de uma só vez.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .distance import l2_normalize
+
+QUANTIZATION_DTYPES = ("float32", "float16", "int8")
+DEFAULT_ROW_BLOCK = 8192
+_INT8_MAX = 127
+
+
+class QuantizedEmbeddings:
+    """
+    Matriz de embeddings quantizada.
+
+    Attributes:
+        codes: Códigos (n_samples, n_features) em float16 ou int8
+        scale: Escala por dimensão (n_features,) do int8 (None no float16)
+    """
+
+    def __init__(self, codes: np.ndarray, scale: Optional[np.ndarray] = None) -> None:
+        self.codes = codes
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.codes.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.codes.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (0 if self.scale is None else self.scale.nbytes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, rows: Any) -> "QuantizedEmbeddings":
+        return QuantizedEmbeddings(self.codes[rows], self.scale)
+
+    def dequantize(self) -> np.ndarray:
+        """Embeddings float32 aproximados (n_samples, n_features)."""
+        values = self.codes.astype(np.float32)
+        if self.scale is not None:
+            values *= self.scale
+        return values
+
+    def _row_blocks(self, block_rows: int) -> Any:
+        for start in range(0, len(self.codes), block_rows):
+            yield start, self.codes[start:start + block_rows].astype(np.float32)
+
+    def inner_products(self, Q: np.ndarray, block_rows: int = DEFAULT_ROW_BLOCK) -> np.ndarray:
+        """
+        Produtos internos `Q @ G.T` acumulados em float32.
+
+        Args:
+            Q: Consultas float32 (n_query, n_features)
+            block_rows: Linhas da galeria convertidas para float32 por vez
+
+        Returns:
+            Matriz (n_query, n_samples) em float32
+        """
+        Q = np.asarray(Q, dtype=np.float32)
+        if self.scale is not None:
+            Q = Q * self.scale
+        products = np.empty((Q.shape[0], len(self.codes)), dtype=np.float32)
+        for start, block in self._row_blocks(block_rows):
+            np.matmul(Q, block.T, out=products[:, start:start + len(block)])
+        return products
+
+    def squared_norms(self, block_rows: int = DEFAULT_ROW_BLOCK) -> np.ndarray:
+        """Normas ao quadrado das linhas descomprimidas."""
+        sq = np.empty(len(self.codes), dtype=np.float32)
+        scale_sq = None if self.scale is None else self.scale ** 2
+        for start, block in self._row_blocks(block_rows):
+            block *= block
+            sq[start:start + len(block)] = block.sum(axis=1) if scale_sq is None else block @ scale_sq
+        return sq
+
+
+def int8_scale(X: np.ndarray) -> np.ndarray:
+    """Escala simétrica por dimensão que leva o maior valor absoluto a 127."""
+    max_abs = np.abs(np.asarray(X, dtype=np.float32)).max(axis=0)
+    return np.where(max_abs > 0, max_abs / _INT8_MAX, 1.0).astype(np.float32)
+
+
+def quantize(X: np.ndarray, dtype: str = "int8", scale: Optional[np.ndarray] = None) -> QuantizedEmbeddings:
+    """
+    Quantiza uma matriz float32.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        dtype: 'float16' ou 'int8'
+        scale: Escala do int8 já existente (ex.: ao anexar linhas a uma galeria);
+            valores fora da faixa são saturados
+
+    Returns:
+        QuantizedEmbeddings com os códigos
+    """
+    X = np.asarray(X, dtype=np.float32)
+    if dtype == "float16":
+        return QuantizedEmbeddings(X.astype(np.float16))
+    if dtype != "int8":
+        raise ValueError(f"Tipo de quantização desconhecido: {dtype}")
+    scale = int8_scale(X) if scale is None else np.asarray(scale, dtype=np.float32)
+    codes = np.clip(np.rint(X / scale), -_INT8_MAX, _INT8_MAX).astype(np.int8)
+    return QuantizedEmbeddings(codes, scale)
+
+
+def prepare_quantized(
+    X: np.ndarray, metric: str, dtype: str = "int8", scale: Optional[np.ndarray] = None
+) -> Tuple[QuantizedEmbeddings, np.ndarray]:
+    """
+    Equivalente quantizado de `distance.prepare_embeddings`.
+
+    No cosseno os embeddings são normalizados antes da quantização. As normas
+    ao quadrado retornadas são as das linhas descomprimidas; o kernel de
+    distâncias as usa para renormalizar o cosseno.
+
+    Returns:
+        Tuple (embeddings quantizados, normas ao quadrado de cada linha)
+    """
+    if metric == "cosine":
+        X = l2_normalize(X)
+    quantized = quantize(X, dtype, scale)
+    return quantized, quantized.squared_norms()
+
+
+def dequantize_rows(X: Any) -> np.ndarray:
+    """Retorna `X` em float32, descomprimindo se estiver quantizado."""
+    return X.dequantize() if isinstance(X, QuantizedEmbeddings) else X
+
+
+def compare_quantization(
+    X: np.ndarray,
+    y: np.ndarray,
+    cv: Any = 10,
+    k_range: Sequence[int] = range(1, 16),
+    metrics: Sequence[str] = ("euclidean", "cosine"),
+    dtypes: Sequence[str] = QUANTIZATION_DTYPES,
+    fold_plan: Any = None,
+) -> List[Dict[str, Any]]:
+    """
+    Compara acurácia e AUC de cada representação com a precisão completa.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        y: Labels das síndromes
+        cv: Validação cruzada da varredura de K (ex.: um `FoldPlan`)
+        k_range: Valores de K avaliados
+        metrics: Métricas de distância
+        dtypes: Representações comparadas ('float32' é a referência)
+        fold_plan: Plano de folds cujo holdout é usado nas curvas ROC
+
+    Returns:
+        Lista com dtype, métrica, melhor K, acurácia, AUC, diferenças para o
+        float32, memória da galeria (MB) e taxa de compressão
+    """
+    from .classification import evaluate_knn
+    from .evaluation import compute_roc_curves
+
+    full_mb = np.asarray(X, dtype=np.float32).nbytes / 2 ** 20
+    report, reference = [], {}
+    for dtype in ["float32"] + [d for d in dtypes if d != "float32"]:
+        results = evaluate_knn(X, y, k_range=k_range, metrics=metrics, cv=cv, dtype=dtype)
+        gallery_mb = full_mb if dtype == "float32" else quantize(X, dtype).nbytes / 2 ** 20
+        for metric in metrics:
+            best = max(results, key=lambda res: res[f"accuracy_{metric}"])
+            curves = compute_roc_curves(X, y, best["k"], fold_plan=fold_plan, metrics=(metric,), dtype=dtype)
+            entry = {
+                "dtype": dtype, "metric": metric, "k": best["k"],
+                "accuracy": best[f"accuracy_{metric}"], "auc": curves[metric]["auc"],
+                "gallery_mb": gallery_mb, "compression": full_mb / gallery_mb,
+            }
+            reference.setdefault(metric, entry)
+            entry["accuracy_delta"] = entry["accuracy"] - reference[metric]["accuracy"]
+            entry["auc_delta"] = entry["auc"] - reference[metric]["auc"]
+            report.append(entry)
+            logger.info(
+                f"{dtype}/{metric}: accuracy={entry['accuracy']:.4f} ({entry['accuracy_delta']:+.4f}), "
+                f"AUC={entry['auc']:.4f} ({entry['auc_delta']:+.4f}), {gallery_mb:.1f} MB"
+            )
+    return report
@@ -0,0 +1,123 @@
+"""
+Avaliação de várias métricas em uma única passada sobre as predições fora do fold.
+
+Para cada métrica de distância, a tabela de vizinhos fora do fold é calculada
+uma única vez até o maior K (`statistics.out_of_fold_neighbors`). Para cada K,
+a matriz de probabilidades por classe sai da votação sobre essa tabela, e dela
+saem acurácia, F1 macro, AUC macro one-vs-rest e top-k. Nenhuma métrica
+exige uma nova busca de vizinhos ou um novo split. O resultado é uma tabela
+organizada, com uma linha por (métrica de distância, K) e uma coluna por
+métrica de avaliação, gravada em CSV.
+"""
+
+import csv
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from loguru import logger
+
+from .neighbors import vote_proba
+from .statistics import out_of_fold_neighbors, weighted_metrics
+
+SCORE_COLUMNS = ("accuracy", "f1_macro", "auc")
+
+
+def score_neighbor_table(
+    oof: Dict[str, np.ndarray], k_range: Sequence[int], top_k: Sequence[int] = (3, 5)
+) -> List[Dict[str, Any]]:
+    """
+    Calcula todas as métricas de cada K a partir de uma tabela de vizinhos fora do fold.
+
+    Args:
+        oof: Resultado de `statistics.out_of_fold_neighbors`
+        k_range: Valores de K avaliados
+        top_k: Valores de K do top-k
+
+    Returns:
+        Lista de dicionários com `k`, `n_samples` e as métricas de `weighted_metrics`
+    """
+    evaluated = oof["neighbor_labels"][:, 0] >= 0
+    neighbor_labels = oof["neighbor_labels"][evaluated]
+    y_true = oof["y_codes"][evaluated]
+    ones = np.ones((1, len(y_true)))
+
+    rows = []
+    for k in k_range:
+        y_score = vote_proba(neighbor_labels, k, len(oof["classes"]))
+        scores = weighted_metrics(ones, y_true, y_score, top_k)
+        rows.append({"k": k, "n_samples": len(y_true), **{name: float(value[0]) for name, value in scores.items()}})
+    return rows
+
+
+def score_knn(
+    X: np.ndarray,
+    y: np.ndarray,
+    k_range: Sequence[int] = range(1, 16),
+    metrics: Sequence[str] = ("euclidean", "cosine"),
+    cv: Any = 10,
+    top_k: Sequence[int] = (3, 5),
+    n_jobs: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Avalia o KNN em todas as métricas com uma única busca de vizinhos por métrica de distância.
+
+    As métricas são calculadas sobre as predições fora do fold de todas as
+    amostras juntas (e não pela média dos folds, como no `evaluate_knn`).
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        y: Labels das síndromes
+        k_range: Valores de K avaliados
+        metrics: Métricas de distância
+        cv: Número de folds ou divisor de validação cruzada (ex.: um `FoldPlan`)
+        top_k: Valores de K do top-k
+        n_jobs: Threads da busca de vizinhos
+
+    Returns:
+        Lista de dicionários, um por (métrica de distância, K), com `metric`, `k`,
+        `n_samples`, `accuracy`, `f1_macro`, `auc` e `top_<k>_accuracy`
+    """
+    k_values = list(k_range)
+    rows = []
+    for metric in metrics:
+        oof = out_of_fold_neighbors(X, y, max(k_values), metric, cv=cv, n_jobs=n_jobs)
+        for row in score_neighbor_table(oof, k_values, top_k):
+            rows.append({"metric": metric, **row})
+        best = max(rows[-len(k_values):], key=lambda row: row["accuracy"])
+        logger.info(
+            f"Melhor K ({metric}): {best['k']} — "
+            + ", ".join(f"{name}={best[name]:.4f}" for name in SCORE_COLUMNS)
+        )
+    return rows
+
+
+def write_scores_csv(rows: List[Dict[str, Any]], path: Union[str, Path]) -> Path:
+    """
+    Grava a tabela de `score_knn` em CSV, com uma coluna por campo das linhas.
+
+    Args:
+        rows: Linhas de `score_knn`
+        path: Arquivo de destino
+
+    Returns:
+        Caminho do arquivo gravado
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["metric", "k"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def read_scores_csv(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """Lê uma tabela gravada por `write_scores_csv`, convertendo as colunas numéricas."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return [
+        {name: value if name == "metric" else (int(value) if name in ("k", "n_samples") else float(value))
+         for name, value in row.items()}
+        for row in rows
+    ]
@@ -0,0 +1,218 @@
+"""
+Busca de hiperparâmetros do KNN com successive halving sobre os folds.
+
+O espaço de busca combina normalização, métrica, ponderação dos votos e K.
+Todas as configurações começam avaliadas em poucos folds; a cada rodada
+apenas a fração `1 / eta` melhor continua, com `eta` vezes mais folds, até a
+rodada final na validação cruzada completa. As tabelas de vizinhos são
+calculadas uma única vez por (normalização, métrica, fold) até o maior K e
+reaproveitadas por todas as ponderações e valores de K, de modo que descartar
+uma configuração também evita calcular as tabelas dos folds seguintes.
+"""
+
+import math
+from itertools import product
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .distance import GEMM_METRICS, l2_normalize, prepare_embeddings
+from .neighbors import distance_weights, encode_labels, kneighbors_table, predict_k_range
+
+NORMALIZATIONS = ("none", "l2", "standard")
+WEIGHTINGS = ("uniform", "distance")
+DEFAULT_METRICS = ("euclidean", "cosine", "manhattan")
+
+
+class SearchConfig(NamedTuple):
+    """Configuração do KNN avaliada pela busca."""
+
+    normalization: str
+    metric: str
+    weighting: str
+    k: int
+
+
+def normalize_embeddings(X: np.ndarray, normalization: str, train_idx: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Aplica a normalização dos embeddings.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        normalization: 'none', 'l2' (norma unitária por linha) ou 'standard'
+            (média zero e variância unitária por dimensão)
+        train_idx: Linhas usadas para estimar média e desvio no 'standard'
+            (padrão: todas), evitando vazamento do fold de teste
+
+    Returns:
+        Embeddings normalizados em float32
+    """
+    if normalization == "none":
+        return np.asarray(X, dtype=np.float32)
+    if normalization == "l2":
+        return l2_normalize(X)
+    if normalization != "standard":
+        raise ValueError(f"Normalização desconhecida: {normalization}")
+    X = np.asarray(X, dtype=np.float32)
+    reference = X if train_idx is None else X[train_idx]
+    std = reference.std(axis=0)
+    return (X - reference.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+
+def search_space(
+    k_range: Sequence[int] = range(1, 31),
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    normalizations: Sequence[str] = NORMALIZATIONS,
+    weightings: Sequence[str] = WEIGHTINGS,
+) -> List[SearchConfig]:
+    """
+    Lista as configurações da busca.
+
+    O par ('l2', 'cosine') é omitido por ser idêntico a ('none', 'cosine').
+    """
+    return [
+        SearchConfig(normalization, metric, weighting, int(k))
+        for normalization, metric, weighting, k in product(normalizations, metrics, weightings, k_range)
+        if not (normalization == "l2" and metric == "cosine")
+    ]
+
+
+class NeighborCache:
+    """
+    Tabelas de vizinhos por (normalização, métrica, fold), calculadas sob demanda.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        folds: Pares (train_idx, test_idx)
+        max_k: Número de vizinhos de cada tabela
+        n_jobs: Threads/processos das métricas fora do kernel de produtos de matrizes
+    """
+
+    def __init__(
+        self,
+        X: np.ndarray,
+        folds: Sequence[Tuple[np.ndarray, np.ndarray]],
+        max_k: int,
+        n_jobs: Optional[int] = None,
+    ) -> None:
+        self.X = X
+        self.folds = folds
+        self.max_k = max_k
+        self.n_jobs = n_jobs
+        self.n_computed = 0
+        self._tables: Dict[Tuple[str, str, int], Tuple[np.ndarray, np.ndarray]] = {}
+        self._prepared: Dict[Tuple[str, str], Tuple[np.ndarray, Optional[np.ndarray]]] = {}
+
+    def _embeddings(self, normalization: str, metric: str, fold: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if normalization == "standard":
+            # Média e desvio dependem do treino de cada fold
+            X = normalize_embeddings(self.X, normalization, self.folds[fold][0])
+            return prepare_embeddings(X, metric) if metric in GEMM_METRICS else (X, None)
+        key = (normalization, metric)
+        if key not in self._prepared:
+            X = normalize_embeddings(self.X, normalization)
+            self._prepared[key] = prepare_embeddings(X, metric) if metric in GEMM_METRICS else (X, None)
+        return self._prepared[key]
+
+    def get(self, normalization: str, metric: str, fold: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Distâncias e índices (no treino do fold) dos `max_k` vizinhos de cada amostra de teste."""
+        key = (normalization, metric, fold)
+        if key not in self._tables:
+            train_idx, test_idx = self.folds[fold]
+            X, sq = self._embeddings(normalization, metric, fold)
+            self._tables[key] = kneighbors_table(
+                X[train_idx], X[test_idx], min(self.max_k, len(train_idx)), metric, n_jobs=self.n_jobs,
+                prepared=sq is not None, train_sq=None if sq is None else sq[train_idx],
+            )
+            self.n_computed += 1
+        return self._tables[key]
+
+
+def successive_halving_search(
+    X: np.ndarray,
+    y: np.ndarray,
+    cv: Any = 10,
+    k_range: Sequence[int] = range(1, 31),
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    normalizations: Sequence[str] = NORMALIZATIONS,
+    weightings: Sequence[str] = WEIGHTINGS,
+    min_folds: int = 2,
+    eta: int = 3,
+    n_jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Busca a melhor configuração do KNN com successive halving sobre os folds.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        y: Labels das síndromes
+        cv: Número de folds ou divisor de validação cruzada (ex.: um `FoldPlan`)
+        k_range: Valores de K
+        metrics: Métricas de distância
+        normalizations: Normalizações dos embeddings
+        weightings: 'uniform' e/ou 'distance' (votos ponderados por 1/distância)
+        min_folds: Folds avaliados na primeira rodada
+        eta: Fator de redução das configurações (e de aumento dos folds) por rodada
+        n_jobs: Threads/processos das métricas fora do kernel de produtos de matrizes
+
+    Returns:
+        Dicionário com a melhor configuração (`best`), o ranking da rodada final
+        (`leaderboard`), o resumo de cada rodada (`rungs`), o número de
+        configurações e o de tabelas de vizinhos calculadas
+    """
+    from sklearn.model_selection import check_cv
+
+    if eta < 2:
+        raise ValueError("eta deve ser pelo menos 2")
+    X = np.asanyarray(X)
+    classes, y_codes = encode_labels(y)
+    folds = list(check_cv(cv, y, classifier=True).split(X, y))
+    configs = search_space(k_range, metrics, normalizations, weightings)
+    cache = NeighborCache(X, folds, max(config.k for config in configs), n_jobs=n_jobs)
+
+    scores: Dict[SearchConfig, List[float]] = {config: [] for config in configs}
+    alive = configs
+    n_folds = min(max(1, min_folds), len(folds))
+    rungs = []
+    while True:
+        groups: Dict[Tuple[str, str], List[SearchConfig]] = {}
+        for config in alive:
+            groups.setdefault((config.normalization, config.metric), []).append(config)
+
+        for (normalization, metric), group in groups.items():
+            for fold in range(min(len(scores[config]) for config in group), n_folds):
+                distances, neighbors = cache.get(normalization, metric, fold)
+                test_codes = y_codes[folds[fold][1]]
+                neighbor_labels = y_codes[folds[fold][0]][neighbors]
+                for weighting in {config.weighting for config in group}:
+                    pending = [c for c in group if c.weighting == weighting and len(scores[c]) == fold]
+                    if not pending:
+                        continue
+                    weights = distance_weights(distances) if weighting == "distance" else None
+                    k_values = [min(config.k, neighbors.shape[1]) for config in pending]
+                    predictions = predict_k_range(neighbor_labels, len(classes), k_values, weights)
+                    for config, accuracy in zip(pending, (predictions == test_codes).mean(axis=1)):
+                        scores[config].append(float(accuracy))
+
+        # Ordem estável: empates ficam com a configuração listada primeiro
+        alive = sorted(alive, key=lambda config: -np.mean(scores[config]))
+        rungs.append({"n_folds": n_folds, "n_configs": len(alive), "best_accuracy": float(np.mean(scores[alive[0]]))})
+        logger.info(f"Successive halving: {len(alive)} configurações em {n_folds} folds, "
+                    f"melhor {alive[0]} ({rungs[-1]['best_accuracy']:.4f})")
+        if n_folds == len(folds):
+            break
+        alive = alive[:max(1, math.ceil(len(alive) / eta))]
+        n_folds = min(len(folds), n_folds * eta)
+
+    leaderboard = [
+        {**config._asdict(), "accuracy": float(np.mean(scores[config])), "n_folds": len(scores[config])}
+        for config in alive
+    ]
+    return {
+        "best": leaderboard[0],
+        "leaderboard": leaderboard,
+        "rungs": rungs,
+        "n_configs": len(configs),
+        "n_tables": cache.n_computed,
+    }
@@ -0,0 +1,296 @@
+"""
+Intervalos de confiança por bootstrap a partir das predições fora do fold.
+
+A tabela de vizinhos fora do fold (cada amostra consultada contra o treino do
+fold em que é teste) é calculada uma única vez até o maior K; os scores de
+qualquer K saem dela por votação. Como os folds agrupam as imagens por sujeito,
+o bootstrap também sorteia sujeitos, e não imagens: cada réplica é uma linha de
+uma matriz de pesos `(n_boot, n_samples)` com quantas vezes o sujeito de cada
+amostra foi sorteado, de modo que as métricas de todas as réplicas são somas ponderadas
+calculadas com produtos de matrizes, sem reajustar modelos:
+
+    - acurácia e top-k: `W @ acertos / n`
+    - F1 macro: verdadeiros positivos, preditos e reais por classe via `W @ one_hot`
+    - AUC macro one-vs-rest: Mann-Whitney ponderado sobre os grupos de scores
+      empatados (os scores do KNN uniforme só assumem `k + 1` valores)
+
+Todas as réplicas usam os mesmos sorteios para todos os K, então as diferenças
+entre dois K também são pareadas.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from .distance import GEMM_METRICS, prepare_embeddings
+from .neighbors import encode_labels, kneighbors_table, vote_proba
+from .subjects import rank_classes
+
+DEFAULT_N_BOOT = 1000
+# Limite de elementos da matriz de pesos processada por vez (n_réplicas x n_amostras)
+BOOTSTRAP_CHUNK_ELEMENTS = 2 ** 22
+# Acima deste número de níveis de score, o AUC agrupa os pesos com `reduceat` em vez de um produto de matrizes
+GROUP_MATMUL_LIMIT = 256
+
+
+def out_of_fold_neighbors(
+    X: np.ndarray,
+    y: np.ndarray,
+    max_k: int,
+    metric: str = "euclidean",
+    cv: Any = 10,
+    groups: Optional[np.ndarray] = None,
+    n_jobs: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Calcula uma única vez a tabela de vizinhos fora do fold de cada amostra.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        y: Labels das síndromes
+        max_k: Maior K que será avaliado
+        metric: Métrica de distância
+        cv: Número de folds ou divisor de validação cruzada (ex.: um `FoldPlan`)
+        groups: Sujeito de cada amostra, unidade de reamostragem do bootstrap
+            (sem `groups`, cada imagem é o seu próprio sujeito)
+        n_jobs: Threads da busca de vizinhos
+
+    Returns:
+        Dict com 'neighbor_labels' (códigos das classes dos vizinhos, (n, max_k),
+        -1 nas amostras que não são teste em nenhum fold), 'y_codes', 'classes'
+        e 'group_codes' (código do sujeito de cada amostra)
+    """
+    from sklearn.model_selection import check_cv
+
+    X = np.asanyarray(X)
+    classes, y_codes = encode_labels(y)
+    if groups is None:
+        group_codes = np.arange(len(y_codes))
+    else:
+        _, group_codes = np.unique(np.asarray(groups), return_inverse=True)
+    X_metric, sq = prepare_embeddings(X, metric) if metric in GEMM_METRICS else (X, None)
+
+    neighbor_labels = np.full((len(y_codes), max_k), -1, dtype=np.intp)
+    for train_idx, test_idx in check_cv(cv, y, classifier=True).split(X, y, groups):
+        _, neighbors = kneighbors_table(
+            X_metric[train_idx], X_metric[test_idx], max_k, metric, n_jobs=n_jobs,
+            prepared=sq is not None, train_sq=None if sq is None else sq[train_idx],
+        )
+        neighbor_labels[test_idx] = y_codes[train_idx][neighbors]
+
+    return {"neighbor_labels": neighbor_labels, "y_codes": y_codes, "classes": classes, "group_codes": group_codes}
+
+
+def resample_weights(
+    n_samples: int, n_boot: int, random_state: int = 42, groups: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Matriz de pesos do bootstrap: quantas vezes cada amostra foi sorteada em cada réplica.
+
+    Com `groups`, são sorteados sujeitos (tantos quanto existem) e cada imagem
+    recebe a contagem do seu sujeito.
+
+    Args:
+        n_samples: Número de amostras
+        n_boot: Número de réplicas
+        random_state: Semente dos sorteios
+        groups: Código do sujeito de cada amostra, de 0 a n_grupos - 1 (n_samples,)
+
+    Returns:
+        Array int32 (n_boot, n_samples); sem `groups`, cada linha soma `n_samples`
+    """
+    n_units = n_samples if groups is None else int(groups.max()) + 1
+    rng = np.random.default_rng(random_state)
+    draws = rng.integers(0, n_units, size=(n_boot, n_units))
+    flat = (np.arange(n_boot)[:, None] * n_units + draws).ravel()
+    counts = np.bincount(flat, minlength=n_boot * n_units).reshape(n_boot, n_units).astype(np.int32)
+    return counts if groups is None else counts[:, groups]
+
+
+def _weighted_f1_macro(W: np.ndarray, y_true: np.ndarray, y_pred: np.ndarray, n_classes: int) -> np.ndarray:
+    """F1 macro de cada réplica, sobre as classes presentes nos labels reais ou preditos da réplica."""
+    classes = np.arange(n_classes)
+    true_onehot = (y_true[:, None] == classes).astype(np.float64)
+    pred_onehot = (y_pred[:, None] == classes).astype(np.float64)
+    tp = W @ (true_onehot * pred_onehot)
+    denominator = W @ true_onehot + W @ pred_onehot
+    present = denominator > 0
+    f1 = np.divide(2 * tp, denominator, out=np.zeros_like(tp), where=present)
+    return f1.sum(axis=1) / present.sum(axis=1)
+
+
+def _weighted_auc_ovr(W: np.ndarray, y_true: np.ndarray, y_score: np.ndarray) -> np.ndarray:
+    """
+    AUC macro one-vs-rest de cada réplica por Mann-Whitney ponderado.
+
+    Para cada classe, as amostras são agrupadas por score (empates contam meio
+    ponto); classes sem positivos ou negativos na réplica ficam fora da média.
+    """
+    n_boot = W.shape[0]
+    n_classes = y_score.shape[1]
+    aucs = np.full((n_boot, n_classes), np.nan)
+    for c in range(n_classes):
+        positive = y_true == c
+        levels, group = np.unique(y_score[:, c], return_inverse=True)
+        if len(levels) <= GROUP_MATMUL_LIMIT:
+            # Poucos níveis de score (KNN uniforme): pesos por grupo em um único produto de matrizes
+            indicator = np.zeros((len(group), 2 * len(levels)))
+            indicator[np.arange(len(group)), group + len(levels) * ~positive] = 1.0
+            group_pos, group_neg = np.hsplit(W @ indicator, 2)
+        else:
+            order = np.argsort(group, kind="stable")
+            starts = np.searchsorted(group[order], np.arange(len(levels)))
+            W_sorted = W[:, order]
+            group_pos = np.add.reduceat(W_sorted * positive[order], starts, axis=1)
+            group_neg = np.add.reduceat(W_sorted * ~positive[order], starts, axis=1)
+        below = np.cumsum(group_neg, axis=1) - group_neg
+        n_pos, n_neg = group_pos.sum(axis=1), group_neg.sum(axis=1)
+        valid = (n_pos > 0) & (n_neg > 0)
+        wins = (group_pos * (below + 0.5 * group_neg)).sum(axis=1)
+        aucs[valid, c] = wins[valid] / (n_pos[valid] * n_neg[valid])
+    with np.errstate(invalid="ignore"):
+        return np.nanmean(aucs, axis=1)
+
+
+def weighted_metrics(
+    W: np.ndarray, y_true: np.ndarray, y_score: np.ndarray, top_k: Sequence[int] = (3, 5)
+) -> Dict[str, np.ndarray]:
+    """
+    Métricas de cada réplica (linha de `W`) a partir dos scores por classe.
+
+    A predição é a classe de maior score, com empates pela menor classe (como
+    no `predict` do KNN).
+
+    Args:
+        W: Pesos do bootstrap (n_boot, n_samples); uma linha de uns dá a estimativa pontual
+        y_true: Códigos das classes verdadeiras (n_samples,)
+        y_score: Scores por classe (n_samples, n_classes)
+        top_k: Valores de K do top-k
+
+    Returns:
+        Dict `métrica -> valores (n_boot,)` com 'accuracy', 'f1_macro', 'auc' e `top_<k>_accuracy`
+    """
+    n_classes = y_score.shape[1]
+    ranked = rank_classes(y_score, max(top_k, default=1))
+    W = W.astype(np.float64)
+    totals = W.sum(axis=1)
+
+    results = {
+        "accuracy": W @ (ranked[:, 0] == y_true) / totals,
+        "f1_macro": _weighted_f1_macro(W, y_true, ranked[:, 0], n_classes),
+        "auc": _weighted_auc_ovr(W, y_true, y_score),
+    }
+    for t in top_k:
+        results[f"top_{t}_accuracy"] = W @ (ranked[:, :t] == y_true[:, None]).any(axis=1) / totals
+    return results
+
+
+def bootstrap_k_range(
+    oof: Dict[str, np.ndarray],
+    k_range: Sequence[int],
+    n_boot: int = DEFAULT_N_BOOT,
+    alpha: float = 0.05,
+    top_k: Sequence[int] = (3, 5),
+    random_state: int = 42,
+) -> List[Dict[str, Any]]:
+    """
+    Intervalos de confiança por bootstrap das métricas de cada K.
+
+    Os sujeitos de `oof['group_codes']` são reamostrados, com os mesmos sorteios
+    para todos os K, e a diferença de acurácia de cada K para o melhor K é
+    reportada com o seu próprio intervalo pareado.
+
+    Args:
+        oof: Resultado de `out_of_fold_neighbors`
+        k_range: Valores de K avaliados
+        n_boot: Número de réplicas
+        alpha: Nível dos intervalos percentis (0.05 para 95%)
+        top_k: Valores de K do top-k
+        random_state: Semente dos sorteios
+
+    Returns:
+        Lista de dicionários com `k` e, para cada métrica, `<métrica>` (estimativa
+        sobre todas as amostras), `<métrica>_low` e `<métrica>_high`; além de
+        `accuracy_delta`, `accuracy_delta_low` e `accuracy_delta_high` em relação ao melhor K
+    """
+    k_values = list(k_range)
+    evaluated = oof["neighbor_labels"][:, 0] >= 0
+    neighbor_labels = oof["neighbor_labels"][evaluated]
+    y_true = oof["y_codes"][evaluated]
+    # Apenas os sujeitos avaliados entram no sorteio
+    _, group_codes = np.unique(oof["group_codes"][evaluated], return_inverse=True)
+    n_samples, n_classes = len(y_true), len(oof["classes"])
+    scores = [vote_proba(neighbor_labels, k, n_classes) for k in k_values]
+
+    estimates = [weighted_metrics(np.ones((1, n_samples)), y_true, score, top_k) for score in scores]
+    names = list(estimates[0])
+    replicates: List[Dict[str, List[np.ndarray]]] = [{name: [] for name in names} for _ in k_values]
+    chunk = max(1, BOOTSTRAP_CHUNK_ELEMENTS // max(1, n_samples))
+    for i, start in enumerate(range(0, n_boot, chunk)):
+        W = resample_weights(n_samples, min(chunk, n_boot - start), random_state + i, groups=group_codes)
+        for by_name, score in zip(replicates, scores):
+            for name, values in weighted_metrics(W, y_true, score, top_k).items():
+                by_name[name].append(values)
+
+    samples = [{name: np.concatenate(values) for name, values in by_name.items()} for by_name in replicates]
+    quantiles = (100 * alpha / 2, 100 * (1 - alpha / 2))
+    best = int(np.argmax([estimate["accuracy"][0] for estimate in estimates]))
+
+    results = []
+    for k, estimate, sample in zip(k_values, estimates, samples):
+        res: Dict[str, Any] = {"k": k}
+        for name in names:
+            low, high = np.nanpercentile(sample[name], quantiles)
+            res.update({name: float(estimate[name][0]), f"{name}_low": float(low), f"{name}_high": float(high)})
+        delta = sample["accuracy"] - samples[best]["accuracy"]
+        low, high = np.percentile(delta, quantiles)
+        res.update({
+            "accuracy_delta": res["accuracy"] - float(estimates[best]["accuracy"][0]),
+            "accuracy_delta_low": float(low),
+            "accuracy_delta_high": float(high),
+        })
+        results.append(res)
+
+    logger.info(
+        f"Bootstrap com {n_boot} réplicas: melhor K={k_values[best]}; K com diferença não significativa: "
+        + ", ".join(str(res["k"]) for res in results if res["accuracy_delta_low"] <= 0 <= res["accuracy_delta_high"])
+    )
+    return results
+
+
+def bootstrap_confidence_intervals(
+    X: np.ndarray,
+    y: np.ndarray,
+    groups: Optional[np.ndarray] = None,
+    k_range: Sequence[int] = range(1, 16),
+    metrics: Sequence[str] = ("euclidean", "cosine"),
+    cv: Any = 10,
+    n_boot: int = DEFAULT_N_BOOT,
+    alpha: float = 0.05,
+    top_k: Sequence[int] = (3, 5),
+    n_jobs: Optional[int] = None,
+    random_state: int = 42,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Calcula as predições fora do fold e os intervalos de `bootstrap_k_range` para cada métrica.
+
+    `groups` (sujeito de cada amostra) deve ser o mesmo usado nos folds, para
+    que o bootstrap reamostre sujeitos; sem ele, cada imagem é reamostrada.
+
+    Returns:
+        Dict `métrica -> resultado de bootstrap_k_range`
+    """
+    k_values = list(k_range)
+    return {
+        metric: bootstrap_k_range(
+            out_of_fold_neighbors(X, y, max(k_values), metric, cv=cv, groups=groups, n_jobs=n_jobs),
+            k_values, n_boot=n_boot, alpha=alpha, top_k=top_k, random_state=random_state,
+        )
+        for metric in metrics
+    }
+
+
+def format_interval(res: Dict[str, Any], name: str) -> str:
+    """Formata `<estimativa> [<low>, <high>]` de uma métrica de `bootstrap_k_range`."""
+    return f"{res[name]:.4f} [{res[f'{name}_low']:.4f}, {res[f'{name}_high']:.4f}]"
@@ -0,0 +1,156 @@
+"""
+Predição e avaliação por sujeito, agregando as várias imagens de cada paciente.
+
+Todas as imagens são consultadas de uma só vez (uma busca de vizinhos em
+blocos) e os scores por síndrome de cada imagem são fundidos por sujeito de
+forma vetorizada, com `np.ufunc.reduceat` sobre as linhas ordenadas por sujeito:
+
+    - 'mean': média dos votos das imagens
+    - 'max': maior score de cada síndrome entre as imagens
+    - 'rank': reciprocal rank fusion, soma de `1 / (RRF_CONSTANT + posição)`
+      da síndrome no ranking de cada imagem; síndromes empatadas (ex.: todas as
+      que não receberam votos) dividem a mesma posição, a menor do empate
+"""
+
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+
+from .distance import GEMM_METRICS, prepare_embeddings
+from .neighbors import encode_labels, kneighbors_table, vote_proba
+
+FUSIONS = ("mean", "max", "rank")
+RRF_CONSTANT = 60
+
+
+def group_rows(subjects: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Agrupa as linhas por sujeito.
+
+    Args:
+        subjects: Sujeito de cada imagem (n_images,)
+
+    Returns:
+        Tuple contendo:
+            - subject_ids: Sujeitos únicos ordenados (n_subjects,)
+            - order: Permutação que ordena as imagens por sujeito (estável)
+            - starts: Início de cada sujeito nas linhas ordenadas (n_subjects,)
+    """
+    subject_ids, codes = np.unique(np.asarray(subjects), return_inverse=True)
+    order = np.argsort(codes, kind="stable")
+    starts = np.searchsorted(codes[order], np.arange(len(subject_ids)))
+    return subject_ids, order, starts
+
+
+def fuse_scores(
+    scores: np.ndarray, subjects: np.ndarray, fusion: str = "mean"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Funde os scores por síndrome das imagens de cada sujeito.
+
+    Args:
+        scores: Scores de cada imagem (n_images, n_classes), ex.: de `vote_proba`
+        subjects: Sujeito de cada imagem (n_images,)
+        fusion: 'mean', 'max' ou 'rank'
+
+    Returns:
+        Tuple (subject_ids, scores fundidos (n_subjects, n_classes))
+    """
+    if fusion not in FUSIONS:
+        raise ValueError(f"Fusão desconhecida: {fusion}")
+    subject_ids, order, starts = group_rows(subjects)
+    scores = np.asarray(scores, dtype=np.float64)[order]
+    if len(scores) == 0:
+        return subject_ids, np.empty((0, scores.shape[1]))
+
+    if fusion == "max":
+        return subject_ids, np.maximum.reduceat(scores, starts, axis=0)
+    if fusion == "rank":
+        # Posição (a partir de 1) de cada síndrome no ranking da imagem; empates recebem a menor
+        # posição do grupo, para que a ordem das classes não dê crédito a síndromes sem votos
+        ranking = np.argsort(-scores, axis=1, kind="stable")
+        ordered = np.take_along_axis(scores, ranking, axis=1)
+        columns = np.arange(scores.shape[1])[None, :]
+        tie_start = np.where(np.diff(ordered, axis=1, prepend=np.inf) != 0, columns, 0)
+        positions = np.empty_like(ranking)
+        np.put_along_axis(positions, ranking, np.maximum.accumulate(tie_start, axis=1) + 1, axis=1)
+        scores = 1.0 / (RRF_CONSTANT + positions)
+    fused = np.add.reduceat(scores, starts, axis=0)
+    if fusion == "mean":
+        fused /= np.diff(np.append(starts, len(scores)))[:, None]
+    return subject_ids, fused
+
+
+def rank_classes(scores: np.ndarray, k: int) -> np.ndarray:
+    """Índices das `k` classes de maior score, ordenadas (empates pela menor classe)."""
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def evaluate_subjects(
+    X: np.ndarray,
+    y: np.ndarray,
+    groups: np.ndarray,
+    k: int,
+    cv: Any,
+    metrics: Sequence[str] = ("euclidean", "cosine"),
+    fusions: Sequence[str] = FUSIONS,
+    top_k: Sequence[int] = (1, 3, 5),
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Avalia o KNN por sujeito com validação cruzada agrupada.
+
+    Em cada fold, as imagens de teste são consultadas em uma única busca de
+    vizinhos; os votos de cada imagem são fundidos por sujeito. O divisor deve
+    manter todas as imagens de um sujeito no mesmo fold (ex.: um `FoldPlan`).
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        y: Labels das síndromes
+        groups: Sujeito de cada imagem
+        k: Número de vizinhos da votação
+        cv: Divisor de validação cruzada agrupado por sujeito
+        metrics: Métricas de distância
+        fusions: Fusões avaliadas ('mean', 'max', 'rank')
+        top_k: Valores de K do top-k
+
+    Returns:
+        Dict `métrica -> {'image': ..., <fusão>: ...}`, cada um com
+        `top_<k>` (acurácia média dos folds) e `n` (amostras ou sujeitos avaliados)
+    """
+    X = np.asanyarray(X)
+    groups = np.asarray(groups)
+    classes, y_codes = encode_labels(y)
+    folds = list(cv.split(X, y, groups))
+
+    hits: Dict[str, Dict[str, Any]] = {
+        metric: {name: {t: [] for t in top_k} for name in ("image",) + tuple(fusions)} for metric in metrics
+    }
+    counts: Dict[str, int] = {name: 0 for name in ("image",) + tuple(fusions)}
+    for metric in metrics:
+        X_metric, sq = prepare_embeddings(X, metric) if metric in GEMM_METRICS else (X, None)
+        for train_idx, test_idx in folds:
+            _, neighbors = kneighbors_table(
+                X_metric[train_idx], X_metric[test_idx], k, metric,
+                prepared=sq is not None, train_sq=None if sq is None else sq[train_idx],
+            )
+            proba = vote_proba(y_codes[train_idx][neighbors], k, len(classes))
+            scored = {"image": (proba, y_codes[test_idx])}
+            for fusion in fusions:
+                _, fused = fuse_scores(proba, groups[test_idx], fusion)
+                _, order, starts = group_rows(groups[test_idx])
+                scored[fusion] = (fused, y_codes[test_idx][order][starts])
+
+            for name, (scores, truth) in scored.items():
+                ranked = rank_classes(scores, max(top_k))
+                for t in top_k:
+                    hits[metric][name][t].append((ranked[:, :t] == truth[:, None]).any(axis=1).mean())
+                if metric == metrics[0]:
+                    counts[name] += len(truth)
+
+    return {
+        metric: {
+            name: {**{f"top_{t}": float(np.mean(values[t])) for t in top_k}, "n": counts[name]}
+            for name, values in by_name.items()
+        }
+        for metric, by_name in hits.items()
+    }
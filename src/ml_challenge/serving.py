@@ -0,0 +1,377 @@
+"""
+Servidor HTTP local de inferência com micro-lotes.
+
+O `SyndromeClassifier` salvo é carregado uma única vez na inicialização. As
+requisições concorrentes são agrupadas pelo `MicroBatcher` em lotes de até
+`max_batch_size` embeddings (esperando no máximo `max_wait_ms` pelo lote
+encher) e cada lote faz uma única busca de vizinhos em uma thread separada,
+sem bloquear o laço de eventos. Usa apenas a biblioteca padrão (`asyncio`).
+
+Rotas:
+    POST /predict  {"embeddings": [[...], ...], "k": 5} -> {"labels": [[...]], "scores": [[...]]}
+    GET  /health   Estado do modelo carregado
+    GET  /metrics  Percentis de latência e tamanho médio dos lotes
+
+Exemplo:
+    python -m src.ml_challenge.serving --model results/models/syndrome_knn --port 8000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+from .models.classifier import DEFAULT_MODELS_DIR, SyndromeClassifier
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+DEFAULT_MAX_K = 50
+MAX_BODY_BYTES = 64 * 2 ** 20
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class LatencyTracker:
+    """
+    Janela deslizante de latências para cálculo de percentis.
+
+    Args:
+        window: Número de medidas mais recentes mantidas
+    """
+
+    def __init__(self, window: int = 10_000) -> None:
+        self._values: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self._values.append(seconds)
+        self.count += 1
+
+    def percentiles(self, q: Sequence[float] = (50, 90, 99)) -> Dict[str, Optional[float]]:
+        """Percentis em milissegundos (None antes da primeira medida)."""
+        if not self._values:
+            return {f"p{p:g}": None for p in q}
+        values = np.percentile(np.fromiter(self._values, dtype=float), q) * 1000
+        return {f"p{p:g}": round(float(v), 3) for p, v in zip(q, values)}
+
+
+class _Pending(NamedTuple):
+    X: np.ndarray
+    k: int
+    future: "asyncio.Future[Tuple[np.ndarray, np.ndarray]]"
+
+
+class MicroBatcher:
+    """
+    Agrupa consultas concorrentes em lotes antes da busca de vizinhos.
+
+    Um lote é fechado quando acumula `max_batch_size` embeddings ou quando a
+    primeira consulta esperou `max_wait_ms`. Enquanto um lote é processado, as
+    consultas seguintes se acumulam no próximo. Cada lote usa o maior `k`
+    pedido e cada consulta recebe apenas as suas `k` primeiras síndromes.
+
+    Args:
+        model: Classificador ajustado
+        max_batch_size: Máximo de embeddings por lote
+        max_wait_ms: Espera máxima para completar um lote
+    """
+
+    def __init__(
+        self,
+        model: SyndromeClassifier,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ) -> None:
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batch_sizes = LatencyTracker()
+        self.batch_latency = LatencyTracker()
+        self._queue: Optional["asyncio.Queue[_Pending]"] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        # Uma única thread: os lotes são processados em sequência, na ordem de chegada
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="knn-batch")
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def predict_topk(self, X: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Enfileira as consultas e aguarda o resultado do lote."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending(X, k, future))
+        return await future
+
+    async def _collect(self) -> List[_Pending]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        n_rows = len(batch[0].X)
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while n_rows < self.max_batch_size:
+            try:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                else:
+                    pending = self._queue.get_nowait()
+            except asyncio.TimeoutError:
+                break
+            batch.append(pending)
+            n_rows += len(pending.X)
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            X = np.vstack([pending.X for pending in batch])
+            k = max(pending.k for pending in batch)
+            start = time.perf_counter()
+            try:
+                labels, scores = await loop.run_in_executor(
+                    self._executor, self.model.predict_topk, X, k, max(len(X), 1)
+                )
+            except Exception as exc:  # noqa: BLE001 - repassado a cada requisição do lote
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(exc)
+                continue
+            self.batch_latency.record(time.perf_counter() - start)
+            self.batch_sizes.record(len(X))
+
+            offset = 0
+            for pending in batch:
+                stop = offset + len(pending.X)
+                if not pending.future.done():
+                    pending.future.set_result((labels[offset:stop, :pending.k], scores[offset:stop, :pending.k]))
+                offset = stop
+
+
+class InferenceServer:
+    """
+    Servidor HTTP/1.1 mínimo (com keep-alive) sobre `asyncio.start_server`.
+
+    Args:
+        model: Classificador ajustado
+        host: Endereço de escuta
+        port: Porta (0 escolhe uma porta livre, disponível em `port` após `start`)
+        max_batch_size: Máximo de embeddings por lote
+        max_wait_ms: Espera máxima para completar um lote
+        max_k: Maior número de síndromes aceito por requisição
+    """
+
+    def __init__(
+        self,
+        model: SyndromeClassifier,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_k: int = DEFAULT_MAX_K,
+    ) -> None:
+        self.model = model
+        self.host = host
+        self.port = port
+        self.max_k = max_k
+        self.batcher = MicroBatcher(model, max_batch_size, max_wait_ms)
+        self.latency = LatencyTracker()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> "InferenceServer":
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Servidor de inferência em http://{self.host}:{self.port} "
+                    f"(lote máximo {self.batcher.max_batch_size}, espera {self.batcher.max_wait_ms} ms)")
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+        logger.info(f"Servidor encerrado: {json.dumps(self.metrics())}")
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Latência das requisições e dos lotes (ms) e tamanho dos lotes."""
+        return {
+            "requests": self.latency.count,
+            "latency_ms": self.latency.percentiles(),
+            "batches": self.batcher.batch_sizes.count,
+            "batch_latency_ms": self.batcher.batch_latency.percentiles(),
+            "batch_size": self.batcher.batch_sizes.percentiles((50, 100)),
+        }
+
+    async def _predict(self, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        try:
+            payload = json.loads(body)
+            X = np.asarray(payload["embeddings"], dtype=np.float32)
+            k = int(payload.get("k", 5))
+        except (ValueError, KeyError, TypeError) as exc:
+            return 400, {"error": f"Requisição inválida: {exc}"}
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.ndim != 2 or X.shape[1] != self.model.n_features_ or not 0 < k <= self.max_k:
+            return 400, {"error": f"Esperado embeddings (n, {self.model.n_features_}) e 1 <= k <= {self.max_k}"}
+
+        start = time.perf_counter()
+        labels, scores = await self.batcher.predict_topk(X, k)
+        self.latency.record(time.perf_counter() - start)
+        return 200, {"labels": labels.tolist(), "scores": scores.tolist()}
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        path = path.split("?", 1)[0]
+        routes = {
+            "/predict": "POST",
+            "/health": "GET",
+            "/metrics": "GET",
+        }
+        if path not in routes:
+            return 404, {"error": f"Rota desconhecida: {path}"}
+        if method != routes[path]:
+            return 405, {"error": f"Use {routes[path]} em {path}"}
+        if path == "/predict":
+            return await self._predict(body)
+        if path == "/health":
+            return 200, {"status": "ok", "n_samples": int(self.model.n_samples_),
+                         "n_features": int(self.model.n_features_), "n_classes": int(len(self.model.classes_))}
+        return 200, self.metrics()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    method, target, _ = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError(f"Content-Length negativo: {length}")
+                except ValueError:
+                    status, payload, keep_alive = 400, {"error": "Requisição HTTP malformada"}, False
+                else:
+                    if length > MAX_BODY_BYTES:
+                        status, payload, keep_alive = 413, {"error": "Corpo da requisição muito grande"}, False
+                    else:
+                        body = await reader.readexactly(length)
+                        try:
+                            status, payload = await self._route(method, target, body)
+                        except Exception as exc:  # noqa: BLE001 - resposta 500 em vez de derrubar a conexão
+                            logger.exception("Erro ao processar requisição")
+                            status, payload = 500, {"error": str(exc)}
+
+                content = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(content)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def predict_remote(
+    url: str,
+    X: np.ndarray,
+    k: int = 5,
+    timeout: float = 30.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cliente síncrono do servidor: envia embeddings e retorna o top-k.
+
+    Args:
+        url: Endereço base do servidor (ex.: 'http://127.0.0.1:8000')
+        X: Embeddings de consulta (n_query, n_features) ou (n_features,)
+        k: Número de síndromes retornadas por consulta
+        timeout: Tempo máximo de espera em segundos
+
+    Returns:
+        Tuple (labels, scores) de formato (n_query, k)
+    """
+    data = json.dumps({"embeddings": np.asarray(X, dtype=np.float32).tolist(), "k": k}).encode("utf-8")
+    request = urllib.request.Request(
+        url.rstrip("/") + "/predict", data=data, headers={"Content-Type": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        result = json.loads(response.read())
+    return np.asarray(result["labels"]), np.asarray(result["scores"])
+
+
+def serve(
+    model_path: Union[str, Path] = DEFAULT_MODELS_DIR / "syndrome_knn",
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+) -> None:
+    """Carrega o modelo salvo e atende requisições até ser interrompido."""
+    model = SyndromeClassifier.load(model_path)
+    logger.info(f"Modelo carregado de {model_path}: {model.n_samples_} imagens, {len(model.classes_)} síndromes")
+    server = InferenceServer(model, host, port, max_batch_size, max_wait_ms)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=DEFAULT_MODELS_DIR / "syndrome_knn",
+                        help="Diretório do modelo salvo")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Endereço de escuta")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Porta de escuta")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="Máximo de embeddings por lote")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="Espera máxima para completar um lote")
+    args = parser.parse_args()
+    serve(args.model, args.host, args.port, args.max_batch_size, args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Suíte de benchmarks reprodutível sobre embeddings sintéticos.
+
+Para cada tamanho configurado, gera um pickle sintético (`utils.synthetic`) e
+mede as etapas do pipeline com `profile_stage`: carregamento, varredura de K,
+curvas ROC e predição top-k. Cada execução é anexada a um histórico em JSON e
+comparada com as execuções anteriores na mesma máquina, sinalizando
+regressões de tempo acima de um limiar.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from loguru import logger
+
+from .profiling import profile_stage
+from .synthetic import write_synthetic_pickle
+
+DEFAULT_HISTORY_PATH = Path("results/benchmarks/history.json")
+DEFAULT_THRESHOLD = 0.2
+
+# Tamanhos pré-definidos (parâmetros de `make_syndrome_embeddings`)
+BENCHMARK_SIZES: Dict[str, Dict[str, int]] = {
+    "tiny": {"n_classes": 5, "subjects_per_class": 10, "images_per_subject": 2, "n_features": 32},
+    "small": {"n_classes": 10, "subjects_per_class": 30, "images_per_subject": 3, "n_features": 320},
+    "medium": {"n_classes": 20, "subjects_per_class": 250, "images_per_subject": 4, "n_features": 320},
+    "large": {"n_classes": 50, "subjects_per_class": 400, "images_per_subject": 5, "n_features": 320},
+}
+
+
+def environment_info() -> Dict[str, Any]:
+    """Descrição da máquina e da versão do código, para comparar execuções."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "machine": f"{platform.node()}/{platform.machine()}/{os.cpu_count()}cpu",
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "git_commit": commit,
+    }
+
+
+def _best_of(stage: str, repeat: int, func: Callable[[], Any], n_samples: int) -> Any:
+    """Executa `func` `repeat` vezes e guarda as medidas da execução mais rápida."""
+    best: Optional[Dict[str, Any]] = None
+    result = None
+    for _ in range(repeat):
+        with profile_stage(stage, n_samples=n_samples) as measured:
+            result = func()
+        if best is None or measured.record["wall_s"] < best["wall_s"]:
+            best = measured.record
+    return result, {key: best[key] for key in ("wall_s", "cpu_s", "children_cpu_s", "peak_rss_mb")}
+
+
+def benchmark_size(
+    params: Dict[str, Any],
+    work_dir: Union[str, Path],
+    k_range: Iterable[int] = range(1, 16),
+    n_splits: int = 5,
+    n_jobs: Optional[int] = 1,
+    repeat: int = 1,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """
+    Mede as etapas do pipeline para um tamanho de dados.
+
+    Args:
+        params: Parâmetros de `make_syndrome_embeddings`
+        work_dir: Diretório onde o pickle sintético é gerado
+        k_range: Valores de K da varredura
+        n_splits: Número de folds da varredura
+        n_jobs: Processos da varredura de K
+        repeat: Repetições de cada etapa (vale a mais rápida)
+        random_state: Semente dos dados e dos folds
+
+    Returns:
+        Dicionário com o tamanho dos dados, as medidas de cada etapa e a acurácia
+    """
+    from ..models.classification import evaluate_knn
+    from ..models.classifier import SyndromeClassifier
+    from ..models.evaluation import compute_roc_curves
+    from ..models.folds import FoldPlan
+    from .data_processing import load_data
+
+    path = write_synthetic_pickle(Path(work_dir) / "synthetic.p", random_state=random_state, **params)
+    k_range = list(k_range)
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    (X, y, groups), stages["load_data"] = _best_of(
+        "load_data", repeat, lambda: load_data(path, use_store=False, return_groups=True), 0
+    )
+    n_samples = len(y)
+    fold_plan = FoldPlan.build(y, groups, n_splits=n_splits, random_state=random_state, cache_dir=None)
+
+    results, stages["evaluate_knn"] = _best_of(
+        "evaluate_knn", repeat,
+        lambda: evaluate_knn(X, y, k_range=k_range, cv=fold_plan, n_jobs=n_jobs), n_samples,
+    )
+    best = max(results, key=lambda res: res["accuracy_cosine"])
+
+    curves, stages["roc"] = _best_of(
+        "roc", repeat, lambda: compute_roc_curves(X, y, best["k"], fold_plan=fold_plan), n_samples
+    )
+
+    train_idx, test_idx = fold_plan.holdout()
+    model = SyndromeClassifier(n_neighbors=best["k"]).fit(X[train_idx], y[train_idx])
+    _, stages["predict"] = _best_of(
+        "predict", repeat, lambda: model.predict_topk(X[test_idx], k=5), len(test_idx)
+    )
+
+    return {
+        "params": dict(params),
+        "n_samples": n_samples,
+        "stages": stages,
+        "best_k": best["k"],
+        "accuracy_cosine": best["accuracy_cosine"],
+        "auc_cosine": curves["cosine"]["auc"],
+    }
+
+
+def run_benchmarks(
+    sizes: Iterable[Union[str, Dict[str, Any]]] = ("small",),
+    k_range: Iterable[int] = range(1, 16),
+    n_jobs: Optional[int] = 1,
+    repeat: int = 1,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """
+    Executa os benchmarks para cada tamanho.
+
+    Args:
+        sizes: Nomes de `BENCHMARK_SIZES` ou dicionários de parâmetros
+        k_range: Valores de K da varredura
+        n_jobs: Processos da varredura de K
+        repeat: Repetições de cada etapa (vale a mais rápida)
+        random_state: Semente dos dados e dos folds
+
+    Returns:
+        Execução no formato do histórico: data, ambiente e resultados por tamanho
+    """
+    run: Dict[str, Any] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment_info(),
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="ml_challenge_bench_") as work_dir:
+        for size in sizes:
+            name = size if isinstance(size, str) else "custom-" + "-".join(f"{v}" for v in size.values())
+            params = BENCHMARK_SIZES[size] if isinstance(size, str) else size
+            logger.info(f"Benchmark '{name}': {params}")
+            run["results"][name] = benchmark_size(
+                params, work_dir, k_range=k_range, n_jobs=n_jobs, repeat=repeat, random_state=random_state
+            )
+    return run
+
+
+def load_history(path: Union[str, Path] = DEFAULT_HISTORY_PATH) -> List[Dict[str, Any]]:
+    """Lê o histórico de execuções (lista vazia se não existir)."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def append_history(run: Dict[str, Any], path: Union[str, Path] = DEFAULT_HISTORY_PATH) -> Path:
+    """Anexa uma execução ao histórico em JSON."""
+    path = Path(path)
+    history = load_history(path) + [run]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def find_regressions(
+    run: Dict[str, Any],
+    history: List[Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+    window: int = 5,
+    min_seconds: float = 0.01,
+) -> List[Dict[str, Any]]:
+    """
+    Compara uma execução com as anteriores da mesma máquina.
+
+    A referência de cada (tamanho, etapa) é a mediana do tempo de relógio das
+    últimas `window` execuções. Uma etapa é sinalizada quando fica mais de
+    `threshold` (fração) e mais de `min_seconds` acima da referência.
+
+    Args:
+        run: Execução atual (de `run_benchmarks`)
+        history: Execuções anteriores (de `load_history`)
+        threshold: Aumento relativo tolerado
+        window: Número de execuções anteriores na referência
+        min_seconds: Aumento absoluto mínimo para sinalizar (evita ruído em etapas rápidas)
+
+    Returns:
+        Lista de regressões com tamanho, etapa, tempo atual, referência e razão
+    """
+    machine = run["environment"]["machine"]
+    previous = [past for past in history if past["environment"]["machine"] == machine and past is not run]
+
+    regressions = []
+    for size, result in run["results"].items():
+        for stage, metrics in result["stages"].items():
+            times = [
+                past["results"][size]["stages"][stage]["wall_s"]
+                for past in previous
+                if size in past["results"] and stage in past["results"][size]["stages"]
+            ][-window:]
+            if not times:
+                continue
+            baseline = float(np.median(times))
+            wall_s = metrics["wall_s"]
+            if wall_s > baseline * (1 + threshold) and wall_s - baseline > min_seconds:
+                regressions.append({
+                    "size": size, "stage": stage, "wall_s": wall_s,
+                    "baseline_s": baseline, "ratio": wall_s / baseline if baseline > 0 else float("inf"),
+                })
+    return regressions
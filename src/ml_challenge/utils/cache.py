@@ -0,0 +1,251 @@
+"""
+Utilitários de cache em disco endereçado por conteúdo.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+DEFAULT_CACHE_DIR = Path("results/cache")
+DEFAULT_MAX_SIZE_MB = 512
+# Tamanho aproximado dos blocos de linhas lidos ao calcular o hash de um array
+HASH_CHUNK_BYTES = 16 * 2 ** 20
+
+_SEP = "/"
+# Folhas especiais para valores sem representação direta em `.npz`
+_NONE, _EMPTY_DICT, _EMPTY_LIST = "!none", "!dict", "!list"
+_MISSING = object()
+
+
+def hash_arrays(*arrays: Any, **params: Any) -> str:
+    """
+    Calcula um hash estável para arrays e parâmetros.
+
+    Os arrays são lidos em blocos de linhas de até `HASH_CHUNK_BYTES`, de modo
+    que uma matriz mapeada em memória nunca é copiada inteira para a RAM.
+
+    Args:
+        *arrays: Arrays cujo conteúdo compõe a chave
+        **params: Parâmetros adicionais serializáveis em JSON
+
+    Returns:
+        Hash hexadecimal (SHA-1) da combinação
+    """
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = np.asanyarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        if array.ndim == 0:
+            array = array.reshape(1)
+        row_bytes = max(array[:1].nbytes, 1)
+        step = max(HASH_CHUNK_BYTES // row_bytes, 1)
+        for start in range(0, len(array), step):
+            chunk = array[start:start + step]
+            if chunk.dtype == object:
+                # Cada item é codificado separadamente, sem depender da largura de um bloco
+                digest.update("".join(f"{item}\0" for item in chunk.ravel()).encode())
+            else:
+                digest.update(memoryview(np.ascontiguousarray(chunk)).cast("B"))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _join(prefix: str, name: Any) -> str:
+    return f"{prefix}{_SEP}{name}" if prefix else str(name)
+
+
+def _flatten(value: Any, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    if value is None:
+        yield _join(prefix, _NONE), np.zeros(0, dtype=np.int8)
+        return
+    if isinstance(value, dict):
+        marker, items = _EMPTY_DICT, value.items()
+    elif isinstance(value, list):
+        # Listas são gravadas com o marcador `#` para serem reconstruídas como listas
+        marker, items = _EMPTY_LIST, ((f"#{i}", item) for i, item in enumerate(value))
+    else:
+        array = np.asarray(value)
+        if array.dtype == object:
+            raise TypeError(
+                f"Valor em '{prefix or '<raiz>'}' não pode ser gravado no cache "
+                f"(tipo {type(value).__name__} vira array de objetos)"
+            )
+        yield prefix, array
+        return
+    if not value:
+        yield _join(prefix, marker), np.zeros(0, dtype=np.int8)
+        return
+    for name, item in items:
+        yield from _flatten(item, _join(prefix, name))
+
+
+def _unflatten(arrays: Dict[str, np.ndarray]) -> Any:
+    tree: Dict[str, Any] = {}
+    for path, array in arrays.items():
+        node = tree
+        *parents, leaf = path.split(_SEP)
+        for name in parents:
+            node = node.setdefault(name, {})
+        node[leaf] = array.item() if array.ndim == 0 else array
+
+    def rebuild(node: Any) -> Any:
+        if not isinstance(node, dict):
+            return node
+        if len(node) == 1:
+            marker = next(iter(node))
+            if marker == _NONE:
+                return None
+            if marker == _EMPTY_DICT:
+                return {}
+            if marker == _EMPTY_LIST:
+                return []
+        if node and all(name.startswith("#") for name in node):
+            return [rebuild(node[f"#{i}"]) for i in range(len(node))]
+        return {name: rebuild(item) for name, item in node.items()}
+
+    return rebuild(tree)
+
+
+class StageCache:
+    """
+    Cache em disco dos resultados de cada etapa do pipeline.
+
+    Cada resultado é gravado como `<root>/<etapa>/<chave>.npz`, onde a chave é
+    o hash das entradas e parâmetros da etapa (ver `hash_arrays`). Os
+    resultados podem ser arrays, escalares, None e dicionários/listas
+    aninhados deles (inclusive vazios); valores que só seriam gravados como
+    arrays de objetos são rejeitados com TypeError. O tamanho total do diretório é limitado a `max_size_mb`: ao gravar,
+    os arquivos usados há mais tempo são removidos primeiro (LRU pela data de
+    modificação, atualizada a cada leitura). Com `enabled=False`, `fetch`
+    apenas executa o cálculo, sem ler nem gravar nada.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path] = DEFAULT_CACHE_DIR,
+        max_size_mb: Optional[float] = DEFAULT_MAX_SIZE_MB,
+        enabled: bool = True,
+    ) -> None:
+        self.root = Path(root)
+        self.max_size_mb = max_size_mb
+        self.enabled = enabled
+
+    def path(self, stage: str, key: str) -> Path:
+        """Caminho do arquivo de um resultado."""
+        return self.root / stage / f"{key}.npz"
+
+    def get(self, stage: str, key: str, default: Any = None) -> Any:
+        """
+        Lê um resultado do cache.
+
+        Args:
+            stage: Nome da etapa
+            key: Chave do resultado
+            default: Valor retornado se o resultado não estiver no cache
+
+        Returns:
+            O resultado gravado, ou `default` se não estiver no cache
+        """
+        path = self.path(stage, key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return default
+        os.utime(path)
+        return _unflatten(arrays)
+
+    def put(self, stage: str, key: str, value: Any) -> Path:
+        """
+        Grava um resultado no cache e aplica o limite de tamanho.
+
+        Args:
+            stage: Nome da etapa
+            key: Chave do resultado
+            value: Array, escalar, None ou dicionário/lista aninhados deles
+
+        Returns:
+            Caminho do arquivo gravado
+
+        Raises:
+            TypeError: Se o valor contém objetos sem representação em `.npz`
+        """
+        arrays = dict(_flatten(value))
+        path = self.path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.stem}.tmp.npz")
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def fetch(self, stage: str, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Retorna o resultado em cache ou o calcula com `compute` e o grava.
+
+        O valor retornado é sempre o lido do formato em disco, de modo que a
+        primeira execução e as seguintes produzem exatamente os mesmos tipos.
+        """
+        if not self.enabled:
+            return compute()
+
+        value = self.get(stage, key, _MISSING)
+        if value is not _MISSING:
+            logger.info(f"Etapa '{stage}' carregada do cache ({key[:12]})")
+            return value
+
+        value = compute()
+        self.put(stage, key, value)
+        return self.get(stage, key, value)
+
+    def _entries(self) -> Iterator[Path]:
+        # Arquivos temporários (ocultos) de gravações em andamento ficam de fora
+        return (path for path in self.root.rglob("*.npz") if not path.name.startswith("."))
+
+    def size_bytes(self) -> int:
+        """Tamanho total dos arquivos do cache."""
+        return sum(path.stat().st_size for path in self._entries())
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """
+        Remove os resultados menos recentemente usados até caber no limite.
+
+        Args:
+            keep: Arquivo que nunca deve ser removido (ex.: o recém-gravado)
+
+        Returns:
+            Número de arquivos removidos
+        """
+        if self.max_size_mb is None or not self.root.exists():
+            return 0
+
+        entries = sorted(
+            ((path.stat().st_mtime_ns, path.stat().st_size, path) for path in self._entries()),
+            key=lambda entry: entry[0],
+        )
+        total = sum(size for _, size, _ in entries)
+        limit = self.max_size_mb * 2 ** 20
+        removed = 0
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            if keep is not None and path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"Cache: {removed} resultado(s) removido(s) para respeitar {self.max_size_mb} MB")
+        return removed
+
+    def clear(self, stage: Optional[str] = None) -> None:
+        """Remove todos os resultados (ou apenas os de uma etapa)."""
+        root = self.root / stage if stage else self.root
+        for path in root.rglob("*.npz"):
+            path.unlink(missing_ok=True)
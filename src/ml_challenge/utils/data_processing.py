@@ -4,22 +4,235 @@ Módulo para processamento e carregamento de dados.
 
 import pickle
 from pathlib import Path
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Iterator, Optional, Union
 import numpy as np
 from loguru import logger
 
+from .embedding_store import StoreWriter, default_store_path, is_store, open_store, store_is_current
 
-def load_data(file_path: str) -> Tuple[np.ndarray, np.ndarray]:
+
+def _read_pickle(file_path: Path) -> Dict[Any, Any]:
+    """Lê o arquivo pickle e valida que ele contém um dicionário."""
+    with open(file_path, 'rb') as f:
+        data = pickle.load(f)
+
+    if not isinstance(data, dict):
+        raise ValueError("Arquivo pickle deve conter um dicionário")
+
+    return data
+
+
+def _walk_embeddings(
+    data: Dict[Any, Any],
+    n_features: Optional[int] = None,
+    release: bool = False,
+    warn: bool = True
+) -> Iterator[Tuple[Any, Any, Any, Any]]:
+    """Percorre o dicionário aninhado emitindo (síndrome, sujeito, imagem, embedding) válidos."""
+    for syndrome_id in list(data.keys()):
+        subjects = data.pop(syndrome_id) if release else data[syndrome_id]
+        if not isinstance(subjects, dict):
+            if warn:
+                logger.warning(f"Formato inválido para síndrome {syndrome_id}")
+            continue
+
+        for subject_id, images in subjects.items():
+            if not isinstance(images, dict):
+                if warn:
+                    logger.warning(f"Formato inválido para sujeito {subject_id}")
+                continue
+
+            for image_id, embedding in images.items():
+                if not isinstance(embedding, (list, np.ndarray)):
+                    if warn:
+                        logger.warning(f"Embedding inválido para imagem {image_id}")
+                elif n_features is not None and len(embedding) != n_features:
+                    if warn:
+                        logger.warning(
+                            f"Embedding com {len(embedding)} features para imagem {image_id}, "
+                            f"esperado {n_features}"
+                        )
+                else:
+                    yield syndrome_id, subject_id, image_id, embedding
+
+        # Libera o sub-dicionário da síndrome assim que ele é consumido
+        del subjects
+
+
+def _as_data(source: Union[str, Path, Dict[Any, Any]]) -> Dict[Any, Any]:
+    """Aceita um dicionário já carregado ou o caminho do pickle."""
+    if isinstance(source, dict):
+        return source
+
+    file_path = Path(source)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
+    return _read_pickle(file_path)
+
+
+def iter_embeddings(
+    source: Union[str, Path, Dict[Any, Any]],
+    release: bool = False
+) -> Iterator[Tuple[Any, Any, Any, Any]]:
+    """
+    Itera sobre os embeddings sem materializar a matriz completa.
+    
+    Args:
+        source: Dicionário `síndrome -> sujeito -> imagem -> embedding` ou caminho do pickle
+        release: Se True, remove cada síndrome do dicionário após consumi-la
+        
+    Yields:
+        Tuplas (syndrome_id, subject_id, image_id, embedding)
+    """
+    return _walk_embeddings(_as_data(source), release=release)
+
+
+def iter_embedding_batches(
+    source: Union[str, Path, Dict[Any, Any]],
+    batch_size: int = 4096,
+    release: bool = False
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Itera sobre os embeddings em blocos float32 de tamanho fixo.
+    
+    Apenas um bloco de `batch_size` linhas é mantido em memória por vez.
+    
+    Args:
+        source: Dicionário aninhado ou caminho do pickle
+        batch_size: Número máximo de amostras por bloco
+        release: Se True, remove cada síndrome do dicionário após consumi-la
+        
+    Yields:
+        Tuplas (syndromes, subjects, images, X) com arrays de até `batch_size` linhas
+    """
+    data = _as_data(source)
+    n_features = None
+    meta: List[Tuple[Any, Any, Any]] = []
+    rows: List[Any] = []
+    
+    for syndrome_id, subject_id, image_id, embedding in _walk_embeddings(data, release=release):
+        if n_features is None:
+            n_features = len(embedding)
+        elif len(embedding) != n_features:
+            logger.warning(f"Embedding com {len(embedding)} features para imagem {image_id}, esperado {n_features}")
+            continue
+        meta.append((syndrome_id, subject_id, image_id))
+        rows.append(embedding)
+        if len(rows) == batch_size:
+            yield _make_batch(meta, rows)
+            meta, rows = [], []
+    
+    if rows:
+        yield _make_batch(meta, rows)
+
+
+def _make_batch(meta: List[Tuple[Any, Any, Any]], rows: List[Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    syndromes, subjects, images = (np.array(col) for col in zip(*meta))
+    return syndromes, subjects, images, np.asarray(rows, dtype=np.float32)
+
+
+def count_embeddings(data: Dict[Any, Any]) -> Tuple[int, int]:
+    """
+    Conta as amostras válidas sem copiar nenhum embedding.
+    
+    A dimensão é definida pelo primeiro embedding válido; embeddings com outra
+    dimensão são ignorados (com aviso), como na etapa de preenchimento.
+    
+    Args:
+        data: Dicionário `síndrome -> sujeito -> imagem -> embedding`
+        
+    Returns:
+        Tuple (n_samples, n_features)
+    """
+    n_samples, n_features = 0, None
+    for _, _, _, embedding in _walk_embeddings(data):
+        if n_features is None:
+            n_features = len(embedding)
+        elif len(embedding) != n_features:
+            logger.warning(f"Embedding com {len(embedding)} features ignorado, esperado {n_features}")
+            continue
+        n_samples += 1
+    return n_samples, n_features or 0
+
+
+def ingest_embeddings(
+    data: Dict[Any, Any],
+    release: bool = False,
+    out: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Converte o dicionário aninhado em uma única matriz float32 pré-alocada.
+    
+    As amostras são contadas primeiro e a matriz de formato exato é preenchida
+    no lugar, sem listas intermediárias de vetores. Com `release=True` cada
+    síndrome é removida do dicionário ao ser consumida, de modo que o pico de
+    memória fica próximo do tamanho da matriz final.
+    
+    Args:
+        data: Dicionário `síndrome -> sujeito -> imagem -> embedding`
+        release: Se True, libera as sub-estruturas já consumidas de `data`
+        out: Matriz de destino opcional (ex.: um `np.memmap`) com o formato exato,
+            obtido de `count_embeddings`
+        
+    Returns:
+        Tuple contendo:
+            - X: Embeddings float32 (n_samples, n_features)
+            - y: Labels das síndromes (n_samples,)
+            - subjects: Identificador do sujeito de cada amostra (n_samples,)
+            - images: Identificador da imagem de cada amostra (n_samples,)
+            
+    Raises:
+        ValueError: Se não houver dados válidos ou `out` tiver número de linhas incorreto
+    """
+    if out is None:
+        n_samples, n_features = count_embeddings(data)
+        if n_samples == 0:
+            raise ValueError("Nenhum dado válido encontrado no arquivo")
+        out = np.empty((n_samples, n_features), dtype=np.float32)
+    else:
+        n_samples, n_features = out.shape
+    
+    y: List[Any] = []
+    subjects: List[Any] = []
+    images: List[Any] = []
+    walker = _walk_embeddings(data, n_features=n_features, release=release, warn=False)
+    for i, (syndrome_id, subject_id, image_id, embedding) in enumerate(walker):
+        # Amostras além da capacidade de `out` só são contadas, para o erro abaixo
+        if i < n_samples:
+            out[i] = embedding
+        y.append(syndrome_id)
+        subjects.append(subject_id)
+        images.append(image_id)
+    
+    if len(y) != n_samples:
+        raise ValueError(f"Matriz de destino com {n_samples} linhas, encontradas {len(y)} amostras")
+    
+    return out, np.array(y), np.array(subjects), np.array(images)
+
+
+def load_data(
+    file_path: str,
+    use_store: bool = True,
+    return_groups: bool = False
+) -> Union[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray, np.ndarray]]:
     """
     Carrega os dados do arquivo pickle e os transforma em um formato adequado.
     
+    Quando existe um store mapeado em memória atualizado ao lado do pickle
+    (ver `convert_pickle_to_store`), os dados são lidos dele sem desserializar o pickle.
+    Caso contrário, o pickle é convertido por `ingest_embeddings` diretamente
+    em uma matriz float32 pré-alocada.
+    
     Args:
-        file_path: Caminho para o arquivo pickle contendo os dados
+        file_path: Caminho para o arquivo pickle contendo os dados (ou para um store)
+        use_store: Se True, usa o store de embeddings quando disponível
+        return_groups: Se True, retorna também o identificador do sujeito de cada amostra
         
     Returns:
         Tuple contendo:
             - X: Array numpy com os embeddings (n_samples, n_features)
             - y: Array numpy com os labels das síndromes (n_samples,)
+            - groups: Array com os sujeitos (n_samples,), apenas se `return_groups=True`
             
     Raises:
         FileNotFoundError: Se o arquivo não for encontrado
@@ -27,55 +240,74 @@ def load_data(file_path: str) -> Tuple[np.ndarray, np.ndarray]:
     """
     file_path = Path(file_path)
     
+    if use_store:
+        store_path = file_path if is_store(file_path) else default_store_path(file_path)
+        if store_path == file_path or store_is_current(store_path, file_path):
+            logger.info(f"Carregando dados do store: {store_path}")
+            store = open_store(store_path)
+            if return_groups:
+                return store.X, store.y, store.groups
+            return store.X, store.y
+    
     if not file_path.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
     
     try:
         logger.info(f"Carregando dados de: {file_path}")
         
-        with open(file_path, 'rb') as f:
-            data = pickle.load(f)
-        
-        if not isinstance(data, dict):
-            raise ValueError("Arquivo pickle deve conter um dicionário")
-        
-        X, y = [], []
-        total_samples = 0
-        
-        for syndrome_id, subjects in data.items():
-            if not isinstance(subjects, dict):
-                logger.warning(f"Formato inválido para síndrome {syndrome_id}")
-                continue
-                
-            for subject_id, images in subjects.items():
-                if not isinstance(images, dict):
-                    logger.warning(f"Formato inválido para sujeito {subject_id}")
-                    continue
-                    
-                for image_id, embedding in images.items():
-                    if isinstance(embedding, (list, np.ndarray)):
-                        X.append(embedding)
-                        y.append(syndrome_id)
-                        total_samples += 1
-                    else:
-                        logger.warning(f"Embedding inválido para imagem {image_id}")
-        
-        if total_samples == 0:
-            raise ValueError("Nenhum dado válido encontrado no arquivo")
-        
-        X_array = np.array(X)
-        y_array = np.array(y)
+        data = _read_pickle(file_path)
+        X_array, y_array, groups, _ = ingest_embeddings(data, release=True)
+        del data
         
         logger.info(f"Dados carregados com sucesso: {X_array.shape[0]} amostras, {X_array.shape[1]} features")
         logger.info(f"Número de classes únicas: {len(np.unique(y_array))}")
         
+        if return_groups:
+            return X_array, y_array, groups
         return X_array, y_array
         
     except Exception as e:
         logger.error(f"Erro ao carregar dados: {e}")
         raise
 
+
+def convert_pickle_to_store(
+    file_path: str,
+    store_path: Optional[Union[str, Path]] = None
+) -> Path:
+    """
+    Converte o pickle aninhado em um store colunar mapeado em memória.
+    
+    A matriz é preenchida diretamente no arquivo `.npy` de destino, sem cópia
+    intermediária em memória.
+    
+    Args:
+        file_path: Caminho para o arquivo pickle contendo os dados
+        store_path: Diretório de destino (padrão: `<arquivo>.store`)
+        
+    Returns:
+        Caminho do store gerado
+        
+    Raises:
+        FileNotFoundError: Se o arquivo não for encontrado
+        ValueError: Se o arquivo não contém dados válidos
+    """
+    file_path = Path(file_path)
+    store_path = Path(store_path or default_store_path(file_path))
+    
+    data = _as_data(file_path)
+    n_samples, n_features = count_embeddings(data)
+    
+    if n_samples == 0:
+        raise ValueError("Nenhum dado válido encontrado no arquivo")
+    
+    with StoreWriter(store_path, n_samples, n_features, source_path=file_path) as writer:
+        _, y, subjects, images = ingest_embeddings(data, release=True, out=writer.X)
+        writer.set_metadata(y, subjects, images)
+    
+    return store_path
+
 if __name__ == "__main__":
     file_path = "mini_gm_public_v0.1.p" 
     X, y = load_data(file_path)
-    print(f"Dados carregados: {X.shape[0]} amostras, {X.shape[1]} features")
\ No newline at end of file
+    print(f"Dados carregados: {X.shape[0]} amostras, {X.shape[1]} features")
@@ -0,0 +1,284 @@
+"""
+Armazenamento colunar e mapeado em memória dos embeddings.
+
+Um store é um diretório com uma matriz float32 contígua (`embeddings.npy`) e
+arrays compactos de labels, sujeitos e imagens. A matriz é aberta com
+`np.memmap`, então a abertura é praticamente instantânea e vários processos
+compartilham as mesmas páginas do cache do sistema operacional.
+"""
+
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+from loguru import logger
+
+STORE_FORMAT_VERSION = 1
+STORE_SUFFIX = ".store"
+MANIFEST_FILE = "manifest.json"
+
+
+@dataclass
+class EmbeddingStore:
+    """
+    Conteúdo de um store de embeddings.
+
+    Attributes:
+        X: Matriz de embeddings float32 mapeada em memória (n_samples, n_features)
+        labels: Código da síndrome de cada amostra (n_samples,)
+        syndromes: Vocabulário de síndromes indexado por `labels`
+        subjects: Código do sujeito de cada amostra (n_samples,)
+        subject_ids: Vocabulário de sujeitos indexado por `subjects`
+        image_ids: Identificador da imagem de cada amostra (n_samples,)
+        path: Diretório do store
+    """
+
+    X: np.ndarray
+    labels: np.ndarray
+    syndromes: np.ndarray
+    subjects: np.ndarray
+    subject_ids: np.ndarray
+    image_ids: np.ndarray
+    path: Path
+
+    @property
+    def y(self) -> np.ndarray:
+        """Labels originais das síndromes (n_samples,)."""
+        return self.syndromes[self.labels]
+
+    @property
+    def groups(self) -> np.ndarray:
+        """Identificador original do sujeito de cada amostra (n_samples,)."""
+        return self.subject_ids[self.subjects]
+
+
+def default_store_path(source_path: Union[str, Path]) -> Path:
+    """Retorna o caminho padrão do store associado a um arquivo pickle."""
+    return Path(source_path).with_suffix(STORE_SUFFIX)
+
+
+def is_store(path: Union[str, Path]) -> bool:
+    """Indica se o caminho é um diretório de store válido."""
+    return (Path(path) / MANIFEST_FILE).is_file()
+
+
+def _source_fingerprint(source_path: Path) -> Dict[str, Any]:
+    stat = source_path.stat()
+    return {"name": source_path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _compact_ids(values: np.ndarray) -> np.ndarray:
+    """Garante um dtype fixo (sem objetos) para salvar sem pickle."""
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = values.astype(str)
+    return values
+
+
+def read_manifest(store_path: Union[str, Path]) -> Dict[str, Any]:
+    """Lê o manifesto de um store."""
+    with open(Path(store_path) / MANIFEST_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def store_fingerprint(X: np.ndarray) -> Optional[Dict[str, Any]]:
+    """
+    Identifica o conteúdo de uma matriz aberta de um store sem lê-la.
+
+    O manifesto registra a versão do formato, a forma da matriz e a impressão
+    digital do pickle de origem, e é regravado sempre que o store é gerado de
+    novo, então serve de chave para o conteúdo do store inteiro.
+
+    Args:
+        X: Matriz de embeddings, possivelmente vinda de `open_store`
+
+    Returns:
+        O manifesto do store, ou None se `X` não é a matriz completa de um
+        store ou se o store não registra o arquivo de origem
+    """
+    filename = getattr(X, "filename", None)
+    if not isinstance(X, np.memmap) or filename is None or not X.flags.c_contiguous:
+        return None
+    store_path = Path(filename).parent
+    if not is_store(store_path):
+        return None
+    manifest = read_manifest(store_path)
+    if manifest.get("source") is None:
+        return None
+    if X.shape != (manifest.get("n_samples"), manifest.get("n_features")):
+        return None
+    return manifest
+
+
+def store_is_current(store_path: Union[str, Path], source_path: Union[str, Path]) -> bool:
+    """
+    Verifica se o store foi gerado a partir da versão atual do arquivo fonte.
+
+    Args:
+        store_path: Diretório do store
+        source_path: Arquivo pickle de origem
+
+    Returns:
+        True se o store existe, tem versão compatível e o fonte não mudou
+    """
+    store_path, source_path = Path(store_path), Path(source_path)
+    if not is_store(store_path):
+        return False
+    manifest = read_manifest(store_path)
+    if manifest.get("format_version") != STORE_FORMAT_VERSION:
+        return False
+    if not source_path.exists():
+        return True
+    return manifest.get("source") == _source_fingerprint(source_path)
+
+
+class StoreWriter:
+    """
+    Grava um store de embeddings de forma atômica, preenchendo a matriz no disco.
+
+    A matriz `X` é alocada diretamente como `.npy` mapeado em memória, de modo
+    que quem escreve pode preenchê-la linha a linha sem manter uma cópia em RAM.
+    O store só substitui o destino quando o bloco `with` termina sem erros.
+
+    Exemplo:
+        >>> with StoreWriter(path, n_samples, n_features) as writer:
+        ...     writer.X[:] = X
+        ...     writer.set_metadata(y, subjects, image_ids)
+    """
+
+    def __init__(
+        self,
+        store_path: Union[str, Path],
+        n_samples: int,
+        n_features: int,
+        source_path: Optional[Union[str, Path]] = None,
+    ) -> None:
+        self.store_path = Path(store_path)
+        self.tmp_path = self.store_path.with_name(self.store_path.name + ".tmp")
+        self.shape = (int(n_samples), int(n_features))
+        self.source_path = Path(source_path) if source_path else None
+        self.X: Optional[np.memmap] = None
+        self._has_metadata = False
+
+    def __enter__(self) -> "StoreWriter":
+        if self.tmp_path.exists():
+            shutil.rmtree(self.tmp_path)
+        self.tmp_path.mkdir(parents=True)
+        self.X = np.lib.format.open_memmap(
+            self.tmp_path / "embeddings.npy", mode="w+", dtype=np.float32, shape=self.shape
+        )
+        return self
+
+    def set_metadata(self, y: np.ndarray, subjects: np.ndarray, image_ids: np.ndarray) -> None:
+        """
+        Grava os arrays de labels, sujeitos e imagens.
+
+        Args:
+            y: Labels das síndromes (n_samples,)
+            subjects: Identificador do sujeito de cada amostra (n_samples,)
+            image_ids: Identificador da imagem de cada amostra (n_samples,)
+        """
+        syndromes, labels = np.unique(_compact_ids(y), return_inverse=True)
+        subject_ids, subject_codes = np.unique(_compact_ids(subjects), return_inverse=True)
+
+        np.save(self.tmp_path / "labels.npy", labels.astype(np.int32))
+        np.save(self.tmp_path / "syndromes.npy", syndromes)
+        np.save(self.tmp_path / "subjects.npy", subject_codes.astype(np.int32))
+        np.save(self.tmp_path / "subject_ids.npy", subject_ids)
+        np.save(self.tmp_path / "image_ids.npy", _compact_ids(image_ids))
+        self._has_metadata = True
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if self.X is not None:
+            self.X.flush()
+            del self.X
+            self.X = None
+
+        if exc_type is not None or not self._has_metadata:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+            if exc_type is None:
+                raise ValueError("Metadados do store não foram gravados")
+            return
+
+        manifest = {
+            "format_version": STORE_FORMAT_VERSION,
+            "n_samples": self.shape[0],
+            "n_features": self.shape[1],
+            "dtype": "float32",
+            "source": _source_fingerprint(self.source_path) if self.source_path else None,
+        }
+        with open(self.tmp_path / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        if self.store_path.exists():
+            shutil.rmtree(self.store_path)
+        os.replace(self.tmp_path, self.store_path)
+
+        logger.info(
+            f"Store gravado em {self.store_path}: {self.shape[0]} amostras, {self.shape[1]} features"
+        )
+
+
+def write_store(
+    store_path: Union[str, Path],
+    X: np.ndarray,
+    y: np.ndarray,
+    subjects: np.ndarray,
+    image_ids: np.ndarray,
+    source_path: Optional[Union[str, Path]] = None,
+) -> Path:
+    """
+    Grava um store de embeddings a partir de arrays já carregados.
+
+    Args:
+        store_path: Diretório de destino
+        X: Embeddings (n_samples, n_features)
+        y: Labels das síndromes (n_samples,)
+        subjects: Identificador do sujeito de cada amostra (n_samples,)
+        image_ids: Identificador da imagem de cada amostra (n_samples,)
+        source_path: Arquivo de origem, registrado para detecção de mudanças
+
+    Returns:
+        Caminho do store gravado
+    """
+    with StoreWriter(store_path, X.shape[0], X.shape[1], source_path) as writer:
+        writer.X[:] = X
+        writer.set_metadata(y, subjects, image_ids)
+    return Path(store_path)
+
+
+def open_store(store_path: Union[str, Path]) -> EmbeddingStore:
+    """
+    Abre um store com a matriz de embeddings mapeada em memória.
+
+    Args:
+        store_path: Diretório do store
+
+    Returns:
+        EmbeddingStore com `X` somente leitura via `np.memmap`
+
+    Raises:
+        FileNotFoundError: Se o diretório não for um store
+        ValueError: Se a versão do formato não for suportada
+    """
+    store_path = Path(store_path)
+    if not is_store(store_path):
+        raise FileNotFoundError(f"Store não encontrado: {store_path}")
+
+    manifest = read_manifest(store_path)
+    if manifest.get("format_version") != STORE_FORMAT_VERSION:
+        raise ValueError(f"Versão de store não suportada: {manifest.get('format_version')}")
+
+    return EmbeddingStore(
+        X=np.load(store_path / "embeddings.npy", mmap_mode="r"),
+        labels=np.load(store_path / "labels.npy"),
+        syndromes=np.load(store_path / "syndromes.npy"),
+        subjects=np.load(store_path / "subjects.npy"),
+        subject_ids=np.load(store_path / "subject_ids.npy"),
+        image_ids=np.load(store_path / "image_ids.npy"),
+        path=store_path,
+    )
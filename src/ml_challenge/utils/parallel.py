@@ -0,0 +1,150 @@
+"""
+Execução paralela de unidades de trabalho com arrays em memória compartilhada.
+
+Os arrays grandes (ex.: a matriz de embeddings) são colocados uma única vez em
+memória compartilhada — ou reabertos do mesmo arquivo quando já são um
+`np.memmap` — e cada processo do pool apenas se conecta a eles, em vez de
+receber uma cópia serializada a cada tarefa.
+"""
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Arrays compartilhados visíveis dentro de cada processo do pool
+_SHARED: Dict[str, np.ndarray] = {}
+_HANDLES: List[Any] = []
+
+ArraySpec = Tuple[Any, ...]
+
+
+def resolve_n_jobs(n_jobs: Optional[int]) -> int:
+    """
+    Converte `n_jobs` no número efetivo de processos.
+
+    Args:
+        n_jobs: Número de processos; -1 usa todos os núcleos, None ou 1 executa em série
+
+    Returns:
+        Número de processos (>= 1)
+    """
+    cpu_count = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpu_count + 1 + n_jobs)
+    return n_jobs
+
+
+class SharedArrays:
+    """
+    Publica um conjunto de arrays para os processos do pool.
+
+    Deve ser usado como context manager: os segmentos de memória compartilhada
+    são liberados ao sair do bloco.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.arrays = arrays
+        self.specs: Dict[str, ArraySpec] = {}
+        self._segments: List[shared_memory.SharedMemory] = []
+
+    def __enter__(self) -> "SharedArrays":
+        for name, array in self.arrays.items():
+            if isinstance(array, np.memmap) and isinstance(array.base, mmap.mmap) and array.filename:
+                # Já está em disco: os processos reabrem o mesmo arquivo e compartilham as páginas
+                self.specs[name] = ("memmap", array.filename, array.offset, array.shape, array.dtype.str)
+                continue
+
+            array = np.ascontiguousarray(array)
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+            self._segments.append(segment)
+            self.specs[name] = ("shm", segment.name, array.shape, array.dtype.str)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    """Abre um segmento existente sem registrá-lo no resource tracker."""
+    # O processo principal é o dono do segmento; o worker não deve removê-lo ao sair
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        # Python < 3.13 não aceita `track` e registra toda conexão no tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None  # type: ignore[assignment]
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register  # type: ignore[assignment]
+
+
+def _attach(spec: ArraySpec) -> np.ndarray:
+    """Conecta-se a um array publicado por `SharedArrays`."""
+    if spec[0] == "memmap":
+        _, filename, offset, shape, dtype = spec
+        return np.memmap(filename, dtype=np.dtype(dtype), mode="r", offset=offset, shape=shape)
+
+    _, name, shape, dtype = spec
+    segment = _open_segment(name)
+    _HANDLES.append(segment)
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+    array.flags.writeable = False
+    return array
+
+
+def _init_worker(specs: Dict[str, ArraySpec]) -> None:
+    from threadpoolctl import threadpool_limits
+
+    # Um thread de BLAS por processo evita disputa entre os workers
+    _HANDLES.append(threadpool_limits(limits=1))
+    for name, spec in specs.items():
+        _SHARED[name] = _attach(spec)
+
+
+def _run_task(func: Callable[..., Any], task: Sequence[Any]) -> Any:
+    return func(_SHARED, *task)
+
+
+def run_tasks(
+    func: Callable[..., Any],
+    tasks: Iterable[Sequence[Any]],
+    shared: Dict[str, np.ndarray],
+    n_jobs: Optional[int] = 1,
+) -> List[Any]:
+    """
+    Executa `func(shared, *task)` para cada tarefa, em série ou em um pool de processos.
+
+    `func` deve ser uma função de módulo (serializável) e recebe como primeiro
+    argumento o dicionário de arrays compartilhados. Os resultados seguem a
+    ordem das tarefas.
+
+    Args:
+        func: Função executada para cada tarefa
+        tasks: Argumentos adicionais de cada tarefa
+        shared: Arrays compartilhados entre todas as tarefas
+        n_jobs: Número de processos (-1 usa todos os núcleos)
+
+    Returns:
+        Lista com o resultado de cada tarefa
+    """
+    tasks = list(tasks)
+    n_workers = min(resolve_n_jobs(n_jobs), len(tasks))
+    if n_workers <= 1:
+        return [func(shared, *task) for task in tasks]
+
+    with SharedArrays(shared) as published:
+        with ProcessPoolExecutor(
+            max_workers=n_workers, initializer=_init_worker, initargs=(published.specs,)
+        ) as executor:
+            return list(executor.map(_run_task, [func] * len(tasks), tasks))
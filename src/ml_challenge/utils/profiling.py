@@ -0,0 +1,220 @@
+"""
+Instrumentação de tempo e memória por etapa do pipeline.
+
+`profile_stage` (context manager ou decorador) mede o tempo de relógio, o tempo
+de CPU (do processo e dos processos filhos já finalizados, como os workers do
+pool), o pico de memória residente e o número de amostras de uma etapa, e
+emite as medidas como JSON estruturado pelo loguru. Opcionalmente grava um
+perfil do `cProfile` e/ou um snapshot do `tracemalloc` da etapa.
+"""
+
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import ContextDecorator
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from loguru import logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+DEFAULT_PROFILE_DIR = Path("results/profiles")
+
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def _reset_peak_rss() -> bool:
+    """Zera o pico de RSS do processo (Linux); retorna False se não for possível."""
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo em MB (None se indisponível)."""
+    try:
+        for line in _PROC_STATUS.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # `ru_maxrss` é dado em KB no Linux e em bytes no macOS
+    scale = 2 ** 20 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _children_cpu_s() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class profile_stage(ContextDecorator):
+    """
+    Mede uma etapa do pipeline e registra o resultado em JSON.
+
+    Pode ser usado como context manager (o número de amostras pode ser
+    definido dentro do bloco em `n_samples`) ou como decorador.
+
+    Exemplo:
+        with profile_stage("load_data") as stage:
+            X, y = load_data(file_path)
+            stage.n_samples = len(y)
+
+    Args:
+        stage: Nome da etapa
+        n_samples: Número de amostras processadas (opcional)
+        cprofile: Se True, grava `<output_dir>/<stage>.prof` com o `cProfile`
+        trace_memory: Se True, grava `<output_dir>/<stage>.tracemalloc` e o pico
+            de memória alocada pelo Python
+        output_dir: Diretório dos perfis gravados
+        records: Lista onde cada registro é anexado (opcional)
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        n_samples: Optional[int] = None,
+        cprofile: bool = False,
+        trace_memory: bool = False,
+        output_dir: Union[str, Path] = DEFAULT_PROFILE_DIR,
+        records: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        self.stage = stage
+        self.n_samples = n_samples
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.output_dir = Path(output_dir)
+        self.records = records
+        self.record: Dict[str, Any] = {}
+
+    def __enter__(self) -> "profile_stage":
+        self._stage_peak = _reset_peak_rss()
+        self._profiler = None
+        self._started_tracing = False
+        if self.trace_memory:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            if hasattr(tracemalloc, "reset_peak"):  # Python >= 3.9
+                tracemalloc.reset_peak()
+        if self.cprofile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._children_cpu = _children_cpu_s()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        wall_s = time.perf_counter() - self._wall
+        cpu_s = time.process_time() - self._cpu
+        children_cpu_s = _children_cpu_s() - self._children_cpu
+        if self._profiler is not None:
+            self._profiler.disable()
+
+        peak = peak_rss_mb()
+        record: Dict[str, Any] = {
+            "stage": self.stage,
+            "status": "error" if exc_type is not None else "ok",
+            "wall_s": round(wall_s, 6),
+            "cpu_s": round(cpu_s, 6),
+            "children_cpu_s": round(children_cpu_s, 6),
+            "peak_rss_mb": None if peak is None else round(peak, 1),
+            # Sem como zerar o pico, o valor é o do processo inteiro até aqui
+            "peak_rss_scope": "stage" if self._stage_peak else "process",
+            "n_samples": self.n_samples,
+        }
+        if self.n_samples:
+            record["samples_per_s"] = round(self.n_samples / wall_s, 1) if wall_s > 0 else None
+
+        if self._profiler is not None or self.trace_memory:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self._profiler is not None:
+            path = self.output_dir / f"{self.stage}.prof"
+            self._profiler.dump_stats(path)
+            record["cprofile"] = str(path)
+        if self.trace_memory:
+            path = self.output_dir / f"{self.stage}.tracemalloc"
+            tracemalloc.take_snapshot().dump(str(path))
+            record["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+            record["tracemalloc"] = str(path)
+            if self._started_tracing:
+                tracemalloc.stop()
+
+        self.record = record
+        if self.records is not None:
+            self.records.append(record)
+        logger.bind(stage_metrics=record).info(f"stage_metrics {json.dumps(record)}")
+
+
+class StageProfiler:
+    """
+    Cria `profile_stage` para as etapas do pipeline e acumula os registros.
+
+    Args:
+        enabled: Se False, `stage` não mede nada
+        cprofile_stages: Etapas que gravam um perfil do `cProfile`
+        trace_memory_stages: Etapas que gravam um snapshot do `tracemalloc`
+        output_dir: Diretório dos perfis e do resumo em JSON
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        cprofile_stages: Iterable[str] = (),
+        trace_memory_stages: Iterable[str] = (),
+        output_dir: Union[str, Path] = DEFAULT_PROFILE_DIR,
+    ) -> None:
+        self.enabled = enabled
+        self.cprofile_stages = set(cprofile_stages or ())
+        self.trace_memory_stages = set(trace_memory_stages or ())
+        self.output_dir = Path(output_dir)
+        self.records: List[Dict[str, Any]] = []
+
+    def stage(self, name: str, n_samples: Optional[int] = None) -> Any:
+        """Context manager que mede a etapa `name`."""
+        if not self.enabled:
+            return _NullStage(n_samples)
+        return profile_stage(
+            name, n_samples,
+            cprofile=name in self.cprofile_stages,
+            trace_memory=name in self.trace_memory_stages,
+            output_dir=self.output_dir,
+            records=self.records,
+        )
+
+    def save(self, path: Optional[Union[str, Path]] = None) -> Path:
+        """Grava os registros acumulados em JSON (padrão: `<output_dir>/stages.json`)."""
+        path = Path(path) if path is not None else self.output_dir / "stages.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f, indent=2)
+        return path
+
+
+class _NullStage:
+    """Substituto de `profile_stage` quando a instrumentação está desativada."""
+
+    def __init__(self, n_samples: Optional[int] = None) -> None:
+        self.n_samples = n_samples
+        self.record: Dict[str, Any] = {}
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        return None
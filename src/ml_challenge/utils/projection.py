@@ -0,0 +1,165 @@
+"""
+Etapa de projeção 2D (t-SNE) com pré-redução por PCA, subamostragem e cache.
+
+O t-SNE é a etapa mais cara da visualização. Aqui ele roda, opcionalmente,
+sobre os componentes principais dos embeddings e sobre uma subamostra
+estratificada por síndrome; as amostras restantes são posicionadas depois pela
+média das coordenadas dos seus vizinhos mais próximos na subamostra. O layout
+final pode ficar no cache de etapas (`StageCache`), indexado pelo hash dos
+dados e dos parâmetros, e execuções repetidas apenas o leem do disco.
+"""
+
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from ..models.distance import blocked_kneighbors
+from .cache import StageCache, hash_arrays
+
+
+def stratified_subsample(
+    y: np.ndarray, max_samples: int, random_state: int = 42
+) -> np.ndarray:
+    """
+    Seleciona até `max_samples` índices preservando a proporção de cada classe.
+
+    Cada classe mantém pelo menos uma amostra, de modo que síndromes raras
+    continuam presentes no layout; as amostras garantidas às classes pequenas
+    saem das maiores, e o total nunca passa de `max_samples`. Se houver mais
+    classes que `max_samples`, são sorteadas as classes representadas.
+
+    Args:
+        y: Labels das síndromes (n_samples,)
+        max_samples: Número máximo de amostras selecionadas
+        random_state: Semente do sorteio
+
+    Returns:
+        Índices selecionados, em ordem crescente
+    """
+    y = np.asarray(y)
+    if max_samples >= len(y):
+        return np.arange(len(y))
+
+    rng = np.random.default_rng(random_state)
+    classes, codes, counts = np.unique(y, return_inverse=True, return_counts=True)
+    quotas = np.maximum(1, np.floor(counts * max_samples / len(y))).astype(int)
+    excess = int(quotas.sum()) - max_samples
+    if len(classes) > max_samples:
+        quotas = np.zeros_like(quotas)
+        quotas[rng.choice(len(classes), size=max_samples, replace=False)] = 1
+    else:
+        # O mínimo de uma amostra por classe é descontado das maiores cotas
+        for _ in range(max(0, excess)):
+            quotas[np.argmax(quotas)] -= 1
+
+    selected = [
+        rng.choice(np.flatnonzero(codes == c), size=min(quota, count), replace=False)
+        for c, (quota, count) in enumerate(zip(quotas, counts))
+    ]
+    return np.sort(np.concatenate(selected))
+
+
+def place_out_of_sample(
+    X_fitted: np.ndarray,
+    layout: np.ndarray,
+    X_new: np.ndarray,
+    n_neighbors: int = 10,
+) -> np.ndarray:
+    """
+    Posiciona novas amostras em um layout 2D já calculado.
+
+    Cada amostra recebe a média das coordenadas dos seus `n_neighbors` vizinhos
+    mais próximos (no espaço de entrada do t-SNE), ponderada pelo inverso da
+    distância.
+
+    Args:
+        X_fitted: Amostras usadas no ajuste do t-SNE (n_fitted, n_features)
+        layout: Coordenadas 2D dessas amostras (n_fitted, 2)
+        X_new: Amostras a posicionar (n_new, n_features)
+        n_neighbors: Número de vizinhos usados na média
+
+    Returns:
+        Coordenadas 2D das novas amostras (n_new, 2)
+    """
+    n_neighbors = min(n_neighbors, X_fitted.shape[0])
+    distances, indices = blocked_kneighbors(X_new, X_fitted, n_neighbors, "euclidean")
+    weights = 1.0 / np.maximum(distances, 1e-6)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return np.einsum("ij,ijk->ik", weights, layout[indices]).astype(np.float32)
+
+
+def _make_tsne(random_state: int, **tsne_params: Any) -> Any:
+    from sklearn.manifold import TSNE
+
+    # `n_iter` foi renomeado para `max_iter` no scikit-learn 1.5
+    params = TSNE().get_params()
+    if "n_iter" in tsne_params and "n_iter" not in params:
+        tsne_params["max_iter"] = tsne_params.pop("n_iter")
+    elif "max_iter" in tsne_params and "max_iter" not in params:
+        tsne_params["n_iter"] = tsne_params.pop("max_iter")
+    return TSNE(n_components=2, random_state=random_state, **tsne_params)
+
+
+def compute_tsne_layout(
+    X: np.ndarray,
+    y: np.ndarray,
+    pca_components: Optional[int] = 50,
+    max_samples: Optional[int] = None,
+    n_neighbors: int = 10,
+    random_state: int = 42,
+    cache: Optional[StageCache] = None,
+    **tsne_params: Any,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula (ou recupera do cache) o layout 2D do t-SNE para todos os embeddings.
+
+    Args:
+        X: Embeddings (n_samples, n_features)
+        y: Labels das síndromes, usados na subamostragem estratificada
+        pca_components: Dimensões mantidas pelo PCA antes do t-SNE (None desativa)
+        max_samples: Máximo de amostras ajustadas pelo t-SNE (None usa todas)
+        n_neighbors: Vizinhos usados para posicionar as amostras fora da subamostra
+        random_state: Semente do PCA, da subamostragem e do t-SNE
+        cache: Cache das etapas do pipeline (None desativa o cache)
+        **tsne_params: Parâmetros adicionais do `TSNE` (ex.: perplexity, n_iter)
+
+    Returns:
+        Tuple contendo:
+            - embedding: Coordenadas 2D de cada amostra (n_samples, 2)
+            - fitted: Máscara das amostras ajustadas diretamente pelo t-SNE
+    """
+    y = np.asarray(y)
+    if cache is not None:
+        key = hash_arrays(
+            X, y, pca_components=pca_components, max_samples=max_samples,
+            n_neighbors=n_neighbors, random_state=random_state, **tsne_params,
+        )
+        layout = cache.fetch("tsne", key, lambda: dict(zip(
+            ("embedding", "fitted"),
+            compute_tsne_layout(X, y, pca_components, max_samples, n_neighbors, random_state, **tsne_params),
+        )))
+        return layout["embedding"], layout["fitted"]
+
+    fitted = np.zeros(len(y), dtype=bool)
+    fitted[stratified_subsample(y, max_samples or len(y), random_state)] = True
+
+    features = np.asarray(X, dtype=np.float32)
+    if pca_components and pca_components < min(features.shape[1], fitted.sum()):
+        from sklearn.decomposition import PCA
+
+        pca = PCA(n_components=pca_components, random_state=random_state).fit(features[fitted])
+        features = pca.transform(features).astype(np.float32)
+        logger.info(
+            f"PCA: {X.shape[1]} -> {pca_components} dimensões "
+            f"({pca.explained_variance_ratio_.sum():.1%} da variância)"
+        )
+
+    logger.info(f"Ajustando t-SNE em {fitted.sum()} de {len(y)} amostras")
+    embedding = np.empty((len(y), 2), dtype=np.float32)
+    embedding[fitted] = _make_tsne(random_state, **tsne_params).fit_transform(features[fitted])
+    if not fitted.all():
+        embedding[~fitted] = place_out_of_sample(
+            features[fitted], embedding[fitted], features[~fitted], n_neighbors
+        )
+    return embedding, fitted
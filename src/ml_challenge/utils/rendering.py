@@ -0,0 +1,156 @@
+"""
+Renderização de gráficos em arquivos, sem interface gráfica e sem bloquear o pipeline.
+
+As figuras são montadas com a API orientada a objetos do Matplotlib
+(`Figure` + canvas Agg), sem passar pelo `pyplot`: nenhum backend interativo é
+carregado e cada figura é independente, o que permite desenhá-las em uma
+thread de fundo enquanto as etapas de cálculo continuam.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from loguru import logger
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+DEFAULT_PLOTS_DIR = Path("results/plots")
+DEFAULT_MAX_POINTS = 200_000
+RASTERIZE_THRESHOLD = 5_000
+
+DrawFunc = Callable[..., None]
+
+
+def decimate(
+    n_points: int,
+    max_points: Optional[int] = DEFAULT_MAX_POINTS,
+    labels: Optional[np.ndarray] = None,
+    random_state: int = 42,
+) -> np.ndarray:
+    """
+    Escolhe os pontos desenhados em um scatter com até `max_points` pontos.
+
+    Com `labels`, a amostra é estratificada e toda classe continua visível.
+
+    Args:
+        n_points: Número total de pontos
+        max_points: Máximo de pontos desenhados (None desenha todos)
+        labels: Classe de cada ponto (n_points,)
+        random_state: Semente do sorteio
+
+    Returns:
+        Índices dos pontos desenhados, em ordem crescente
+    """
+    if max_points is None or n_points <= max_points:
+        return np.arange(n_points)
+    if labels is not None:
+        from .projection import stratified_subsample
+
+        return stratified_subsample(labels, max_points, random_state)
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(n_points, size=max_points, replace=False))
+
+
+def scatter_style(n_points: int) -> dict:
+    """Parâmetros de `scatter` para nuvens grandes: pontos menores e rasterizados."""
+    if n_points <= RASTERIZE_THRESHOLD:
+        return {}
+    # Rasterizar evita um SVG/PDF com um elemento vetorial por ponto
+    return {"s": max(1.0, 20.0 * RASTERIZE_THRESHOLD / n_points), "linewidths": 0, "rasterized": True}
+
+
+class PlotRenderer:
+    """
+    Desenha figuras e as salva em `output_dir` em cada um dos `formats`.
+
+    Com `background=True`, as figuras são desenhadas em uma thread de fundo:
+    `submit` retorna imediatamente e `wait`/`close` aguardam as pendentes.
+    Pode ser usado como context manager.
+
+    Attributes:
+        output_dir: Diretório dos arquivos gerados
+        formats: Extensões geradas para cada figura (ex.: 'png', 'svg')
+        dpi: Resolução dos formatos rasterizados
+    """
+
+    def __init__(
+        self,
+        output_dir: Union[str, Path] = DEFAULT_PLOTS_DIR,
+        formats: Sequence[str] = ("png",),
+        dpi: int = 150,
+        background: bool = True,
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.formats = tuple(formats)
+        self.dpi = dpi
+        self._executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self._pending: List[Future] = []
+
+    def render(
+        self, name: str, draw: DrawFunc, *args: Any, figsize: Tuple[float, float] = (10, 8), **kwargs: Any
+    ) -> List[Path]:
+        """
+        Desenha uma figura com `draw(fig, *args, **kwargs)` e a salva.
+
+        Args:
+            name: Nome base dos arquivos
+            draw: Função que preenche a `Figure` recebida
+            figsize: Tamanho da figura em polegadas
+
+        Returns:
+            Caminhos dos arquivos gerados
+        """
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        draw(fig, *args, **kwargs)
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for fmt in self.formats:
+            path = self.output_dir / f"{name}.{fmt}"
+            fig.savefig(path, dpi=self.dpi, bbox_inches="tight")
+            paths.append(path)
+        logger.info(f"Gráfico salvo: {', '.join(str(path) for path in paths)}")
+        return paths
+
+    def submit(self, name: str, draw: DrawFunc, *args: Any, **kwargs: Any) -> "Future[List[Path]]":
+        """Agenda `render` (na thread de fundo, se houver) e retorna seu `Future`."""
+        if self._executor is not None:
+            future = self._executor.submit(self.render, name, draw, *args, **kwargs)
+        else:
+            future = Future()
+            try:
+                future.set_result(self.render(name, draw, *args, **kwargs))
+            except Exception as exc:
+                future.set_exception(exc)
+        self._pending.append(future)
+        return future
+
+    def wait(self) -> List[Path]:
+        """
+        Aguarda todas as figuras agendadas.
+
+        Returns:
+            Caminhos de todos os arquivos gerados
+
+        Raises:
+            Exception: O primeiro erro ocorrido ao desenhar uma figura
+        """
+        pending, self._pending = self._pending, []
+        return [path for future in pending for path in future.result()]
+
+    def close(self) -> List[Path]:
+        """Aguarda as figuras pendentes e encerra a thread de fundo."""
+        try:
+            return self.wait()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+
+    def __enter__(self) -> "PlotRenderer":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.close()
@@ -1,25 +1,41 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.manifold import TSNE
 from sklearn.preprocessing import LabelEncoder
 from .data_processing import load_data
+from .projection import compute_tsne_layout
+from .rendering import DEFAULT_MAX_POINTS, PlotRenderer, decimate, scatter_style
 
-def plot_tsne(X, y):
-    """Reduz a dimensionalidade dos embeddings para 2D usando t-SNE e plota o gráfico."""
-    tsne = TSNE(n_components=2, random_state=42)
-    X_embedded = tsne.fit_transform(X)
+def draw_tsne(fig, embedding, y, max_points=DEFAULT_MAX_POINTS):
+    """Desenha o layout t-SNE em `fig`.
 
+    Nuvens com mais de `max_points` pontos são subamostradas por síndrome, e
+    nuvens grandes são rasterizadas para manter o arquivo leve.
+    """
     # Converter syndrome_id para valores numéricos
     label_encoder = LabelEncoder()
     y_numeric = label_encoder.fit_transform(y)
 
-    plt.figure(figsize=(10, 8))
-    scatter = plt.scatter(X_embedded[:, 0], X_embedded[:, 1], c=y_numeric, cmap='tab10', alpha=0.6)
-    plt.colorbar(scatter, label='Syndrome ID')
-    plt.title('Visualização dos Embeddings com t-SNE')
-    plt.xlabel('Componente 1')
-    plt.ylabel('Componente 2')
-    plt.show()
+    idx = decimate(len(y_numeric), max_points, labels=y_numeric)
+    ax = fig.add_subplot()
+    scatter = ax.scatter(embedding[idx, 0], embedding[idx, 1], c=y_numeric[idx], cmap='tab10', alpha=0.6,
+                         **scatter_style(len(idx)))
+    fig.colorbar(scatter, ax=ax, label='Syndrome ID')
+    ax.set_title('Visualização dos Embeddings com t-SNE')
+    ax.set_xlabel('Componente 1')
+    ax.set_ylabel('Componente 2')
+
+def plot_tsne(X, y, embedding=None, renderer=None, max_points=DEFAULT_MAX_POINTS, **layout_params):
+    """Gera o gráfico t-SNE dos embeddings em `results/plots/tsne.*`.
+
+    Se `embedding` não for informado, o layout é obtido de `compute_tsne_layout`;
+    `layout_params` são repassados a ela. Com um `PlotRenderer` em segundo plano
+    a figura é salva sem bloquear o chamador.
+    """
+    if embedding is None:
+        embedding, _ = compute_tsne_layout(X, y, **layout_params)
+
+    renderer = renderer or PlotRenderer(background=False)
+    renderer.submit('tsne', draw_tsne, embedding, np.asarray(y), max_points=max_points)
+    return embedding
 
 if __name__ == "__main__":
     file_path = "mini_gm_public_v0.1.p"
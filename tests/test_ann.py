@@ -0,0 +1,78 @@
+"""
+Testes unitários para o índice aproximado de vizinhos (IVF/PQ).
+"""
+
+import pytest
+import numpy as np
+
+from src.ml_challenge.models.ann import IVFIndex, benchmark_ann, kmeans
+from src.ml_challenge.models.classification import evaluate_knn
+from src.ml_challenge.models.neighbors import kneighbors_table
+from tests.test_classification import make_blobs_data
+
+
+class TestIVFIndex:
+    """Testes para o índice IVF e a quantização por produto."""
+
+    @pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+    def test_full_probe_is_exact(self, metric):
+        """Examinando todas as células o resultado deve ser igual ao exato."""
+        X, _ = make_blobs_data()
+        index = IVFIndex(n_lists=8, n_probe=8, metric=metric).fit(X[:100])
+        distances, indices = index.search(X[100:], 5)
+        expected_dist, expected_ind = kneighbors_table(X[:100], X[100:], 5, metric)
+
+        np.testing.assert_array_equal(indices, expected_ind)
+        np.testing.assert_allclose(distances, expected_dist, rtol=1e-4, atol=1e-5)
+
+    def test_small_probe_returns_enough_candidates(self):
+        """Com células pequenas, a busca deve ampliar as células até ter K candidatos."""
+        X, _ = make_blobs_data()
+        index = IVFIndex(n_lists=40, n_probe=1).fit(X[:100])
+        _, indices = index.search(X[100:], 10)
+
+        assert indices.shape == (20, 10)
+        assert (indices >= 0).all()
+        assert all(len(set(row)) == 10 for row in indices)
+
+    def test_product_quantization(self):
+        """O IVF-PQ deve recuperar boa parte dos vizinhos exatos."""
+        X, _ = make_blobs_data(n_per_class=60)
+        index = IVFIndex(n_lists=4, n_probe=4, pq_subspaces=4, pq_bits=4).fit(X[:200])
+        _, approx = index.search(X[200:], 5)
+        _, exact = kneighbors_table(X[:200], X[200:], 5)
+
+        recall = np.mean([len(np.intersect1d(a, e)) / 5 for a, e in zip(approx, exact)])
+        assert index.codes.dtype == np.uint8
+        assert recall > 0.5
+
+    def test_kmeans_separates_blobs(self):
+        """O k-means deve encontrar um centróide por grupo bem separado."""
+        X, y = make_blobs_data(n_classes=3)
+        centers = kmeans(X, 3)
+
+        assert centers.shape == (3, X.shape[1])
+        # A média de cada grupo deve estar mais perto de um centróide diferente
+        blob_means = np.stack([X[y == label].mean(axis=0) for label in np.unique(y)])
+        nearest = np.argmin(((blob_means[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+        assert sorted(nearest) == [0, 1, 2]
+        # E o centróide mais próximo de cada amostra deve ser o do seu grupo
+        assigned = np.argmin(((X[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+        assert np.array_equal(assigned, nearest[np.unique(y, return_inverse=True)[1]])
+
+    def test_evaluate_knn_ivf_backend(self):
+        """`evaluate_knn` deve aceitar o backend aproximado."""
+        X, y = make_blobs_data()
+        exact = evaluate_knn(X, y, k_range=[3], cv=5)
+        approx = evaluate_knn(X, y, k_range=[3], cv=5, backend='ivf', index_params={'n_probe': 64})
+
+        assert approx == exact
+
+    def test_benchmark_reports_delta(self):
+        """O benchmark deve reportar a diferença de acurácia em relação ao exato."""
+        X, y = make_blobs_data()
+        results = benchmark_ann(X, y, n_probe_values=(1, 4))
+
+        assert [res['backend'] for res in results] == ['exact', 'ivf', 'ivf']
+        for res in results:
+            assert res['accuracy_delta'] == pytest.approx(res['accuracy'] - results[0]['accuracy'])
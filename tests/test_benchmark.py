@@ -0,0 +1,70 @@
+"""
+Testes unitários para o gerador sintético e a suíte de benchmarks.
+"""
+
+import numpy as np
+
+from src.ml_challenge.utils.benchmark import (
+    append_history,
+    find_regressions,
+    load_history,
+    run_benchmarks,
+)
+from src.ml_challenge.utils.data_processing import load_data
+from src.ml_challenge.utils.synthetic import make_syndrome_embeddings, write_synthetic_pickle
+
+
+class TestSyntheticEmbeddings:
+    """Testes para o gerador de pickles sintéticos."""
+
+    def test_nested_structure(self, tmp_path):
+        """O pickle deve ter o formato e o tamanho pedidos e ser lido por `load_data`."""
+        path = write_synthetic_pickle(tmp_path / "synthetic.p", n_classes=3, subjects_per_class=4,
+                                      images_per_subject=2, n_features=8)
+        X, y, groups = load_data(path, use_store=False, return_groups=True)
+
+        assert X.shape == (24, 8) and X.dtype == np.float32
+        assert len(np.unique(y)) == 3
+        assert len(np.unique(groups)) == 12
+
+    def test_reproducible(self):
+        """A mesma semente deve gerar os mesmos embeddings."""
+        a = make_syndrome_embeddings(n_classes=2, subjects_per_class=2, n_features=4, random_state=1)
+        b = make_syndrome_embeddings(n_classes=2, subjects_per_class=2, n_features=4, random_state=1)
+
+        for syndrome, subjects in a.items():
+            for subject, images in subjects.items():
+                for image, embedding in images.items():
+                    np.testing.assert_array_equal(embedding, b[syndrome][subject][image])
+
+
+class TestBenchmarks:
+    """Testes para o harness de benchmarks e a detecção de regressões."""
+
+    def test_run_and_history(self, tmp_path):
+        """Uma execução deve medir todas as etapas e ser anexada ao histórico."""
+        run = run_benchmarks(["tiny"], k_range=range(1, 4))
+        result = run["results"]["tiny"]
+
+        assert result["n_samples"] == 100
+        assert set(result["stages"]) == {"load_data", "evaluate_knn", "roc", "predict"}
+        assert all(stage["wall_s"] >= 0 for stage in result["stages"].values())
+
+        path = tmp_path / "history.json"
+        append_history(run, path)
+        append_history(run, path)
+        assert len(load_history(path)) == 2
+
+    def test_find_regressions(self):
+        """Etapas mais lentas que a referência além do limiar devem ser sinalizadas."""
+        def make_run(wall_s, machine="box"):
+            return {"environment": {"machine": machine},
+                    "results": {"small": {"stages": {"evaluate_knn": {"wall_s": wall_s}}}}}
+
+        history = [make_run(1.0), make_run(1.1), make_run(0.9), make_run(0.1, machine="other")]
+
+        assert find_regressions(make_run(1.1), history) == []
+        regressions = find_regressions(make_run(1.5), history, threshold=0.2)
+        assert len(regressions) == 1
+        assert regressions[0]["baseline_s"] == 1.0
+        assert find_regressions(make_run(1.5, machine="new"), history) == []
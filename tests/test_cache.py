@@ -0,0 +1,120 @@
+"""
+Testes unitários para o cache de etapas do pipeline.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from src.ml_challenge.utils import cache as cache_module
+from src.ml_challenge.utils.cache import StageCache, hash_arrays
+
+
+class TestHashArrays:
+    """Testes para o hash de arrays em blocos."""
+
+    def test_hash_independent_of_chunk_size(self, monkeypatch):
+        """O hash não deve depender do tamanho dos blocos lidos."""
+        X = np.arange(600, dtype=np.float32).reshape(200, 3)
+        labels = np.array(['a', 'bbbbbb', None, 'cc'] * 10, dtype=object)
+        full = hash_arrays(X, labels, np.float64(1.5), k=3)
+        monkeypatch.setattr(cache_module, 'HASH_CHUNK_BYTES', 24)
+
+        assert hash_arrays(X, labels, np.float64(1.5), k=3) == full
+        assert hash_arrays(X[::-1], labels) != hash_arrays(X, labels)
+
+    def test_hash_memmap_matches_array(self, tmp_path):
+        """Uma matriz mapeada em memória tem o mesmo hash dos dados em RAM."""
+        X = np.random.RandomState(0).rand(50, 4).astype(np.float32)
+        np.save(tmp_path / 'X.npy', X)
+        assert hash_arrays(np.load(tmp_path / 'X.npy', mmap_mode='r')) == hash_arrays(X)
+
+
+class TestStageCache:
+    """Testes para o cache em disco com remoção LRU."""
+
+    def test_roundtrip_nested_results(self, tmp_path):
+        """Listas de registros e dicionários de arrays devem voltar iguais."""
+        cache = StageCache(tmp_path)
+        results = [{'k': 1, 'accuracy': 0.5}, {'k': 2, 'accuracy': 0.75}]
+        curves = {'cosine': {'fpr': np.linspace(0, 1, 5), 'auc': 0.9}}
+        cache.put('knn', 'a', results)
+        cache.put('roc', 'b', curves)
+
+        assert cache.get('knn', 'a') == results
+        loaded = cache.get('roc', 'b')
+        np.testing.assert_array_equal(loaded['cosine']['fpr'], curves['cosine']['fpr'])
+        assert loaded['cosine']['auc'] == 0.9
+        assert cache.get('knn', 'missing') is None
+
+    def test_fetch_computes_once(self, tmp_path):
+        """Uma chave já calculada não deve chamar a função novamente."""
+        cache = StageCache(tmp_path)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'value': np.arange(3)}
+
+        key = hash_arrays(np.arange(10), k_range=[1, 2])
+        first = cache.fetch('stage', key, compute)
+        second = cache.fetch('stage', key, compute)
+
+        assert len(calls) == 1
+        np.testing.assert_array_equal(first['value'], second['value'])
+        assert hash_arrays(np.arange(10), k_range=[1, 3]) != key
+
+    def test_roundtrip_none_and_empty_containers(self, tmp_path):
+        """None e contêineres vazios devem voltar com o mesmo tipo."""
+        cache = StageCache(tmp_path)
+        results = [{'model': 'knn', 'n_prototypes': None, 'lst': [], 'params': {}}]
+        cache.put('knn', 'a', results)
+        cache.put('empty', 'list', [])
+        cache.put('empty', 'none', None)
+
+        assert cache.get('knn', 'a') == results
+        assert cache.get('empty', 'list') == []
+        assert cache.get('empty', 'none', 'missing') is None
+
+    def test_fetch_none_computes_once(self, tmp_path):
+        """Um resultado None gravado conta como acerto do cache."""
+        cache = StageCache(tmp_path)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'n_prototypes': None}
+
+        assert cache.fetch('stage', 'a', compute) == {'n_prototypes': None}
+        assert cache.fetch('stage', 'a', compute) == {'n_prototypes': None}
+        assert len(calls) == 1
+
+    def test_put_rejects_object_values(self, tmp_path):
+        """Valores que virariam arrays de objetos falham na gravação, sem arquivo parcial."""
+        cache = StageCache(tmp_path)
+        with pytest.raises(TypeError, match="results/model"):
+            cache.put('stage', 'a', {'results': {'model': object()}})
+        assert not any(tmp_path.rglob('*.npz'))
+
+    def test_disabled_cache_always_computes(self, tmp_path):
+        """Com o cache desativado nada é gravado."""
+        cache = StageCache(tmp_path, enabled=False)
+        assert cache.fetch('stage', 'a', lambda: 1) == 1
+        assert not any(tmp_path.rglob('*.npz'))
+
+    def test_lru_eviction(self, tmp_path):
+        """Ao passar do limite, o resultado usado há mais tempo é removido."""
+        cache = StageCache(tmp_path, max_size_mb=None)
+        block = np.zeros(100_000, dtype=np.uint8)
+        for i, key in enumerate(['old', 'used', 'new']):
+            path = cache.put('stage', key, block)
+            os.utime(path, ns=(i * 10 ** 9, i * 10 ** 9))
+
+        cache.get('stage', 'old')
+        cache.max_size_mb = 0.2
+        cache.evict()
+
+        assert cache.get('stage', 'used') is None
+        assert cache.get('stage', 'old') is not None
+        assert cache.size_bytes() <= 0.2 * 2 ** 20
@@ -0,0 +1,109 @@
+"""
+Testes unitários para o módulo de classificação.
+"""
+
+import pytest
+import numpy as np
+from sklearn.model_selection import cross_val_score
+from sklearn.neighbors import KNeighborsClassifier
+
+from src.ml_challenge.models.classification import evaluate_knn
+from src.ml_challenge.models.folds import FoldPlan
+from src.ml_challenge.models.neighbors import kneighbors_table, predict_k_range
+
+
+def make_blobs_data(n_classes=4, n_per_class=30, n_features=8, seed=0):
+    """Gera embeddings sintéticos agrupados por classe."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(scale=3.0, size=(n_classes, n_features))
+    X = np.vstack([c + rng.normal(size=(n_per_class, n_features)) for c in centers])
+    y = np.repeat([f"syndrome_{i}" for i in range(n_classes)], n_per_class)
+    return X.astype(np.float32), y
+
+
+class TestEvaluateKnn:
+    """Testes para a varredura de K com vizinhos pré-computados."""
+
+    def test_matches_cross_val_score(self):
+        """A varredura deve reproduzir as acurácias do `cross_val_score`."""
+        X, y = make_blobs_data()
+        results = evaluate_knn(X, y, k_range=range(1, 8))
+
+        for res in results:
+            for metric in ('euclidean', 'cosine'):
+                knn = KNeighborsClassifier(n_neighbors=res['k'], metric=metric)
+                expected = np.mean(cross_val_score(knn, X, y, cv=10))
+                assert res[f'accuracy_{metric}'] == pytest.approx(expected)
+
+    def test_parallel_matches_serial(self):
+        """A execução em processos deve produzir os mesmos resultados da serial."""
+        X, y = make_blobs_data()
+        serial = evaluate_knn(X, y, k_range=range(1, 6), n_jobs=1)
+        parallel = evaluate_knn(X, y, k_range=range(1, 6), n_jobs=2)
+
+        assert parallel == serial
+
+    def test_kneighbors_table_sorted(self):
+        """A tabela de vizinhos deve estar ordenada por distância."""
+        X, _ = make_blobs_data()
+        distances, indices = kneighbors_table(X[:100], X[100:], 5)
+
+        assert indices.shape == (20, 5)
+        assert np.all(np.diff(distances, axis=1) >= 0)
+
+    def test_kneighbors_table_invalid_k(self):
+        """Testa erro quando K excede o tamanho da galeria."""
+        X, _ = make_blobs_data()
+        with pytest.raises(ValueError, match="n_neighbors"):
+            kneighbors_table(X[:5], X[5:], 6)
+
+    def test_predict_k_range_tie_break(self):
+        """Empates devem ser resolvidos pela menor classe."""
+        neighbor_labels = np.array([[2, 1, 1, 2]])
+        predictions = predict_k_range(neighbor_labels, 3, [1, 2, 3, 4])
+
+        assert predictions[:, 0].tolist() == [2, 1, 1, 1]
+
+
+def make_groups(y, images_per_subject=3):
+    """Atribui sujeitos sintéticos com várias imagens cada."""
+    return np.array([f"{label}_subject_{i // images_per_subject}" for i, label in enumerate(y)])
+
+
+class TestFoldPlan:
+    """Testes para o plano de folds agrupado por sujeito."""
+
+    def test_subjects_do_not_leak(self):
+        """Nenhum sujeito deve aparecer no treino e no teste do mesmo fold."""
+        X, y = make_blobs_data()
+        groups = make_groups(y)
+        plan = FoldPlan.build(y, groups, n_splits=5, cache_dir=None)
+
+        assert len(plan) == 5
+        for train_idx, test_idx in plan:
+            assert not set(groups[train_idx]) & set(groups[test_idx])
+        train_idx, test_idx = plan.holdout()
+        assert not set(groups[train_idx]) & set(groups[test_idx])
+        assert 0.1 < len(test_idx) / len(y) < 0.3
+
+    def test_cache_roundtrip(self, tmp_path):
+        """O plano deve ser reutilizado do cache com índices idênticos."""
+        _, y = make_blobs_data()
+        groups = make_groups(y)
+        plan = FoldPlan.build(y, groups, n_splits=5, cache_dir=tmp_path)
+        cached = FoldPlan.build(y, groups, n_splits=5, cache_dir=tmp_path)
+
+        assert len(list(tmp_path.glob("*.npz"))) == 1
+        assert cached.key == plan.key
+        for (train_a, test_a), (train_b, test_b) in zip(plan, cached):
+            np.testing.assert_array_equal(train_a, train_b)
+            np.testing.assert_array_equal(test_a, test_b)
+
+    def test_evaluate_knn_with_plan(self):
+        """`evaluate_knn` deve aceitar o plano como `cv`."""
+        X, y = make_blobs_data()
+        plan = FoldPlan.build(y, make_groups(y), n_splits=5, cache_dir=None)
+        results = evaluate_knn(X, y, k_range=range(1, 4), cv=plan)
+
+        assert [res['k'] for res in results] == [1, 2, 3]
+        assert all(0 <= res['accuracy_cosine'] <= 1 for res in results)
@@ -0,0 +1,187 @@
+"""
+Testes unitários para o classificador persistente de síndromes.
+"""
+
+import subprocess
+import sys
+
+import pytest
+import numpy as np
+from sklearn.neighbors import KNeighborsClassifier
+
+from src.ml_challenge.models.classifier import SyndromeClassifier
+from tests.test_classification import make_blobs_data, make_groups
+
+
+class TestSyndromeClassifier:
+    """Testes para ajuste, persistência e inferência do `SyndromeClassifier`."""
+
+    @pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+    def test_matches_sklearn(self, metric):
+        """As predições devem coincidir com o `KNeighborsClassifier`."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=5, metric=metric).fit(X[::2], y[::2])
+        reference = KNeighborsClassifier(n_neighbors=5, metric=metric).fit(X[::2], y[::2])
+
+        np.testing.assert_array_equal(model.predict(X[1::2]), reference.predict(X[1::2]))
+        np.testing.assert_allclose(model.predict_proba(X[1::2]), reference.predict_proba(X[1::2]))
+
+    @pytest.mark.parametrize("backend", ["exact", "ivf"])
+    def test_save_and_load(self, tmp_path, backend):
+        """O artefato salvo deve ser carregado mapeado em memória com as mesmas predições."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=3, backend=backend).fit(X, y, subjects=make_groups(y))
+        path = model.save(tmp_path / "model")
+
+        loaded = SyndromeClassifier.load(path)
+
+        assert isinstance(loaded.gallery_, np.memmap)
+        assert loaded.subjects_.tolist() == make_groups(y).tolist()
+        np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+
+    def test_load_rejects_unknown_version(self, tmp_path):
+        """Versões de formato desconhecidas devem ser rejeitadas."""
+        X, y = make_blobs_data()
+        path = SyndromeClassifier().fit(X, y).save(tmp_path / "model")
+        manifest = (path / "manifest.json").read_text().replace('"format_version": 1', '"format_version": 99')
+        (path / "manifest.json").write_text(manifest)
+
+        with pytest.raises(ValueError, match="Versão de modelo"):
+            SyndromeClassifier.load(path)
+
+    def test_inference_does_not_import_plotting_stack(self):
+        """Carregar o classificador não deve importar matplotlib nem scikit-learn."""
+        code = (
+            "import sys; import src.ml_challenge.models.classifier; "
+            "print(any(m.split('.')[0] in ('matplotlib', 'sklearn') for m in sys.modules))"
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+        assert output.stdout.strip() == "False"
+
+
+class TestPredictTopk:
+    """Testes para a predição top-k em blocos e em streaming."""
+
+    def test_topk_consistent_with_proba(self):
+        """O top-1 deve coincidir com `predict` e os scores devem estar ordenados."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=7).fit(X[::2], y[::2])
+
+        labels, scores = model.predict_topk(X[1::2], k=3, block_size=16)
+
+        assert labels.shape == scores.shape == (60, 3)
+        np.testing.assert_array_equal(labels[:, 0], model.predict(X[1::2]))
+        assert np.all(np.diff(scores, axis=1) <= 0)
+        assert all(len(set(row)) == 3 for row in labels)
+
+    def test_topk_block_size_invariant(self):
+        """O resultado não deve depender do tamanho do bloco."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=5, metric="euclidean").fit(X[::2], y[::2])
+
+        labels_a, scores_a = model.predict_topk(X[1::2], k=2, block_size=7)
+        labels_b, scores_b = model.predict_topk(X[1::2], k=2, block_size=1000)
+
+        np.testing.assert_array_equal(labels_a, labels_b)
+        np.testing.assert_array_equal(scores_a, scores_b)
+
+    def test_iter_predict_topk(self):
+        """O streaming deve reagrupar o fluxo em blocos fixos e cobrir todas as consultas."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=5).fit(X[::2], y[::2])
+        stream = [X[1:21:2], X[21], X[23::2]]
+
+        blocks = list(model.iter_predict_topk(stream, k=2, block_size=25))
+
+        assert [len(labels) for labels, _ in blocks] == [25, 25, 10]
+        expected, _ = model.predict_topk(X[1::2], k=2)
+        np.testing.assert_array_equal(np.vstack([labels for labels, _ in blocks]), expected)
+
+
+class TestIncrementalUpdates:
+    """Testes para inclusão e remoção de imagens sem reajuste completo."""
+
+    @pytest.mark.parametrize("backend", ["exact", "ivf"])
+    def test_add_matches_refit(self, backend):
+        """Anexar imagens (inclusive de uma síndrome nova) deve equivaler a reajustar."""
+        X, y = make_blobs_data(n_classes=5)
+        groups = make_groups(y)
+        base = y != "syndrome_4"
+        params = dict(n_neighbors=5, backend=backend, index_params={"n_probe": 64}, compact_threshold=10.0)
+        model = SyndromeClassifier(**params).fit(X[base][::2], y[base][::2], subjects=groups[base][::2])
+
+        rows = model.add(X[~base], y[~base], subjects=groups[~base])
+        reference = SyndromeClassifier(**params).fit(
+            np.vstack([X[base][::2], X[~base]]), np.concatenate([y[base][::2], y[~base]]))
+
+        assert rows.tolist() == list(range(len(X[base][::2]), model.n_samples_))
+        assert model.classes_.tolist() == reference.classes_.tolist()
+        np.testing.assert_allclose(model.predict_proba(X[1::2]), reference.predict_proba(X[1::2]))
+
+    @pytest.mark.parametrize("backend", ["exact", "ivf"])
+    def test_remove_subjects_matches_refit(self, backend):
+        """Sujeitos removidos não devem mais aparecer entre os vizinhos."""
+        X, y = make_blobs_data()
+        groups = make_groups(y)
+        params = dict(n_neighbors=3, backend=backend, index_params={"n_probe": 64}, compact_threshold=10.0)
+        model = SyndromeClassifier(**params).fit(X, y, subjects=groups)
+
+        removed = np.unique(groups)[::4]
+        assert model.remove_subjects(removed) == np.isin(groups, removed).sum()
+        keep = ~np.isin(groups, removed)
+        reference = SyndromeClassifier(**params).fit(X[keep], y[keep])
+
+        neighbors = model.kneighbors(X)
+        assert not np.isin(model.subjects_[neighbors], removed).any()
+        np.testing.assert_allclose(model.predict_proba(X), reference.predict_proba(X))
+
+        model.compact()
+        assert model.n_samples_ == len(model.gallery_) == keep.sum()
+        np.testing.assert_allclose(model.predict_proba(X), reference.predict_proba(X))
+
+    def test_background_compaction_keeps_concurrent_updates(self):
+        """Imagens anexadas durante a compactação devem ser preservadas."""
+        X, y = make_blobs_data()
+        groups = make_groups(y)
+        model = SyndromeClassifier(n_neighbors=3, compact_threshold=0.1).fit(X[:60], y[:60], subjects=groups[:60])
+
+        model.remove_subjects(np.unique(groups[:60])[:4])
+        model.add(X[60:], y[60:], subjects=groups[60:])
+        if model._compaction is not None:
+            model._compaction.join()
+        model.compact()
+
+        keep = ~np.isin(groups, np.unique(groups[:60])[:4])
+        assert model.deleted_.sum() == 0
+        assert sorted(model.subjects_.tolist()) == sorted(groups[keep].tolist())
+        reference = SyndromeClassifier(n_neighbors=3).fit(X[keep], y[keep])
+        np.testing.assert_array_equal(model.predict(X), reference.predict(X))
+
+    def test_updates_on_loaded_model(self, tmp_path):
+        """Um modelo mapeado em memória deve aceitar atualizações e ser salvo compactado."""
+        X, y = make_blobs_data()
+        groups = make_groups(y)
+        path = SyndromeClassifier(n_neighbors=3).fit(X[:100], y[:100], subjects=groups[:100]).save(tmp_path / "m")
+
+        model = SyndromeClassifier.load(path)
+        data = {}
+        for i in range(100, 120):
+            data.setdefault(y[i], {}).setdefault(groups[i], {})[f"img_{i}"] = X[i]
+        model.add_embeddings(data)
+        model.remove_subjects([groups[0]])
+        model.save(path)
+
+        reloaded = SyndromeClassifier.load(path)
+        assert reloaded.n_samples_ == 120 - np.sum(groups == groups[0])
+        assert groups[0] not in reloaded.subjects_
+        np.testing.assert_array_equal(reloaded.predict(X), model.predict(X))
+
+    def test_remove_keeps_enough_neighbors(self):
+        """A remoção não pode deixar menos imagens que `n_neighbors`."""
+        X, y = make_blobs_data()
+        groups = make_groups(y)
+        model = SyndromeClassifier(n_neighbors=5).fit(X[:6], y[:6], subjects=groups[:6])
+
+        with pytest.raises(ValueError, match="ao menos"):
+            model.remove_subjects([groups[0]])
@@ -0,0 +1,64 @@
+"""
+Testes unitários para a interface de linha de comando.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from src.ml_challenge.cli import main
+from src.ml_challenge.models.classifier import SyndromeClassifier
+from src.ml_challenge.utils.synthetic import write_synthetic_pickle
+from tests.test_classification import make_blobs_data
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+class TestCli:
+    """Testes para os subcomandos do `ml-challenge`."""
+
+    def test_predict_writes_csv(self, tmp_path):
+        """`predict` deve gravar o mesmo top-k do classificador."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=5).fit(X[::2], y[::2])
+        model_path = model.save(tmp_path / "model")
+        np.save(tmp_path / "queries.npy", X[1::2])
+
+        assert main(["predict", str(model_path), str(tmp_path / "queries.npy"), "--k", "3",
+                     "--output", str(tmp_path / "topk.csv")]) == 0
+
+        rows = (tmp_path / "topk.csv").read_text().splitlines()
+        expected, _ = model.predict_topk(X[1::2], k=3)
+        assert rows[0] == "row,label_1,score_1,label_2,score_2,label_3,score_3"
+        assert [row.split(",")[1::2] for row in rows[1:]] == expected.tolist()
+
+    def test_evaluate_and_load(self, tmp_path, capsys, monkeypatch):
+        """`load` e `evaluate` devem funcionar sobre um pickle no formato de entrada."""
+        monkeypatch.chdir(tmp_path)
+        data_path = write_synthetic_pickle(tmp_path / "data.p", n_classes=3, subjects_per_class=8, n_features=16)
+
+        assert main(["load", str(data_path)]) == 0
+        assert "72 amostras, 16 features" in capsys.readouterr().out
+
+        assert main(["evaluate", str(data_path), "--k-max", "3", "--folds", "3",
+                     "--output", str(tmp_path / "knn.json")]) == 0
+        assert "Melhor K (cosine)" in capsys.readouterr().out
+        assert (tmp_path / "knn.json").exists()
+
+    def test_predict_does_not_import_plotting_stack(self, tmp_path):
+        """`predict` não deve importar scikit-learn nem matplotlib."""
+        X, y = make_blobs_data()
+        model_path = SyndromeClassifier(n_neighbors=3).fit(X, y).save(tmp_path / "model")
+        np.save(tmp_path / "queries.npy", X[:5])
+
+        code = (
+            "import sys\n"
+            "from ml_challenge.cli import main\n"
+            f"main(['predict', {str(model_path)!r}, {str(tmp_path / 'queries.npy')!r}])\n"
+            "print(sorted({name.split('.')[0] for name in sys.modules} & {'sklearn', 'matplotlib', 'scipy'}))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                env={"PYTHONPATH": str(SRC_DIR), "PATH": ""})
+        assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -9,7 +9,10 @@ import pickle
 from pathlib import Path
 from unittest.mock import patch, mock_open
 
-from src.ml_challenge.utils.data_processing import load_data
+from src.ml_challenge.utils.data_processing import (
+    load_data, convert_pickle_to_store, ingest_embeddings, iter_embeddings, iter_embedding_batches
+)
+from src.ml_challenge.utils.embedding_store import open_store, store_fingerprint
 
 
 class TestDataProcessing:
@@ -108,5 +111,144 @@ class TestDataProcessing:
             Path(tmp_file.name).unlink()
 
 
+class TestEmbeddingStore:
+    """Testes para o store de embeddings mapeado em memória."""
+    
+    test_data = {
+        'syndrome_1': {
+            'subject_1': {'image_1': np.arange(4, dtype=np.float32), 'image_2': np.ones(4, dtype=np.float32)},
+            'subject_2': {'image_3': np.zeros(4, dtype=np.float32)}
+        },
+        'syndrome_2': {
+            'subject_3': {'image_4': np.full(4, 2.0, dtype=np.float32)}
+        }
+    }
+    
+    def _write_pickle(self, tmp_path):
+        file_path = tmp_path / "data.p"
+        with open(file_path, 'wb') as f:
+            pickle.dump(self.test_data, f)
+        return file_path
+    
+    def test_convert_and_open(self, tmp_path):
+        """Testa conversão do pickle e abertura mapeada em memória."""
+        file_path = self._write_pickle(tmp_path)
+        store_path = convert_pickle_to_store(file_path)
+        store = open_store(store_path)
+        
+        assert isinstance(store.X, np.memmap)
+        assert store.X.dtype == np.float32
+        assert store.X.shape == (4, 4)
+        assert store.y.tolist() == ['syndrome_1', 'syndrome_1', 'syndrome_1', 'syndrome_2']
+        assert store.groups.tolist() == ['subject_1', 'subject_1', 'subject_2', 'subject_3']
+        assert store.image_ids.tolist() == ['image_1', 'image_2', 'image_3', 'image_4']
+    
+    def test_load_data_uses_store(self, tmp_path):
+        """`load_data` deve ler do store quando ele está atualizado."""
+        file_path = self._write_pickle(tmp_path)
+        X_pickle, y_pickle = load_data(file_path)
+        convert_pickle_to_store(file_path)
+        X_store, y_store = load_data(file_path)
+        
+        assert isinstance(X_store, np.memmap)
+        np.testing.assert_array_equal(X_store, X_pickle)
+        np.testing.assert_array_equal(y_store, y_pickle)
+        
+        _, _, groups = load_data(file_path, return_groups=True)
+        assert groups.tolist() == ['subject_1', 'subject_1', 'subject_2', 'subject_3']
+    
+    def test_load_data_from_store_directory(self, tmp_path):
+        """`load_data` deve aceitar o próprio diretório do store, sem o pickle de origem."""
+        file_path = self._write_pickle(tmp_path)
+        X_pickle, y_pickle = load_data(file_path)
+        store_path = convert_pickle_to_store(file_path)
+        file_path.unlink()
+        
+        X_store, y_store = load_data(store_path)
+        
+        assert isinstance(X_store, np.memmap)
+        np.testing.assert_array_equal(X_store, X_pickle)
+        np.testing.assert_array_equal(y_store, y_pickle)
+    
+    def test_store_fingerprint(self, tmp_path):
+        """A matriz completa do store é identificada pelo manifesto; cópias e fatias não."""
+        file_path = self._write_pickle(tmp_path)
+        X_pickle, _ = load_data(file_path)
+        store = open_store(convert_pickle_to_store(file_path))
+        
+        fingerprint = store_fingerprint(store.X)
+        assert fingerprint['source']['name'] == 'data.p'
+        assert store_fingerprint(store.X[:2]) is None
+        assert store_fingerprint(np.array(store.X)) is None
+        assert store_fingerprint(X_pickle) is None
+    
+    def test_load_data_ignores_stale_store(self, tmp_path):
+        """Um store desatualizado deve ser ignorado em favor do pickle."""
+        file_path = self._write_pickle(tmp_path)
+        convert_pickle_to_store(file_path)
+        
+        with open(file_path, 'wb') as f:
+            pickle.dump({'syndrome_3': {'subject_9': {'image_9': [1.0, 2.0]}}}, f)
+        
+        X, y = load_data(file_path)
+        assert not isinstance(X, np.memmap)
+        assert X.shape == (1, 2)
+        assert y.tolist() == ['syndrome_3']
+
+
+class TestStreamingIngest:
+    """Testes para a ingestão em streaming do dicionário aninhado."""
+    
+    def _make_data(self):
+        return {
+            'syndrome_1': {
+                'subject_1': {'image_1': [1, 2, 3], 'image_2': np.array([4, 5, 6])},
+                'subject_2': {'image_3': [7, 8, 9]}
+            },
+            'syndrome_2': {
+                'subject_3': {'image_4': [10, 11, 12], 'image_5': [1, 2]}
+            }
+        }
+    
+    def test_ingest_preallocated_float32(self):
+        """Testa preenchimento de uma única matriz float32."""
+        X, y, subjects, images = ingest_embeddings(self._make_data())
+        
+        assert X.dtype == np.float32
+        assert X.shape == (4, 3)  # embedding com dimensão diferente é ignorado
+        assert y.tolist() == ['syndrome_1', 'syndrome_1', 'syndrome_1', 'syndrome_2']
+        assert subjects.tolist() == ['subject_1', 'subject_1', 'subject_2', 'subject_3']
+        assert images.tolist() == ['image_1', 'image_2', 'image_3', 'image_4']
+        np.testing.assert_array_equal(X[-1], [10, 11, 12])
+    
+    def test_ingest_release(self):
+        """Com `release=True` as síndromes consumidas saem do dicionário."""
+        data = self._make_data()
+        ingest_embeddings(data, release=True)
+        
+        assert data == {}
+    
+    def test_ingest_undersized_out(self):
+        """Uma matriz de destino com poucas linhas deve gerar o ValueError documentado."""
+        out = np.empty((2, 3), dtype=np.float32)
+        
+        with pytest.raises(ValueError, match="Matriz de destino com 2 linhas, encontradas 4 amostras"):
+            ingest_embeddings(self._make_data(), out=out)
+    
+    def test_iter_embeddings(self):
+        """Testa o gerador de tuplas (síndrome, sujeito, imagem, vetor)."""
+        items = list(iter_embeddings(self._make_data()))
+        
+        assert len(items) == 5
+        assert items[0][:3] == ('syndrome_1', 'subject_1', 'image_1')
+    
+    def test_iter_embedding_batches(self):
+        """Os blocos devem respeitar o tamanho máximo e cobrir todas as amostras."""
+        batches = list(iter_embedding_batches(self._make_data(), batch_size=3))
+        
+        assert [batch[3].shape for batch in batches] == [(3, 3), (1, 3)]
+        assert batches[1][0].tolist() == ['syndrome_2']
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,54 @@
+"""
+Testes unitários para o kernel de distâncias em blocos.
+"""
+
+import pytest
+import numpy as np
+from sklearn.metrics import pairwise_distances
+
+from src.ml_challenge.models.distance import (
+    block_size_for_memory,
+    blocked_kneighbors,
+    pairwise_block,
+    prepare_embeddings,
+)
+from src.ml_challenge.models.neighbors import kneighbors_table
+from tests.test_classification import make_blobs_data
+
+
+class TestDistanceKernel:
+    """Testes para as distâncias via produto de matrizes."""
+
+    @pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+    def test_matches_sklearn(self, metric):
+        """As distâncias devem coincidir com as do scikit-learn."""
+        X, _ = make_blobs_data()
+        Q, _ = prepare_embeddings(X[100:], metric)
+        G, G_sq = prepare_embeddings(X[:100], metric)
+
+        expected = pairwise_distances(X[100:], X[:100], metric=metric)
+        np.testing.assert_allclose(pairwise_block(Q, G, metric, G_sq), expected, rtol=1e-4, atol=1e-4)
+
+    @pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+    def test_block_size_invariance(self, metric):
+        """O resultado não deve depender do tamanho do bloco."""
+        X, _ = make_blobs_data()
+        full = blocked_kneighbors(X[100:], X[:100], 7, metric, block_size=1024)
+        small = blocked_kneighbors(X[100:], X[:100], 7, metric, block_size=3)
+
+        np.testing.assert_array_equal(small[1], full[1])
+        np.testing.assert_array_equal(small[0], full[0])
+
+    def test_prepared_inputs_are_reused(self):
+        """Embeddings já preparados devem gerar os mesmos vizinhos."""
+        X, _ = make_blobs_data()
+        Xp, sq = prepare_embeddings(X, "cosine")
+        _, prepared = kneighbors_table(Xp[:100], Xp[100:], 5, "cosine", prepared=True, train_sq=sq[:100])
+        _, raw = kneighbors_table(X[:100], X[100:], 5, "cosine")
+
+        np.testing.assert_array_equal(prepared, raw)
+
+    def test_block_size_for_memory(self):
+        """O bloco deve caber no orçamento de memória."""
+        assert block_size_for_memory(1, 1024) == 256
+        assert block_size_for_memory(1, 10 ** 9) == 1
@@ -0,0 +1,59 @@
+"""
+Testes unitários para o módulo de avaliação (curvas ROC).
+"""
+
+import pytest
+import numpy as np
+from sklearn.metrics import roc_curve, roc_auc_score
+
+from src.ml_challenge.models.evaluation import compute_roc_curves, roc_curves_ovr
+from src.ml_challenge.models.folds import FoldPlan
+from tests.test_classification import make_blobs_data, make_groups
+
+
+class TestRocCurves:
+    """Testes para o cálculo vetorizado das curvas ROC."""
+
+    @pytest.mark.parametrize("with_ties", [False, True])
+    def test_matches_sklearn(self, with_ties):
+        """A curva média e as AUCs devem coincidir com `roc_curve` + `np.interp`."""
+        rng = np.random.default_rng(0)
+        y_true = rng.integers(0, 6, 200)
+        y_score = rng.random((200, 6))
+        if with_ties:
+            y_score = np.round(y_score * 5) / 5
+
+        result = roc_curves_ovr(y_true, y_score)
+
+        grid = np.linspace(0, 1, 100)
+        expected_tpr, expected_auc = [], []
+        for c in range(6):
+            fpr, tpr, _ = roc_curve(y_true == c, y_score[:, c])
+            expected_tpr.append(np.interp(grid, fpr, tpr))
+            expected_auc.append(roc_auc_score(y_true == c, y_score[:, c]))
+
+        np.testing.assert_allclose(result['tpr'], np.mean(expected_tpr, axis=0))
+        np.testing.assert_allclose(result['class_auc'], expected_auc)
+
+    def test_class_without_positives_is_ignored(self):
+        """Classes ausentes do teste não devem contaminar a média com NaN."""
+        y_true = np.array([0, 0, 1, 1])
+        y_score = np.array([[0.9, 0.1, 0.0], [0.6, 0.4, 0.0], [0.3, 0.7, 0.0], [0.2, 0.8, 0.0]])
+
+        result = roc_curves_ovr(y_true, y_score)
+
+        assert np.isnan(result['class_auc'][2])
+        assert not np.isnan(result['tpr']).any()
+        assert result['auc'] == pytest.approx(1.0)
+
+    def test_compute_roc_curves_with_plan(self):
+        """As curvas devem usar o holdout do plano de folds."""
+        X, y = make_blobs_data()
+        plan = FoldPlan.build(y, make_groups(y), n_splits=5, cache_dir=None)
+
+        curves = compute_roc_curves(X, y, 5, fold_plan=plan)
+
+        assert set(curves) == {'euclidean', 'cosine'}
+        for curve in curves.values():
+            assert curve['tpr'].shape == (100,)
+            assert 0.5 < curve['auc'] <= 1.0
@@ -0,0 +1,105 @@
+"""
+Testes unitários para a avaliação do KNN fora da memória.
+"""
+
+import tracemalloc
+
+import pytest
+import numpy as np
+
+from src.ml_challenge.models.classification import evaluate_knn
+from src.ml_challenge.models.distance import blocked_kneighbors
+from src.ml_challenge.models.evaluation import compute_roc_curves
+from src.ml_challenge.models.folds import FoldPlan
+from src.ml_challenge.models.out_of_core import (
+    chunked_kneighbors,
+    compute_roc_curves_out_of_core,
+    evaluate_knn_out_of_core,
+    plan_chunks,
+)
+from tests.test_classification import make_blobs_data, make_groups
+
+
+def as_memmap(X, tmp_path):
+    """Grava `X` em disco e reabre como `np.memmap` somente leitura."""
+    np.save(tmp_path / "X.npy", X.astype(np.float32))
+    return np.load(tmp_path / "X.npy", mmap_mode="r")
+
+
+class TestChunkedKneighbors:
+    """Testes para a busca com top-k corrente sobre pedaços da galeria."""
+
+    @pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+    def test_matches_in_memory_search(self, tmp_path, metric):
+        """Com pedaços minúsculos, o resultado deve coincidir com a busca em memória."""
+        X, _ = make_blobs_data()
+        X_disk = as_memmap(X, tmp_path)
+        query_idx, gallery_idx = np.arange(0, len(X), 3), np.setdiff1d(np.arange(len(X)), np.arange(0, len(X), 3))
+
+        distances, indices = chunked_kneighbors(X_disk, query_idx, gallery_idx, 7, metric, memory_mb=0.002)
+        expected_dist, expected_idx = blocked_kneighbors(X[query_idx], X[gallery_idx], 7, metric)
+
+        assert plan_chunks(0.002, X.shape[1], len(gallery_idx), 7)[1] < len(gallery_idx)
+        np.testing.assert_array_equal(indices, expected_idx)
+        np.testing.assert_allclose(distances, expected_dist, rtol=1e-5, atol=1e-5)
+
+    def test_plan_chunks_uses_square_tiles(self):
+        """Com um orçamento realista, os blocos de consultas devem ter milhares de linhas."""
+        # 512 MB, d=320: ladrilho ~4600 x 4600, ou seja ~2200 passadas pela galeria para 10M consultas
+        query_block, gallery_chunk = plan_chunks(512, 320, 10_000_000, 15)
+        assert 4500 <= query_block <= 4700
+        assert abs(query_block - gallery_chunk) <= 1
+        # O plano ocupa o orçamento sem ultrapassá-lo
+        used = query_block * (2 * 320 * 4 + 24 * (gallery_chunk + 15)) + gallery_chunk * 2 * 320 * 4
+        assert 0.99 * 512 * 2 ** 20 <= used <= 512 * 2 ** 20
+
+        assert plan_chunks(8, 64, 1_000_000, 15) == (563, 563)
+        # Uma galeria pequena cabe em um pedaço e a sobra vai para o bloco de consultas
+        query_block, gallery_chunk = plan_chunks(512, 320, 1000, 15)
+        assert gallery_chunk == 1000 and query_block > 19_000
+
+    def test_rejects_unsupported_metric(self, tmp_path):
+        """Métricas sem kernel de produto de matrizes devem ser rejeitadas."""
+        X, _ = make_blobs_data()
+        with pytest.raises(ValueError):
+            chunked_kneighbors(X, np.arange(5), np.arange(5, 20), 3, "manhattan")
+
+
+class TestOutOfCoreEvaluation:
+    """Testes para a varredura de K e as curvas ROC fora da memória."""
+
+    def test_matches_evaluate_knn_and_roc(self, tmp_path):
+        """Acurácias e curvas ROC devem coincidir com as calculadas em memória."""
+        X, y = make_blobs_data()
+        plan = FoldPlan.build(y, make_groups(y), n_splits=4, cache_dir=None)
+        X_disk = as_memmap(X, tmp_path)
+
+        results = evaluate_knn_out_of_core(X_disk, y, k_range=range(1, 8), cv=plan, memory_mb=0.02)
+        expected = evaluate_knn(X, y, k_range=range(1, 8), cv=plan)
+        for res, exp in zip(results, expected):
+            assert res["k"] == exp["k"]
+            for metric in ("euclidean", "cosine"):
+                assert res[f"accuracy_{metric}"] == pytest.approx(exp[f"accuracy_{metric}"])
+
+        curves = compute_roc_curves_out_of_core(X_disk, y, 5, fold_plan=plan, memory_mb=0.02)
+        expected_curves = compute_roc_curves(X, y, 5, fold_plan=plan)
+        for metric, curve in curves.items():
+            assert curve["auc"] == pytest.approx(expected_curves[metric]["auc"])
+            np.testing.assert_allclose(curve["tpr"], expected_curves[metric]["tpr"])
+            np.testing.assert_allclose(curve["class_auc"], expected_curves[metric]["class_auc"])
+
+    def test_memory_stays_within_budget(self, tmp_path):
+        """O pico de memória deve acompanhar o orçamento, e não o tamanho da galeria."""
+        rng = np.random.default_rng(0)
+        X = rng.standard_normal((4000, 32)).astype(np.float32)
+        y = rng.integers(0, 5, size=len(X))
+        X_disk = as_memmap(X, tmp_path)
+        del X
+
+        tracemalloc.start()
+        evaluate_knn_out_of_core(X_disk, y, k_range=(1, 5), metrics=("euclidean",), cv=2, memory_mb=1)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Uma matriz de distâncias completa de um fold teria 2000 x 2000 x 4 bytes = 16 MB
+        assert peak < 4 * 2 ** 20
@@ -0,0 +1,71 @@
+"""
+Testes unitários para a instrumentação por etapa.
+"""
+
+import json
+import pstats
+import time
+
+import pytest
+from loguru import logger
+
+from src.ml_challenge.utils.profiling import StageProfiler, profile_stage
+
+
+class TestProfileStage:
+    """Testes para as medidas de tempo e memória por etapa."""
+
+    def test_records_metrics_as_json(self):
+        """A etapa deve registrar tempo, CPU, memória e amostras em JSON pelo loguru."""
+        messages = []
+        sink = logger.add(messages.append, format="{message}")
+        try:
+            with profile_stage("sleep") as stage:
+                time.sleep(0.05)
+                stage.n_samples = 10
+        finally:
+            logger.remove(sink)
+
+        record = json.loads(messages[-1].split("stage_metrics ", 1)[1])
+        assert record == stage.record
+        assert record["stage"] == "sleep" and record["status"] == "ok"
+        assert record["wall_s"] >= 0.05
+        assert record["cpu_s"] < record["wall_s"]
+        assert record["n_samples"] == 10
+        assert record["peak_rss_mb"] > 0
+
+    def test_decorator_and_errors(self):
+        """Como decorador, a etapa deve ser registrada mesmo quando falha."""
+        records = []
+
+        @profile_stage("failing", records=records)
+        def failing():
+            raise RuntimeError("falha")
+
+        with pytest.raises(RuntimeError):
+            failing()
+        assert records[0]["status"] == "error"
+
+    def test_profiler_dumps_selected_stages(self, tmp_path):
+        """Somente as etapas escolhidas devem gravar cProfile e tracemalloc."""
+        profiler = StageProfiler(cprofile_stages=["a"], trace_memory_stages=["b"], output_dir=tmp_path)
+        with profiler.stage("a"):
+            sum(range(1000))
+        with profiler.stage("b"):
+            data = [bytearray(1024) for _ in range(100)]
+        with profiler.stage("c"):
+            pass
+
+        assert pstats.Stats(str(tmp_path / "a.prof")).total_calls > 0
+        assert (tmp_path / "b.tracemalloc").exists()
+        assert profiler.records[1]["traced_peak_mb"] >= 0
+        assert not (tmp_path / "c.prof").exists()
+        assert [r["stage"] for r in json.loads(profiler.save().read_text())] == ["a", "b", "c"]
+        del data
+
+    def test_disabled_profiler(self):
+        """Desativado, o profiler não deve registrar nada."""
+        profiler = StageProfiler(enabled=False)
+        with profiler.stage("a") as stage:
+            stage.n_samples = 1
+        assert profiler.records == []
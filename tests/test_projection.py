@@ -0,0 +1,67 @@
+"""
+Testes unitários para a etapa de projeção t-SNE.
+"""
+
+import numpy as np
+
+from src.ml_challenge.utils import projection
+from src.ml_challenge.utils.cache import StageCache
+from src.ml_challenge.utils.projection import (
+    compute_tsne_layout,
+    place_out_of_sample,
+    stratified_subsample,
+)
+from tests.test_classification import make_blobs_data
+
+
+class TestTsneLayout:
+    """Testes para o layout t-SNE com subamostragem e cache."""
+
+    def test_stratified_subsample_keeps_every_class(self):
+        """A subamostra deve manter a proporção e todas as classes."""
+        y = np.array(["a"] * 90 + ["b"] * 9 + ["c"])
+        idx = stratified_subsample(y, 20)
+
+        assert set(y[idx]) == {"a", "b", "c"}
+        assert (y[idx] == "a").sum() == 18
+        assert len(np.unique(idx)) == len(idx)
+
+    def test_stratified_subsample_never_exceeds_max_samples(self):
+        """O mínimo por classe não pode fazer a subamostra passar de `max_samples`."""
+        y = np.array(["big"] * 100 + [f"rare_{i}" for i in range(10) for _ in range(2)])
+        idx = stratified_subsample(y, 30)
+
+        assert len(idx) == 30
+        assert set(y[idx]) == set(y)
+        assert (y[idx] == "big").sum() == 20
+
+        # Mais classes que amostras: uma amostra de cada classe sorteada
+        y = np.repeat([f"rare_{i}" for i in range(50)], 2)
+        idx = stratified_subsample(y, 20)
+        assert len(idx) == 20 and len(set(y[idx])) == 20
+
+    def test_out_of_sample_placement(self):
+        """Uma amostra idêntica a um ponto ajustado deve cair sobre ele."""
+        X_fitted = np.eye(3, dtype=np.float32)
+        layout = np.array([[0, 0], [10, 0], [0, 10]], dtype=np.float32)
+        placed = place_out_of_sample(X_fitted, layout, X_fitted[[1]], n_neighbors=2)
+
+        np.testing.assert_allclose(placed, [[10, 0]], atol=1e-3)
+
+    def test_layout_is_cached(self, tmp_path, monkeypatch):
+        """A segunda execução deve ler o layout do cache, sem rodar o t-SNE."""
+        X, y = make_blobs_data()
+        params = dict(pca_components=4, max_samples=60, perplexity=10, n_iter=250, cache=StageCache(tmp_path))
+        embedding, fitted = compute_tsne_layout(X, y, **params)
+
+        assert embedding.shape == (len(y), 2)
+        assert fitted.sum() == 60
+        assert np.isfinite(embedding).all()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("t-SNE recalculado")
+
+        monkeypatch.setattr(projection, "_make_tsne", fail)
+        cached, cached_fitted = compute_tsne_layout(X, y, **params)
+        np.testing.assert_array_equal(cached, embedding)
+        np.testing.assert_array_equal(cached_fitted, fitted)
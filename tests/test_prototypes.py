@@ -0,0 +1,76 @@
+"""
+Testes unitários para o classificador por protótipos.
+"""
+
+import pytest
+import numpy as np
+
+from src.ml_challenge.models.distance import l2_normalize
+from src.ml_challenge.models.folds import FoldPlan
+from src.ml_challenge.models.prototypes import PrototypeClassifier, evaluate_prototypes
+from tests.test_classification import make_blobs_data, make_groups
+
+
+class TestPrototypeClassifier:
+    """Testes para o ajuste e a predição pelo protótipo mais próximo."""
+
+    def test_single_prototype_is_class_centroid(self):
+        """Com um protótipo, deve ser o centróide da classe e a predição o centróide mais próximo."""
+        X, y = make_blobs_data()
+        model = PrototypeClassifier(n_prototypes=1, metric="euclidean").fit(X, y)
+
+        centroids = np.stack([X[y == label].mean(axis=0) for label in model.classes_])
+        np.testing.assert_allclose(model.prototypes_, centroids, rtol=1e-5, atol=1e-5)
+
+        distances = np.linalg.norm(X[:, None, :] - centroids[None, :, :], axis=2)
+        np.testing.assert_array_equal(model.predict(X), model.classes_[np.argmin(distances, axis=1)])
+
+    def test_cosine_prototypes_are_unit_norm(self):
+        """Na métrica cosseno, os protótipos devem ficar na esfera unitária."""
+        X, y = make_blobs_data()
+        model = PrototypeClassifier(n_prototypes=3, metric="cosine").fit(X, y)
+
+        assert len(model.prototypes_) == 3 * len(model.classes_)
+        np.testing.assert_allclose(np.linalg.norm(model.prototypes_, axis=1), 1.0, rtol=1e-5)
+        np.testing.assert_allclose(model.prototypes_, l2_normalize(model.prototypes_), rtol=1e-5)
+
+    def test_topk_and_class_distances(self):
+        """O top-k deve ordenar as síndromes pelo protótipo mais próximo de cada uma."""
+        X, y = make_blobs_data()
+        model = PrototypeClassifier(n_prototypes=4, metric="euclidean").fit(X, y)
+
+        distances = np.sqrt(((X[:, None, :] - model.prototypes_[None, :, :]) ** 2).sum(axis=2))
+        per_class = np.stack([distances[:, model.prototype_labels_ == c].min(axis=1)
+                              for c in range(len(model.classes_))], axis=1)
+        np.testing.assert_allclose(model.class_distances(X), per_class, rtol=1e-4, atol=1e-4)
+
+        labels, scores = model.predict_topk(X, k=2)
+        np.testing.assert_array_equal(labels[:, 0], model.predict(X))
+        assert np.all(scores[:, 0] <= scores[:, 1])
+
+    def test_invalid_parameters(self):
+        """Métricas sem protótipo bem definido e contagens inválidas devem ser rejeitadas."""
+        with pytest.raises(ValueError):
+            PrototypeClassifier(metric="manhattan")
+        with pytest.raises(ValueError):
+            PrototypeClassifier(n_prototypes=0)
+
+
+class TestEvaluatePrototypes:
+    """Testes para o relatório comparativo com o KNN exato."""
+
+    def test_report_format(self):
+        """O relatório deve trazer a linha do KNN e uma linha por número de protótipos."""
+        X, y = make_blobs_data()
+        plan = FoldPlan.build(y, make_groups(y), n_splits=3, cache_dir=None)
+
+        report = evaluate_prototypes(X, y, n_prototypes_range=(1, 2), cv=plan, knn_k=5)
+
+        assert [(res["model"], res["n_prototypes"]) for res in report] == [("knn", None), ("prototypes", 1),
+                                                                          ("prototypes", 2)]
+        assert report[1]["gallery_size"] == len(np.unique(y))
+        assert report[2]["gallery_size"] < report[0]["gallery_size"]
+        for res in report:
+            for metric in ("euclidean", "cosine"):
+                assert res[f"accuracy_{metric}"] > 0.9
+                assert res[f"query_ms_{metric}"] >= 0
@@ -0,0 +1,130 @@
+"""
+Testes unitários para a galeria quantizada (float16 / int8).
+"""
+
+import pytest
+import numpy as np
+
+from src.ml_challenge.models.classification import evaluate_knn
+from src.ml_challenge.models.classifier import SyndromeClassifier
+from src.ml_challenge.models.distance import blocked_kneighbors, pairwise_block, prepare_embeddings
+from src.ml_challenge.models.quantization import compare_quantization, prepare_quantized, quantize
+from tests.test_classification import make_blobs_data, make_groups
+
+
+class TestQuantizedEmbeddings:
+    """Testes para a codificação e o kernel de distâncias quantizado."""
+
+    @pytest.mark.parametrize("dtype,itemsize", [("float16", 2), ("int8", 1)])
+    def test_roundtrip_and_memory(self, dtype, itemsize):
+        """Os códigos devem ocupar menos memória e reconstruir X com erro pequeno."""
+        X, _ = make_blobs_data()
+        quantized = quantize(X, dtype)
+
+        assert quantized.codes.dtype.itemsize == itemsize
+        assert quantized.codes.nbytes * 4 == X.nbytes * itemsize
+        np.testing.assert_allclose(quantized.dequantize(), X, atol=np.abs(X).max() / 100)
+
+    def test_inner_products_match_dequantized(self):
+        """Os produtos em blocos devem coincidir com os da matriz descomprimida."""
+        X, _ = make_blobs_data()
+        quantized = quantize(X[:100], "int8")
+
+        expected = X[100:] @ quantized.dequantize().T
+        np.testing.assert_allclose(quantized.inner_products(X[100:], block_rows=7), expected, rtol=1e-5, atol=1e-4)
+        np.testing.assert_allclose(quantized.squared_norms(block_rows=7),
+                                   (quantized.dequantize() ** 2).sum(axis=1), rtol=1e-5)
+
+    @pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+    @pytest.mark.parametrize("dtype", ["float16", "int8"])
+    def test_distances_close_to_float32(self, metric, dtype):
+        """As distâncias contra a galeria quantizada devem ficar próximas das exatas."""
+        X, _ = make_blobs_data()
+        Q, _ = prepare_embeddings(X[100:], metric)
+        G, G_sq = prepare_embeddings(X[:100], metric)
+        G_quantized, G_quantized_sq = prepare_quantized(X[:100], metric, dtype)
+
+        expected = pairwise_block(Q, G, metric, G_sq)
+        np.testing.assert_allclose(pairwise_block(Q, G_quantized, metric, G_quantized_sq), expected, atol=0.05)
+
+    def test_requires_prepared_gallery(self):
+        """A galeria quantizada deve vir de prepare_quantized."""
+        X, _ = make_blobs_data()
+        with pytest.raises(ValueError):
+            blocked_kneighbors(X, quantize(X, "int8"), 3)
+
+    def test_evaluate_knn_accuracy_guardrail(self):
+        """A acurácia com a galeria quantizada deve ficar próxima da precisão completa."""
+        X, y = make_blobs_data()
+        full = evaluate_knn(X, y, k_range=[1, 5], cv=5)
+        for dtype in ("float16", "int8"):
+            quantized = evaluate_knn(X, y, k_range=[1, 5], cv=5, dtype=dtype)
+            for res_full, res_quantized in zip(full, quantized):
+                for metric in ("euclidean", "cosine"):
+                    assert abs(res_quantized[f"accuracy_{metric}"] - res_full[f"accuracy_{metric}"]) <= 0.05
+
+    def test_compare_quantization_report(self):
+        """O relatório deve trazer uma linha por (dtype, métrica), relativa ao float32."""
+        X, y = make_blobs_data()
+        report = compare_quantization(X, y, cv=3, k_range=[1, 3], metrics=("cosine",))
+
+        assert [entry["dtype"] for entry in report] == ["float32", "float16", "int8"]
+        assert report[0]["accuracy_delta"] == 0.0 and report[0]["compression"] == 1.0
+        assert report[2]["compression"] > 3.5
+        assert all(abs(entry["auc_delta"]) < 0.05 for entry in report)
+
+
+class TestQuantizedClassifier:
+    """Testes para o SyndromeClassifier com galeria quantizada."""
+
+    @pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+    @pytest.mark.parametrize("dtype", ["float16", "int8"])
+    def test_predictions_match_float32(self, metric, dtype):
+        """As predições devem coincidir (quase sempre) com as da galeria float32."""
+        X, y = make_blobs_data()
+        full = SyndromeClassifier(n_neighbors=5, metric=metric).fit(X[::2], y[::2])
+        model = SyndromeClassifier(n_neighbors=5, metric=metric, dtype=dtype).fit(X[::2], y[::2])
+
+        assert model.gallery_.dtype == np.dtype(dtype)
+        assert np.mean(model.predict(X[1::2]) == full.predict(X[1::2])) >= 0.95
+
+    def test_save_load_and_add(self, tmp_path):
+        """O artefato deve preservar códigos e escala; imagens novas usam a mesma escala."""
+        X, y = make_blobs_data()
+        groups = make_groups(y)
+        model = SyndromeClassifier(n_neighbors=3, dtype="int8").fit(X[::2], y[::2], subjects=groups[::2])
+        loaded = SyndromeClassifier.load(model.save(tmp_path / "model"))
+
+        assert loaded.dtype == "int8"
+        np.testing.assert_array_equal(loaded.gallery_scale_, model.gallery_scale_)
+        np.testing.assert_array_equal(loaded.predict_proba(X[1::2]), model.predict_proba(X[1::2]))
+
+        scale = loaded.gallery_scale_.copy()
+        loaded.add(X[1::2], y[1::2], subjects=groups[1::2])
+        np.testing.assert_array_equal(loaded.gallery_scale_, scale)
+        assert loaded.gallery_.dtype == np.int8
+        assert np.mean(loaded.predict(X) == y) >= 0.95
+
+    @pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+    def test_ivf_index_is_quantized(self, tmp_path, metric):
+        """Com `backend='ivf'`, o índice não deve guardar uma cópia float32 da galeria."""
+        X, y = make_blobs_data()
+        groups = make_groups(y)
+        params = dict(n_neighbors=5, metric=metric, backend="ivf", index_params={"n_lists": 4, "n_probe": 4})
+        full = SyndromeClassifier(**params).fit(X[::2], y[::2])
+        model = SyndromeClassifier(dtype="int8", **params).fit(X[::2], y[::2], subjects=groups[::2])
+
+        assert model.index.vectors.dtype == np.int8
+        index_bytes = sum(value.nbytes for value in model.index.to_arrays().values())
+        full_bytes = sum(value.nbytes for value in full.index.to_arrays().values())
+        assert index_bytes < full_bytes / 2
+        assert np.mean(model.predict(X[1::2]) == full.predict(X[1::2])) >= 0.95
+
+        loaded = SyndromeClassifier.load(model.save(tmp_path / "model"))
+        assert loaded.index.vectors.dtype == np.int8
+        np.testing.assert_array_equal(loaded.predict_proba(X[1::2]), model.predict_proba(X[1::2]))
+
+        # A compactação de um modelo carregado reconstrói o índice no mesmo formato
+        loaded.remove_subjects(np.unique(groups[::2])[:3])
+        loaded.compact()
+        assert loaded.index.vectors.dtype == np.int8
@@ -0,0 +1,71 @@
+"""
+Testes unitários para a renderização de gráficos em arquivo.
+"""
+
+import subprocess
+import sys
+
+import pytest
+import numpy as np
+
+from src.ml_challenge.models.evaluation import plot_roc_curve
+from src.ml_challenge.utils.rendering import PlotRenderer, decimate, scatter_style
+from src.ml_challenge.utils.visualization import plot_tsne
+from tests.test_classification import make_blobs_data
+
+
+class TestPlotRenderer:
+    """Testes para o renderizador sem interface gráfica."""
+
+    def test_background_rendering_writes_files(self, tmp_path):
+        """As figuras devem ser salvas em todos os formatos."""
+        X, y = make_blobs_data()
+        embedding = X[:, :2]
+        with PlotRenderer(tmp_path, formats=('png', 'svg')) as renderer:
+            plot_tsne(X, y, embedding, renderer=renderer)
+            plot_roc_curve(X, y, 5, renderer=renderer)
+            paths = renderer.wait()
+
+        assert sorted(p.name for p in paths) == ['roc_curve.png', 'roc_curve.svg', 'tsne.png', 'tsne.svg']
+        assert all(p.stat().st_size > 0 for p in paths)
+
+    def test_background_rendering_does_not_import_pyplot(self, tmp_path):
+        """Renderizar não deve importar o pyplot (verificado em um processo novo)."""
+        code = (
+            "import sys\n"
+            "from src.ml_challenge.models.evaluation import plot_roc_curve\n"
+            "from src.ml_challenge.utils.rendering import PlotRenderer\n"
+            "from src.ml_challenge.utils.visualization import plot_tsne\n"
+            "from tests.test_classification import make_blobs_data\n"
+            "X, y = make_blobs_data()\n"
+            f"with PlotRenderer({str(tmp_path)!r}) as renderer:\n"
+            "    plot_tsne(X, y, X[:, :2], renderer=renderer)\n"
+            "    plot_roc_curve(X, y, 5, renderer=renderer)\n"
+            "    renderer.wait()\n"
+            "print('matplotlib.pyplot' in sys.modules)\n"
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+        assert output.stdout.strip().splitlines()[-1] == "False"
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['roc_curve.png', 'tsne.png']
+
+    def test_errors_are_raised_on_wait(self, tmp_path):
+        """Um erro ao desenhar deve aparecer ao aguardar as figuras."""
+        def broken(fig):
+            raise RuntimeError("falha")
+
+        renderer = PlotRenderer(tmp_path)
+        renderer.submit('broken', broken)
+        with pytest.raises(RuntimeError):
+            renderer.close()
+
+    def test_large_scatter_is_decimated(self):
+        """Nuvens grandes devem ser subamostradas por classe e rasterizadas."""
+        labels = np.repeat([0, 1], [9_990, 10])
+        idx = decimate(len(labels), 1_000, labels=labels)
+
+        assert len(idx) <= 1_000
+        assert set(labels[idx]) == {0, 1}
+        assert len(decimate(100, 1_000)) == 100
+        assert scatter_style(1_000_000)['rasterized']
+        assert scatter_style(100) == {}
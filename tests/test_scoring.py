@@ -0,0 +1,53 @@
+"""
+Testes unitários para a avaliação de várias métricas em uma única passada.
+"""
+
+import pytest
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.neighbors import KNeighborsClassifier
+
+from src.ml_challenge.models.folds import FoldPlan
+from src.ml_challenge.models.scoring import read_scores_csv, score_knn, write_scores_csv
+from tests.test_classification import make_blobs_data, make_groups
+
+
+class TestScoreKnn:
+    """Testes para a tabela de métricas por (métrica de distância, K)."""
+
+    def test_matches_sklearn_out_of_fold(self):
+        """Cada linha deve coincidir com as métricas do scikit-learn sobre as predições fora do fold."""
+        X, y = make_blobs_data()
+        # Ruído extra para que as classes se sobreponham e as métricas não saturem
+        X = X + np.random.default_rng(1).normal(scale=2.5, size=X.shape).astype(np.float32)
+        plan = FoldPlan.build(y, make_groups(y), n_splits=3, cache_dir=None)
+
+        rows = score_knn(X, y, k_range=(1, 4, 7), metrics=("euclidean",), cv=plan, top_k=(2,))
+
+        assert [(row["metric"], row["k"]) for row in rows] == [("euclidean", 1), ("euclidean", 4), ("euclidean", 7)]
+        for row in rows:
+            proba = np.zeros((len(y), 4))
+            for train_idx, test_idx in plan.split(X, y):
+                model = KNeighborsClassifier(n_neighbors=row["k"], algorithm="brute").fit(X[train_idx], y[train_idx])
+                proba[test_idx] = model.predict_proba(X[test_idx])
+            classes = np.unique(y)
+            y_pred = classes[proba.argmax(axis=1)]
+            top_2 = classes[np.argsort(-proba, axis=1, kind="stable")[:, :2]]
+
+            assert row["n_samples"] == len(y)
+            assert row["accuracy"] == pytest.approx(accuracy_score(y, y_pred))
+            assert row["f1_macro"] == pytest.approx(f1_score(y, y_pred, average="macro"))
+            assert row["auc"] == pytest.approx(roc_auc_score(y, proba, multi_class="ovr"))
+            assert row["top_2_accuracy"] == pytest.approx((top_2 == y[:, None]).any(axis=1).mean())
+
+    def test_csv_roundtrip(self, tmp_path):
+        """A tabela gravada em CSV deve ser lida de volta com os mesmos valores."""
+        X, y = make_blobs_data()
+        rows = score_knn(X, y, k_range=(3, 5), cv=3)
+
+        path = write_scores_csv(rows, tmp_path / "scores" / "knn_scores.csv")
+
+        assert path.read_text().splitlines()[0] == (
+            "metric,k,n_samples,accuracy,f1_macro,auc,top_3_accuracy,top_5_accuracy"
+        )
+        assert read_scores_csv(path) == rows
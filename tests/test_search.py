@@ -0,0 +1,65 @@
+"""
+Testes unitários para a busca de hiperparâmetros com successive halving.
+"""
+
+import pytest
+import numpy as np
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.ml_challenge.models.neighbors import distance_weights
+from src.ml_challenge.models.search import search_space, successive_halving_search
+from tests.test_classification import make_blobs_data
+
+
+def make_noisy_data():
+    """Blobs com ruído suficiente para que as configurações se diferenciem."""
+    X, y = make_blobs_data(n_classes=5, n_per_class=40, seed=3)
+    X += np.random.default_rng(0).normal(scale=2.0, size=X.shape).astype(np.float32)
+    return X, y
+
+
+class TestSuccessiveHalvingSearch:
+    """Testes para a busca sobre K, métrica, ponderação e normalização."""
+
+    @pytest.mark.parametrize("config", [
+        ("none", "euclidean", "distance", 4),
+        ("standard", "manhattan", "distance", 7),
+        ("none", "cosine", "uniform", 10),
+    ])
+    def test_full_grid_matches_sklearn(self, config):
+        """Sem descartes, a acurácia de cada configuração deve coincidir com o scikit-learn."""
+        X, y = make_noisy_data()
+        cv = StratifiedKFold(5, shuffle=True, random_state=0)
+        result = successive_halving_search(X, y, cv=cv, k_range=range(1, 11), min_folds=5)
+        scores = {(e["normalization"], e["metric"], e["weighting"], e["k"]): e["accuracy"]
+                  for e in result["leaderboard"]}
+
+        normalization, metric, weighting, k = config
+        clf = KNeighborsClassifier(k, metric=metric, weights=weighting, algorithm="brute")
+        if normalization == "standard":
+            clf = make_pipeline(StandardScaler(), clf)
+        assert scores[config] == pytest.approx(cross_val_score(clf, X, y, cv=cv).mean())
+
+    def test_halving_discards_and_reuses_tables(self):
+        """As rodadas devem reduzir as configurações e calcular menos tabelas que a grade completa."""
+        X, y = make_noisy_data()
+        cv = StratifiedKFold(6, shuffle=True, random_state=0)
+        result = successive_halving_search(X, y, cv=cv, k_range=range(1, 16), min_folds=2, eta=20)
+
+        assert result["n_configs"] == len(search_space(range(1, 16)))
+        assert [rung["n_folds"] for rung in result["rungs"]] == [2, 6]
+        assert result["rungs"][1]["n_configs"] == int(np.ceil(result["n_configs"] / 20))
+        # 8 pares (normalização, métrica) x 6 folds na grade completa
+        assert result["n_tables"] < 8 * 6
+        assert result["best"] == result["leaderboard"][0]
+        assert result["best"]["n_folds"] == 6
+
+    def test_distance_weights_with_exact_matches(self):
+        """Vizinhos à distância zero devem concentrar todo o peso da linha."""
+        weights = distance_weights(np.array([[0.0, 0.5, 1.0], [0.5, 1.0, 2.0]]))
+
+        np.testing.assert_array_equal(weights[0], [1.0, 0.0, 0.0])
+        np.testing.assert_allclose(weights[1], [2.0, 1.0, 0.5])
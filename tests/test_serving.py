@@ -0,0 +1,125 @@
+"""
+Testes unitários para o servidor local de inferência.
+"""
+
+import asyncio
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+import numpy as np
+
+from src.ml_challenge.models.classifier import SyndromeClassifier
+from src.ml_challenge.serving import InferenceServer, LatencyTracker, predict_remote
+from tests.test_classification import make_blobs_data
+
+
+def run_with_server(model, client, **params):
+    """Sobe o servidor em uma porta livre, executa `client(url)` em threads e o encerra."""
+    async def scenario():
+        server = await InferenceServer(model, port=0, **params).start()
+        try:
+            return await client(f"http://127.0.0.1:{server.port}"), server.metrics()
+        finally:
+            await server.stop()
+
+    return asyncio.run(scenario())
+
+
+def fetch(url, data=None, method="GET"):
+    """Requisição HTTP simples, retornando (status, JSON)."""
+    request = urllib.request.Request(url, data=data, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as err:
+        return err.code, json.loads(err.read())
+
+
+class TestInferenceServer:
+    """Testes para o serviço HTTP com micro-lotes."""
+
+    def test_concurrent_requests_are_batched(self):
+        """Requisições concorrentes devem ser agrupadas sem alterar as respostas."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=5).fit(X[::2], y[::2])
+        queries = X[1::2]
+
+        async def client(url):
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*[
+                loop.run_in_executor(None, predict_remote, url, queries[i:i + 2], 1 + i % 3)
+                for i in range(0, len(queries), 2)
+            ])
+
+        results, metrics = run_with_server(model, client, max_batch_size=32, max_wait_ms=50)
+
+        expected_labels, expected_scores = model.predict_topk(queries, k=3)
+        for i, (labels, scores) in zip(range(0, len(queries), 2), results):
+            k = 1 + i % 3
+            np.testing.assert_array_equal(labels, expected_labels[i:i + 2, :k])
+            np.testing.assert_allclose(scores, expected_scores[i:i + 2, :k])
+        assert metrics["requests"] == len(results)
+        assert metrics["batches"] < len(results)
+        assert metrics["latency_ms"]["p50"] is not None
+
+    def test_routes_and_errors(self):
+        """Rotas auxiliares e requisições inválidas devem ter respostas JSON."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=3).fit(X, y)
+
+        async def client(url):
+            loop = asyncio.get_running_loop()
+            calls = [
+                (url + "/health",),
+                (url + "/metrics",),
+                (url + "/unknown",),
+                (url + "/predict",),
+                (url + "/predict", b"not json", "POST"),
+                (url + "/predict", json.dumps({"embeddings": [[0.0, 1.0]]}).encode(), "POST"),
+            ]
+            return [await loop.run_in_executor(None, fetch, *call) for call in calls]
+
+        (health, metrics, unknown, wrong_method, bad_json, bad_shape), _ = run_with_server(model, client)
+
+        assert health == (200, {"status": "ok", "n_samples": len(y), "n_features": X.shape[1], "n_classes": 4})
+        assert metrics[0] == 200 and metrics[1]["requests"] == 0
+        assert [unknown[0], wrong_method[0], bad_json[0], bad_shape[0]] == [404, 405, 400, 400]
+
+
+    def test_negative_content_length(self):
+        """Um Content-Length negativo deve receber 400 e fechar a conexão, sem derrubar o servidor."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=3).fit(X, y)
+
+        async def client(url):
+            host, port = url[len("http://"):].split(":")
+            reader, writer = await asyncio.open_connection(host, int(port))
+            writer.write(b"POST /predict HTTP/1.1\r\nContent-Length: -1\r\n\r\n")
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            health = await asyncio.get_running_loop().run_in_executor(None, fetch, url + "/health")
+            return response, health
+
+        (response, health), _ = run_with_server(model, client)
+
+        head, _, body = response.partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 400") and b"Connection: close" in head
+        assert "error" in json.loads(body)
+        assert health[0] == 200
+
+
+class TestLatencyTracker:
+    """Testes para os percentis de latência."""
+
+    def test_percentiles(self):
+        """Os percentis devem ser reportados em milissegundos."""
+        tracker = LatencyTracker(window=100)
+        assert tracker.percentiles() == {"p50": None, "p90": None, "p99": None}
+        for ms in range(1, 101):
+            tracker.record(ms / 1000)
+
+        assert tracker.count == 100
+        assert tracker.percentiles((50,))["p50"] == pytest.approx(50.5)
@@ -0,0 +1,112 @@
+"""
+Testes unitários para os intervalos de confiança por bootstrap.
+"""
+
+import pytest
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+from src.ml_challenge.models.classification import evaluate_knn
+from src.ml_challenge.models.folds import FoldPlan
+from src.ml_challenge.models.statistics import (
+    bootstrap_k_range,
+    out_of_fold_neighbors,
+    resample_weights,
+    weighted_metrics,
+)
+from tests.test_classification import make_blobs_data, make_groups
+
+
+def noisy_scores(n_samples=120, n_classes=4, seed=0):
+    """Scores discretos (como votos do KNN) com acerto parcial."""
+    rng = np.random.default_rng(seed)
+    y_true = rng.integers(0, n_classes, size=n_samples)
+    votes = rng.integers(0, 3, size=(n_samples, n_classes))
+    votes[np.arange(n_samples), y_true] += rng.integers(0, 4, size=n_samples)
+    return y_true, votes / votes.sum(axis=1, keepdims=True).clip(1)
+
+
+class TestWeightedMetrics:
+    """Testes para as métricas ponderadas de cada réplica."""
+
+    def test_replicate_matches_explicit_resample(self):
+        """Cada réplica deve coincidir com as métricas do scikit-learn sobre a amostra reamostrada."""
+        y_true, y_score = noisy_scores()
+        W = resample_weights(len(y_true), n_boot=3, random_state=1)
+        metrics = weighted_metrics(W, y_true, y_score, top_k=(2,))
+
+        for b in range(3):
+            idx = np.repeat(np.arange(len(y_true)), W[b])
+            y_pred = y_score[idx].argmax(axis=1)
+            top_2 = np.argsort(-y_score[idx], axis=1, kind="stable")[:, :2]
+            assert metrics["accuracy"][b] == pytest.approx(accuracy_score(y_true[idx], y_pred))
+            assert metrics["f1_macro"][b] == pytest.approx(f1_score(y_true[idx], y_pred, average="macro"))
+            assert metrics["auc"][b] == pytest.approx(
+                roc_auc_score(y_true[idx], y_score[idx], multi_class="ovr", labels=np.arange(4))
+            )
+            assert metrics["top_2_accuracy"][b] == pytest.approx((top_2 == y_true[idx][:, None]).any(axis=1).mean())
+
+    def test_resample_subjects(self):
+        """Com grupos, as imagens de um sujeito recebem sempre o mesmo peso."""
+        groups = np.repeat(np.arange(10), [1, 2, 3, 4, 1, 2, 3, 4, 1, 2])
+        W = resample_weights(len(groups), n_boot=50, random_state=0, groups=groups)
+
+        assert W.shape == (50, len(groups))
+        for g in range(10):
+            assert (W[:, groups == g] == W[:, groups == g][:, :1]).all()
+        # Cada réplica sorteia 10 sujeitos: a soma das contagens por sujeito é 10
+        counts = np.stack([W[:, groups == g][:, 0] for g in range(10)], axis=1)
+        assert (counts.sum(axis=1) == 10).all()
+
+    def test_auc_paths_agree(self, monkeypatch):
+        """O AUC por produto de matrizes e por `reduceat` devem coincidir."""
+        import src.ml_challenge.models.statistics as statistics
+
+        y_true, y_score = noisy_scores(seed=3)
+        W = resample_weights(len(y_true), n_boot=5).astype(np.float64)
+        expected = statistics._weighted_auc_ovr(W, y_true, y_score)
+        monkeypatch.setattr(statistics, "GROUP_MATMUL_LIMIT", 0)
+        np.testing.assert_allclose(statistics._weighted_auc_ovr(W, y_true, y_score), expected)
+
+
+class TestBootstrap:
+    """Testes para os intervalos por K a partir das predições fora do fold."""
+
+    def test_intervals_around_cross_validated_accuracy(self):
+        """A estimativa deve ficar dentro do intervalo e o melhor K ter diferença nula."""
+        X, y = make_blobs_data()
+        groups = make_groups(y)
+        plan = FoldPlan.build(y, groups, n_splits=4, cache_dir=None)
+
+        oof = out_of_fold_neighbors(X, y, 7, "euclidean", cv=plan, groups=groups)
+        results = bootstrap_k_range(oof, range(1, 8), n_boot=200)
+
+        assert (oof["neighbor_labels"] >= 0).all()
+        assert len(np.unique(oof["group_codes"])) == len(np.unique(groups))
+        assert [res["k"] for res in results] == list(range(1, 8))
+        for res in results:
+            for name in ("accuracy", "f1_macro", "auc", "top_3_accuracy", "top_5_accuracy"):
+                assert res[f"{name}_low"] <= res[name] <= res[f"{name}_high"]
+        assert max(res["accuracy_delta"] for res in results) == 0.0
+
+        # Os folds têm o mesmo tamanho: a acurácia fora do fold é a média dos folds do `evaluate_knn`
+        assert len(set(np.bincount(plan.fold_ids))) == 1
+        expected = evaluate_knn(X, y, k_range=range(1, 8), metrics=("euclidean",), cv=plan)
+        for res, exp in zip(results, expected):
+            assert res["accuracy"] == pytest.approx(exp["accuracy_euclidean"])
+
+    def test_subject_intervals_are_wider(self):
+        """Com erros concentrados por sujeito, reamostrar sujeitos deve alargar o intervalo."""
+        # 20 sujeitos com 5 imagens cada; metade dos sujeitos tem todas as imagens erradas
+        group_codes = np.repeat(np.arange(20), 5)
+        y_codes = group_codes % 2
+        wrong = np.isin(group_codes, np.arange(0, 20, 4)) | np.isin(group_codes, np.arange(1, 20, 4))
+        predicted = np.where(wrong[:, None], 1 - y_codes[:, None], y_codes[:, None])
+        oof = {"neighbor_labels": predicted, "y_codes": y_codes, "classes": np.array(["a", "b"]),
+               "group_codes": group_codes}
+        by_image = bootstrap_k_range(dict(oof, group_codes=np.arange(100)), [1], n_boot=500, top_k=())[0]
+        by_subject = bootstrap_k_range(oof, [1], n_boot=500, top_k=())[0]
+
+        width = lambda res: res["accuracy_high"] - res["accuracy_low"]  # noqa: E731
+        assert by_subject["accuracy"] == by_image["accuracy"] == 0.5
+        assert width(by_subject) > 1.5 * width(by_image)
@@ -0,0 +1,86 @@
+"""
+Testes unitários para a predição e avaliação por sujeito.
+"""
+
+import pytest
+import numpy as np
+
+from src.ml_challenge.models.classifier import SyndromeClassifier
+from src.ml_challenge.models.folds import FoldPlan
+from src.ml_challenge.models.subjects import evaluate_subjects, fuse_scores
+from tests.test_classification import make_blobs_data, make_groups
+
+
+class TestFuseScores:
+    """Testes para a fusão vetorizada dos scores das imagens."""
+
+    def test_fusions_match_per_subject_loop(self):
+        """Cada fusão deve coincidir com o cálculo sujeito a sujeito."""
+        rng = np.random.default_rng(0)
+        # Scores discretos, como os votos do KNN, para que haja empates dentro das imagens
+        scores = rng.integers(0, 3, size=(20, 4)) / 2
+        subjects = rng.choice(["a", "b", "c", "d", "e"], size=20)
+
+        for fusion in ("mean", "max", "rank"):
+            subject_ids, fused = fuse_scores(scores, subjects, fusion)
+            assert subject_ids.tolist() == sorted(set(subjects))
+            for subject, row in zip(subject_ids, fused):
+                own = scores[subjects == subject]
+                if fusion == "mean":
+                    expected = own.mean(axis=0)
+                elif fusion == "max":
+                    expected = own.max(axis=0)
+                else:
+                    # Posição de cada classe: 1 + número de classes com score estritamente maior
+                    positions = 1 + (own[:, None, :] > own[:, :, None]).sum(axis=2)
+                    expected = (1.0 / (60 + positions)).sum(axis=0)
+                np.testing.assert_allclose(row, expected)
+
+    def test_rank_ignores_order_of_zero_vote_classes(self):
+        """Classes sem votos empatam e não podem superar as classes votadas pela ordem dos índices."""
+        scores = np.zeros((2, 10))
+        scores[0, 5] = 1.0
+        scores[1, 6] = 1.0
+        _, fused = fuse_scores(scores, np.array(["a", "a"]), "rank")
+
+        assert set(np.argsort(-fused[0], kind="stable")[:2]) == {5, 6}
+        assert fused[0, 5] == fused[0, 6] == pytest.approx(1 / 61 + 1 / 62)
+        np.testing.assert_allclose(np.delete(fused[0], [5, 6]), 2 / 62)
+
+    def test_unknown_fusion(self):
+        """Fusões desconhecidas devem ser rejeitadas."""
+        with pytest.raises(ValueError):
+            fuse_scores(np.ones((2, 2)), np.array(["a", "b"]), "median")
+
+
+class TestSubjectPrediction:
+    """Testes para a predição e avaliação agregadas por sujeito."""
+
+    def test_predict_subjects_single_image_matches_predict_topk(self):
+        """Com uma imagem por sujeito, a fusão 'mean' deve reproduzir o top-k por imagem."""
+        X, y = make_blobs_data()
+        model = SyndromeClassifier(n_neighbors=5).fit(X[::2], y[::2])
+        queries = X[1::2]
+        subjects = np.array([f"s{i:03d}" for i in range(len(queries))])
+
+        subject_ids, labels, scores = model.predict_subjects(queries, subjects, k=3)
+        expected_labels, expected_scores = model.predict_topk(queries, k=3)
+
+        assert subject_ids.tolist() == subjects.tolist()
+        np.testing.assert_array_equal(labels, expected_labels)
+        np.testing.assert_allclose(scores, expected_scores)
+
+    def test_evaluate_subjects(self):
+        """A avaliação deve reportar top-k por imagem e por sujeito para cada fusão."""
+        X, y = make_blobs_data()
+        groups = make_groups(y)
+        plan = FoldPlan.build(y, groups, n_splits=4, cache_dir=None)
+
+        results = evaluate_subjects(X, y, groups, k=5, cv=plan, top_k=(1, 2))
+
+        assert set(results) == {"euclidean", "cosine"}
+        for by_name in results.values():
+            assert by_name["image"]["n"] == len(y)
+            for fusion in ("mean", "max", "rank"):
+                assert by_name[fusion]["n"] == len(np.unique(groups))
+                assert 0.9 <= by_name[fusion]["top_1"] <= by_name[fusion]["top_2"] <= 1.0